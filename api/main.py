@@ -6,7 +6,8 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 from config.settings import settings
-from api.routes import cars, health, ml
+from db.instrumentation import track_queries
+from api.routes import cars, catalog, health, market, ml
 
 app = FastAPI(
     title="CarBot API",
@@ -30,10 +31,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def track_db_queries(request: Request, call_next):
+    """Count DB statements and time per request and expose them as response headers."""
+    with track_queries(f"{request.method} {request.url.path}") as stats:
+        response = await call_next(request)
+    response.headers["X-DB-Queries"] = str(stats.statements)
+    response.headers["X-DB-Time-Ms"] = f"{stats.total_time_ms:.1f}"
+    return response
+
+
 # Include routers
 app.include_router(health.router, tags=["health"])
 app.include_router(cars.router, prefix="/api/v1/cars", tags=["cars"])
 app.include_router(ml.router, prefix="/api/v1/ml", tags=["ml"])
+app.include_router(catalog.router, prefix="/api/v1/catalog", tags=["catalog"])
+app.include_router(market.router, prefix="/api/v1/market", tags=["market"])
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -0,0 +1,164 @@
+"""Catalog endpoints for the Brand → Model → Generation → Version → Spec tree."""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from config.settings import settings
+from db.database import get_db
+from db.models import Brand, Model, Generation, Version, Spec, Image, Document
+from api.schemas import (
+    BrandResponse,
+    ModelResponse,
+    GenerationResponse,
+    GenerationTreeResponse,
+    CatalogImageResponse,
+    DocumentResponse,
+)
+
+router = APIRouter()
+
+# generation_id -> (tree version, serialized tree)
+_generation_cache: Dict[int, Tuple[Tuple[int, datetime], Dict[str, Any]]] = {}
+
+SPEC_COLUMNS = [c.name for c in Spec.__table__.columns if c.name not in ("id", "version_id", "updated_at")]
+
+
+def _serialize_spec(spec: Optional[Spec]) -> Optional[Dict[str, Any]]:
+    """Serialize a spec sheet, leaving out columns that were never filled."""
+    if spec is None:
+        return None
+    values = {name: getattr(spec, name) for name in SPEC_COLUMNS}
+    return {name: value for name, value in values.items() if value is not None}
+
+
+def _serialize_generation_tree(generation: Generation) -> Dict[str, Any]:
+    """Serialize an eagerly loaded generation; touches no lazy relationship."""
+    tree = GenerationResponse.model_validate(generation).model_dump()
+    tree["description"] = generation.description
+    tree["brand"] = BrandResponse.model_validate(generation.model.brand).model_dump()
+    tree["model"] = ModelResponse.model_validate(generation.model).model_dump()
+    tree["documents"] = [
+        DocumentResponse.model_validate(doc).model_dump() for doc in generation.documents
+    ]
+    tree["versions"] = [
+        {
+            "id": version.id,
+            "version_name": version.version_name,
+            "production_years": version.production_years,
+            "engine_type": version.engine_type,
+            "engine_details": version.engine_details,
+            "url": version.url,
+            "spec": _serialize_spec(version.spec),
+            "images": [
+                CatalogImageResponse.model_validate(img).model_dump() for img in version.images
+            ],
+        }
+        for version in sorted(generation.versions, key=lambda v: v.id)
+    ]
+    return tree
+
+
+def _load_generation_tree(db: Session, generation_id: int) -> Optional[Generation]:
+    """Load a generation with its whole tree in two queries.
+
+    Query 1 joins the generation with its model, brand and documents.
+    Query 2 (selectin) loads all versions joined with their spec and images.
+    """
+    return (
+        db.query(Generation)
+        .options(
+            joinedload(Generation.model).joinedload(Model.brand),
+            joinedload(Generation.documents),
+            selectinload(Generation.versions).options(
+                joinedload(Version.spec),
+                joinedload(Version.images),
+            ),
+        )
+        .filter(Generation.id == generation_id)
+        .first()
+    )
+
+
+def _generation_tree_version(db: Session, generation_id: int) -> Optional[Tuple[int, datetime]]:
+    """(rows, latest updated_at) of a generation's tree, in one query; None if there is no such generation.
+
+    Every write to the tree - from this process or from the autoevolution
+    crawler - bumps the latest ``updated_at``, and deleting rows changes the
+    row count, so a new version means the cached tree is stale.
+    """
+    in_generation = Generation.id == generation_id
+    in_versions = Version.generation_id == generation_id
+    stamps = db.query(Generation.updated_at.label("updated_at")).filter(in_generation).union_all(
+        db.query(Model.updated_at).join(Generation).filter(in_generation),
+        db.query(Brand.updated_at).join(Model).join(Generation).filter(in_generation),
+        db.query(Document.updated_at).filter(Document.generation_id == generation_id),
+        db.query(Version.updated_at).filter(in_versions),
+        db.query(Spec.updated_at).join(Version).filter(in_versions),
+        db.query(Image.updated_at).join(Version).filter(in_versions),
+    ).subquery()
+    rows, latest = db.query(func.count(), func.max(stamps.c.updated_at)).one()
+    return (rows, latest) if rows else None
+
+
+@router.get("/brands", response_model=List[BrandResponse])
+async def list_brands(db: Session = Depends(get_db)):
+    """List all catalog brands."""
+    return db.query(Brand).order_by(Brand.name).all()
+
+
+@router.get("/brands/{brand_id}/models", response_model=List[ModelResponse])
+async def list_brand_models(brand_id: int, db: Session = Depends(get_db)):
+    """List the models of a brand."""
+    if not db.query(Brand.id).filter(Brand.id == brand_id).first():
+        raise HTTPException(status_code=404, detail="Brand not found")
+    return db.query(Model).filter(Model.brand_id == brand_id).order_by(Model.name).all()
+
+
+@router.get("/models/{model_id}/generations", response_model=List[GenerationResponse])
+async def list_model_generations(model_id: int, db: Session = Depends(get_db)):
+    """List the generations of a model."""
+    if not db.query(Model.id).filter(Model.id == model_id).first():
+        raise HTTPException(status_code=404, detail="Model not found")
+    return (
+        db.query(Generation)
+        .filter(Generation.model_id == model_id)
+        .order_by(Generation.start_year, Generation.id)
+        .all()
+    )
+
+
+@router.get("/generations/{generation_id}", response_model=GenerationTreeResponse)
+async def get_generation_tree(
+    generation_id: int, request: Request, response: Response, db: Session = Depends(get_db)
+):
+    """Get a generation with its brand, model, documents, versions, specs and images.
+
+    Trees are cached per generation id under their version, so a write by the
+    autoevolution crawler is served on the next request. The version is also
+    the response's ETag: a client that already has it gets a 304.
+    """
+    version = _generation_tree_version(db, generation_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+
+    rows, latest = version
+    headers = {
+        "ETag": f'"{generation_id}-{rows}-{latest.timestamp():.6f}"',
+        "Cache-Control": f"max-age={settings.catalog_cache_max_age_seconds}",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    cached = _generation_cache.get(generation_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    generation = _load_generation_tree(db, generation_id)
+    if not generation:
+        raise HTTPException(status_code=404, detail="Generation not found")
+
+    tree = _serialize_generation_tree(generation)
+    _generation_cache[generation_id] = (version, tree)
+    return tree
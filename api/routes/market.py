@@ -0,0 +1,66 @@
+"""Market statistics endpoints served from the pre-aggregated materialized views."""
+from typing import Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from db.database import get_db
+from db.market_views import price_by_model_year, dealer_pricing, mileage_buckets
+
+router = APIRouter()
+
+
+def _filtered(view, make: Optional[str], model: Optional[str], currency: Optional[str]):
+    """Select from a market view with the common make/model/currency filters."""
+    query = select(view)
+    if make:
+        query = query.where(view.c.make.ilike(make))
+    if model:
+        query = query.where(view.c.model.ilike(model))
+    if currency:
+        query = query.where(view.c.currency == currency)
+    return query
+
+
+@router.get("/price-by-year")
+async def get_price_by_year(
+    make: Optional[str] = None,
+    model: Optional[str] = None,
+    currency: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Price statistics per make, model and year."""
+    view = price_by_model_year
+    query = _filtered(view, make, model, currency).order_by(view.c.make, view.c.model, view.c.year)
+    return [dict(row) for row in db.execute(query).mappings()]
+
+
+@router.get("/dealers")
+async def get_dealer_pricing(
+    make: Optional[str] = None,
+    model: Optional[str] = None,
+    currency: Optional[str] = None,
+    dealer_type: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Pricing per dealer, busiest dealers first."""
+    view = dealer_pricing
+    query = _filtered(view, make, model, currency)
+    if dealer_type:
+        query = query.where(view.c.dealer_type == dealer_type)
+    query = query.order_by(view.c.listings.desc(), view.c.dealer_name)
+    return [dict(row) for row in db.execute(query).mappings()]
+
+
+@router.get("/mileage-buckets")
+async def get_mileage_buckets(
+    make: Optional[str] = None,
+    model: Optional[str] = None,
+    currency: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Price statistics per 25 000 km mileage bucket (-1 = unknown mileage)."""
+    view = mileage_buckets
+    query = _filtered(view, make, model, currency).order_by(
+        view.c.make, view.c.model, view.c.mileage_bucket_km
+    )
+    return [dict(row) for row in db.execute(query).mappings()]
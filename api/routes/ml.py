@@ -1,10 +1,12 @@
 """ML-powered API endpoints for car analysis."""
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
 from db.database import get_db
+from db.market_views import price_by_model_year, dealer_pricing, mileage_buckets
 from db.models import CarAdRaw
 from ml.image_analyzer import CarImageAnalyzer
 from ml.price_predictor import CarPricePredictor
@@ -188,37 +190,26 @@ async def train_price_model(db: Session = Depends(get_db)):
 
 
 @router.get("/market-analysis")
-async def get_market_analysis(limit: int = 100, db: Session = Depends(get_db)):
-    """Get comprehensive market analysis."""
+async def get_market_analysis(currency: Optional[str] = None, db: Session = Depends(get_db)):
+    """Get comprehensive market analysis of all active ads, from the market materialized views."""
     try:
-        # Get car ads
-        car_ads = db.query(CarAdRaw).filter(CarAdRaw.is_active == True).limit(limit).all()
-        
-        if not car_ads:
+        rows = {}
+        for view in (price_by_model_year, dealer_pricing, mileage_buckets):
+            query = select(view)
+            if currency:
+                query = query.where(view.c.currency == currency)
+            rows[view.name] = [dict(row) for row in db.execute(query).mappings()]
+        
+        if not rows[price_by_model_year.name]:
             return {"error": "No car ads found"}
         
-        # Convert to dict format
-        ads_data = []
-        for ad in car_ads:
-            ad_dict = {
-                "year": ad.year,
-                "mileage": ad.mileage,
-                "engine_power": ad.engine_power,
-                "engine_displacement": ad.engine_displacement,
-                "fuel_type": ad.fuel_type,
-                "transmission": ad.transmission,
-                "body_type": ad.body_type,
-                "color": ad.color,
-                "dealer_type": ad.dealer_type,
-                "price": ad.price
-            }
-            ads_data.append(ad_dict)
-        
         # Analyze market
-        market_analysis = price_predictor.analyze_market(ads_data)
+        market_analysis = price_predictor.analyze_market(
+            rows[price_by_model_year.name], rows[dealer_pricing.name], rows[mileage_buckets.name]
+        )
         
         return {
-            "total_listings": len(ads_data),
+            "total_listings": market_analysis.get("market_overview", {}).get("total_listings", 0),
             "analysis": market_analysis,
             "model_trained": price_predictor.is_trained
         }
@@ -85,3 +85,90 @@ class OfficialCarDataResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+class BrandResponse(BaseModel):
+    """Response model for a catalog brand."""
+    
+    id: int
+    name: str
+    country: Optional[str] = None
+    url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ModelResponse(BaseModel):
+    """Response model for a catalog model."""
+    
+    id: int
+    brand_id: int
+    name: str
+    body_type: Optional[str] = None
+    start_year: Optional[int] = None
+    end_year: Optional[int] = None
+    url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class GenerationResponse(BaseModel):
+    """Response model for a catalog generation (without its versions)."""
+    
+    id: int
+    model_id: int
+    code: Optional[str] = None
+    gen_name: Optional[str] = None
+    start_year: Optional[int] = None
+    end_year: Optional[int] = None
+    url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CatalogImageResponse(BaseModel):
+    """Response model for a version image."""
+    
+    id: int
+    url: str
+    caption: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DocumentResponse(BaseModel):
+    """Response model for a generation document."""
+    
+    id: int
+    doc_type: Optional[str] = None
+    url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class VersionResponse(BaseModel):
+    """Response model for a version with its spec sheet and images."""
+    
+    id: int
+    version_name: Optional[str] = None
+    production_years: Optional[str] = None
+    engine_type: Optional[str] = None
+    engine_details: Optional[str] = None
+    url: Optional[str] = None
+    spec: Optional[Dict[str, Any]] = None
+    images: List[CatalogImageResponse] = []
+
+
+class GenerationTreeResponse(GenerationResponse):
+    """Response model for a whole generation tree: brand, model, documents and versions."""
+    
+    description: Optional[str] = None
+    brand: BrandResponse
+    model: ModelResponse
+    documents: List[DocumentResponse] = []
+    versions: List[VersionResponse] = []
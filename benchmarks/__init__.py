@@ -0,0 +1 @@
+"""Extractor throughput benchmarks over a synthetic page corpus."""
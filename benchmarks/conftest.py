@@ -0,0 +1,50 @@
+"""Fixtures of the extractor benchmarks, plus a pages/sec and fields/page summary."""
+import os
+from typing import Dict, List
+
+import pytest
+from pydantic import ValidationError
+
+from benchmarks.corpus import CorpusPage, load_corpus
+from benchmarks.harness import Column, format_header, format_row
+
+# The benchmarks never touch the database, but the scraper modules they import
+# load the settings, which require database credentials. Without any (no .env,
+# nothing in the environment), load them with offline placeholders.
+try:
+    import config.settings  # noqa: F401
+except ValidationError:
+    os.environ.update({
+        "DATABASE_URL": "postgresql+psycopg2://benchmarks@localhost/benchmarks",
+        "DATABASE_USER": "benchmarks",
+        "DATABASE_PASSWORD": "benchmarks",
+        "DATABASE_HOST": "localhost",
+        "DATABASE_NAME": "benchmarks",
+    })
+
+# Throughput of every benchmarked extractor in this session, for the terminal summary
+THROUGHPUT: List[Dict] = []
+SUMMARY_COLUMNS = [
+    Column("extractor", 24, align="<"), Column("pages", 6), Column("pages/sec", 12, ".1f"), Column("fields/page", 12, ".1f"),
+]
+
+
+@pytest.fixture(scope="session")
+def corpus() -> List[CorpusPage]:
+    return load_corpus()
+
+
+@pytest.fixture
+def throughput():
+    return THROUGHPUT
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not THROUGHPUT:
+        return
+    terminalreporter.section("extractor throughput")
+    terminalreporter.write_line(format_header(SUMMARY_COLUMNS))
+    for row in THROUGHPUT:
+        terminalreporter.write_line(format_row(
+            SUMMARY_COLUMNS, [row["extractor"], row["pages"], row["pages_per_second"], row["fields_per_page"]]
+        ))
@@ -0,0 +1,242 @@
+"""Offline extractor corpus: pages, the extractors run on them and their expected output.
+
+``pages/manifest.json`` lists every page with the URL of the live page it
+models and the extractors that apply to it. The pages are synthetic -
+hand-written in each site's markup, not saved from the sites (see the
+manifest's ``provenance``). Each extractor turns a page into its
+inputs once (``prepare``, not timed) and then extracts them (``run``, timed by
+the benchmarks). ``<page>.expected.json`` holds the output of every extractor
+for that page, so a change in extraction yield shows up as a failing test.
+
+After an intended extraction change, regenerate the expected output with:
+    python -m benchmarks.corpus --update
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+PAGES_DIR = Path(__file__).resolve().parent / "pages"
+MANIFEST_PATH = PAGES_DIR / "manifest.json"
+
+# Same blocks as ``spec_extractor.extract_spec_tables`` reads from a live page
+SPEC_BLOCK_SELECTOR = (
+    "table.techdata, table.specs, .specs-block, .engine-data, .car-specs, .performance-specs, div.enginedata"
+)
+
+
+@dataclass
+class CorpusPage:
+    """One page of the corpus."""
+    file: str
+    url: str
+    extractors: List[str]
+    card_selector: Optional[str] = None
+    expected: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def path(self) -> Path:
+        return PAGES_DIR / self.file
+
+    @property
+    def expected_path(self) -> Path:
+        return self.path.with_suffix(".expected.json")
+
+    @property
+    def site(self) -> str:
+        return self.file.split("/")[0]
+
+    @property
+    def name(self) -> str:
+        return self.file.rsplit(".", 1)[0]
+
+    def html(self) -> bytes:
+        return self.path.read_bytes()
+
+    def soup(self) -> BeautifulSoup:
+        return BeautifulSoup(self.html(), "lxml")
+
+
+@dataclass
+class Extractor:
+    """An extractor under benchmark: untimed input preparation, timed extraction, yield count."""
+    name: str
+    prepare: Callable[[CorpusPage], Any]
+    run: Callable[[Any], Any]
+    count_fields: Callable[[Any], int]
+
+
+def load_corpus() -> List[CorpusPage]:
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    pages = []
+    for entry in manifest["pages"]:
+        page = CorpusPage(**entry)
+        if page.expected_path.exists():
+            page.expected = json.loads(page.expected_path.read_text(encoding="utf-8"))
+        pages.append(page)
+    return pages
+
+
+def as_json(value: Any) -> Any:
+    """``value`` as it reads back from an expected-output file."""
+    return json.loads(json.dumps(value, ensure_ascii=False))
+
+
+# --- IntelligentFieldExtractor: page analysis of any page ---
+
+@lru_cache(maxsize=None)
+def _intelligent_extractor():
+    from scraper.intelligent_extractor import IntelligentFieldExtractor
+
+    return IntelligentFieldExtractor()
+
+
+def _prepare_page_tree(page: CorpusPage):
+    from scraper.html_parser import parse_html
+
+    return parse_html(page.html(), "lxml")
+
+
+def _analyze_page(tree) -> List[Dict[str, Any]]:
+    containers = _intelligent_extractor().analyze_page_structure(tree)
+    return [{"score": round(c["score"], 6), "fields": c["fields"]} for c in containers]
+
+
+def _container_fields(containers: List[Dict[str, Any]]) -> int:
+    return sum(len(container["fields"]) for container in containers)
+
+
+# --- MobileBgScraper._extract_listing_data: the listing cards of a result page ---
+
+# Bookkeeping keys of a listing - everything else is an extracted field
+LISTING_META_KEYS = frozenset(["source_site", "source_id", "source_url", "raw_data", "make", "model"])
+
+
+@lru_cache(maxsize=None)
+def _mobile_bg_scraper():
+    from scraper.sites.mobile_bg import MobileBgScraper
+
+    return MobileBgScraper()
+
+
+def _prepare_cards(page: CorpusPage):
+    return page.soup().select(page.card_selector), page.url
+
+
+def _extract_cards(prepared) -> List[Optional[Dict[str, Any]]]:
+    cards, url = prepared
+    scraper = _mobile_bg_scraper()
+    return [scraper._extract_listing_data(card, url) for card in cards]
+
+
+def _listing_fields(listings: List[Optional[Dict[str, Any]]]) -> int:
+    return sum(
+        1
+        for listing in listings if listing
+        for key, value in listing.items()
+        if key not in LISTING_META_KEYS and value not in (None, [], "")
+    )
+
+
+# --- spec_extractor.extract_value_and_unit: autoevolution spec tables ---
+
+def spec_table_rows(soup: BeautifulSoup) -> List[tuple]:
+    """(category, key, raw value) of every spec table row, as ``extract_spec_tables`` names them."""
+    rows = []
+    for idx, block in enumerate(soup.select(SPEC_BLOCK_SELECTOR)):
+        category_title = None
+        for sibling in block.find_previous_siblings():
+            if sibling.name in ("h2", "h3", "h4"):
+                category_title = sibling.get_text()
+                break
+        category = category_title.strip().lower().replace(" ", "_") if category_title else f"block_{idx}"
+        for row in block.find_all("tr"):
+            cells = row.find_all(["td", "th"])
+            if len(cells) < 2:
+                continue
+            key_text = cells[0].get_text("\n", strip=True)
+            value_text = cells[1].get_text("\n", strip=True)
+            if key_text and value_text:
+                key = key_text.strip().lower().replace(" ", "_").replace(":", "").replace("(", "").replace(")", "").rstrip("_")
+                rows.append((category, key, value_text.strip()))
+    return rows
+
+
+def _prepare_spec_rows(page: CorpusPage):
+    return spec_table_rows(page.soup())
+
+
+def _extract_spec_values(rows) -> Dict[str, Dict[str, Any]]:
+    from scripts.autoevolution.spec_extractor import extract_value_and_unit
+
+    specs: Dict[str, Dict[str, Any]] = {}
+    for category, key, raw in rows:
+        specs.setdefault(category, {})[key] = extract_value_and_unit(raw)
+    return specs
+
+
+def _spec_fields(specs: Dict[str, Dict[str, Any]]) -> int:
+    return sum(1 for table in specs.values() for value in table.values() if value["value"] is not None)
+
+
+# --- unit_parser.parse_specs_with_units: the flattened specs of a page ---
+
+def _prepare_specs_with_units(page: CorpusPage):
+    from scripts.autoevolution.spec_extractor import flatten_specs_for_db
+
+    _, extra_data = flatten_specs_for_db({"specs": _extract_spec_values(_prepare_spec_rows(page))})
+    return extra_data.get("specs_with_units", {})
+
+
+def _parse_units(specs_with_units) -> Dict[str, Any]:
+    from scripts.autoevolution.unit_parser import parse_specs_with_units
+
+    return parse_specs_with_units(specs_with_units)
+
+
+EXTRACTORS: Dict[str, Extractor] = {
+    extractor.name: extractor
+    for extractor in [
+        Extractor("intelligent_extractor", _prepare_page_tree, _analyze_page, _container_fields),
+        Extractor("mobile_bg_listing", _prepare_cards, _extract_cards, _listing_fields),
+        Extractor("spec_values", _prepare_spec_rows, _extract_spec_values, _spec_fields),
+        Extractor("unit_parser", _prepare_specs_with_units, _parse_units, len),
+    ]
+}
+
+
+def extract(page: CorpusPage, extractor_name: str) -> Any:
+    """Output of one extractor for one page, as stored in the expected-output file."""
+    extractor = EXTRACTORS[extractor_name]
+    return as_json(extractor.run(extractor.prepare(page)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or regenerate the expected output of the extractor corpus.")
+    parser.add_argument("--update", action="store_true", help="Rewrite the expected-output files")
+    args = parser.parse_args()
+
+    stale = 0
+    for page in load_corpus():
+        output = {name: extract(page, name) for name in page.extractors}
+        if output == page.expected:
+            print(f"✓ {page.file}")
+            continue
+        if args.update:
+            page.expected_path.write_text(json.dumps(output, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+            print(f"✓ {page.file}: expected output updated")
+        else:
+            stale += 1
+            changed = [name for name in output if output[name] != page.expected.get(name)]
+            print(f"✗ {page.file}: output differs for {', '.join(changed)}")
+    if stale:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
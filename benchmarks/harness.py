@@ -0,0 +1,52 @@
+"""Helpers shared by the benchmark scripts: timing, page loading and report tables.
+
+``scripts/benchmark_patterns.py`` and ``scripts/benchmark_parsers.py`` time
+their candidates with ``best_time``, read saved pages (or the whole offline
+corpus) with ``load_pages`` and print their results with ``format_row``.
+"""
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from benchmarks.corpus import load_corpus
+
+
+@dataclass
+class Column:
+    """One column of a report table."""
+    title: str
+    width: int
+    # Format spec of the column's values, e.g. ",.0f"
+    format: str = ""
+    # "<" for text columns, ">" for numbers
+    align: str = ">"
+
+
+def best_time(run: Callable[[], Any], repeat: int) -> float:
+    """Best-of-``repeat`` wall time of ``run()``, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def load_pages(paths: Optional[List[Path]] = None) -> List[Tuple[str, bytes]]:
+    """(name, HTML) of the given saved pages, or of every page of the offline corpus."""
+    if paths:
+        return [(path.name, path.read_bytes()) for path in paths]
+    return [(page.name, page.html()) for page in load_corpus()]
+
+
+def format_header(columns: Sequence[Column]) -> str:
+    return format_row(columns, [column.title for column in columns], header=True)
+
+
+def format_row(columns: Sequence[Column], values: Sequence[Any], header: bool = False) -> str:
+    cells = []
+    for column, value in zip(columns, values):
+        spec = "" if header else column.format
+        cells.append(f"{value:{column.align}{column.width}{spec}}")
+    return " ".join(cells)
@@ -0,0 +1,45 @@
+"""Throughput and yield of the extractors over the offline page corpus.
+
+Every extractor is timed over all corpus pages it applies to, with the pages
+already parsed into its inputs. Pages/sec and fields/page are stored in the
+benchmark's ``extra_info`` (and so in saved runs) and printed after the run.
+``test_expected_output`` checks each page against its expected output.
+
+Usage:
+    pytest benchmarks
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare      # against the last saved run
+    pytest benchmarks --benchmark-disable      # yield checks only
+"""
+import pytest
+
+from benchmarks.corpus import EXTRACTORS, extract, load_corpus
+
+PAGE_EXTRACTORS = [
+    pytest.param(page, name, id=f"{page.name}-{name}")
+    for page in load_corpus()
+    for name in page.extractors
+]
+
+
+@pytest.mark.parametrize("page, extractor_name", PAGE_EXTRACTORS)
+def test_expected_output(page, extractor_name):
+    assert extractor_name in page.expected, "no expected output - run python -m benchmarks.corpus --update"
+    assert extract(page, extractor_name) == page.expected[extractor_name]
+
+
+@pytest.mark.parametrize("extractor_name", list(EXTRACTORS))
+def test_extractor_throughput(benchmark, corpus, throughput, extractor_name):
+    extractor = EXTRACTORS[extractor_name]
+    pages = [page for page in corpus if extractor_name in page.extractors]
+    inputs = [extractor.prepare(page) for page in pages]
+
+    outputs = benchmark(lambda: [extractor.run(prepared) for prepared in inputs])
+
+    fields = sum(extractor.count_fields(output) for output in outputs)
+    assert fields, f"{extractor_name} extracted nothing from {len(pages)} pages"
+    benchmark.extra_info["pages"] = len(pages)
+    benchmark.extra_info["fields_per_page"] = fields / len(pages)
+    if benchmark.stats:
+        benchmark.extra_info["pages_per_second"] = len(pages) / benchmark.stats.stats.mean
+        throughput.append({"extractor": extractor_name, **benchmark.extra_info})
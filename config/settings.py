@@ -1,4 +1,6 @@
 """Application settings and configuration."""
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,15 +15,95 @@ class Settings(BaseSettings):
     database_port: int = 6543
     database_name: str
 
+    # Query instrumentation
+    db_instrumentation_enabled: bool = True
+    db_slow_query_ms: float = 500.0
+    db_n_plus_one_threshold: int = 20
+
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     debug: bool = True
+    # How long clients may reuse a catalog generation tree before revalidating its ETag
+    catalog_cache_max_age_seconds: int = 60
 
     # Scraper
     scraper_user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    scraper_delay_min: int = 2
-    scraper_delay_max: int = 5
+    scraper_timeout_seconds: float = 30.0
+    scraper_max_connections: int = 20
+    # HTML parser backend: "lxml", "html.parser" or "lexbor" (needs the fast-html extra)
+    scraper_html_parser: str = "lxml"
+
+    # Per-host politeness - token bucket (rate/burst) plus an in-flight request cap
+    scraper_rate_per_second: float = 0.5
+    scraper_burst: int = 2
+    scraper_max_concurrency_per_host: int = 2
+
+    # Fetch policy - retries with jittered exponential backoff (Retry-After wins),
+    # AIMD adaptation of each host's rate between the min rate and its max rate
+    # (None = the host's configured rate), and a per-host circuit breaker
+    scraper_retry_attempts: int = 4
+    scraper_retry_base_seconds: float = 1.0
+    scraper_retry_max_seconds: float = 60
+    scraper_min_rate_per_second: float = 0.05
+    scraper_max_rate_per_second: Optional[float] = None
+    scraper_rate_increase: float = 0.05
+    scraper_rate_decrease_factor: float = 0.5
+    scraper_latency_target_seconds: float = 10.0
+    scraper_circuit_failure_threshold: int = 5
+    scraper_circuit_reset_seconds: float = 30
+    scraper_circuit_max_reset_seconds: float = 600
+    scraper_circuit_max_wait_seconds: float = 120
+
+    # HTTP response cache - stale entries are revalidated with ETag/Last-Modified,
+    # entries younger than the freshness window (overridable per site) skip the request
+    scraper_http_cache_enabled: bool = True
+    scraper_http_cache_dir: str = ".cache/http"
+    scraper_http_cache_fresh_seconds: float = 0
+
+    # Crawl frontier - "sqlite" (local file), "postgres" (crawl_frontier table, shared
+    # by several scraper hosts) or "none" (in-memory crawl, nothing to resume)
+    scraper_frontier_backend: str = "sqlite"
+    scraper_frontier_sqlite_path: str = ".cache/frontier.sqlite3"
+    scraper_frontier_batch_size: int = 10
+    scraper_frontier_lease_seconds: float = 120
+    scraper_frontier_max_attempts: int = 3
+    scraper_frontier_retry_base_seconds: float = 60
+    scraper_frontier_retry_max_seconds: float = 3600
+    scraper_frontier_poll_seconds: float = 5
+
+    # Frontier crawls (scraper runs and workers) renew their task leases every heartbeat interval;
+    # workers per host: how many scraper workers (python -m scraper worker) crawl the same host
+    # at once - each takes 1/N of a host's politeness budget
+    scraper_worker_heartbeat_seconds: float = 30
+    scraper_workers_per_host: int = 1
+
+    # Streaming pipeline - bounded queues between the scrape, upsert and image stages
+    scraper_pipeline_queue_size: int = 200
+    scraper_upsert_batch_size: int = 100
+    scraper_upsert_flush_seconds: float = 2
+    scraper_image_workers: int = 4
+    scraper_images_per_ad: int = 1
+
+    # Browser crawls (autoevolution, collectingcars) - pages open at once on the shared
+    # browser, and main-frame navigations before a page's context is replaced
+    browser_pool_size: int = 4
+    browser_page_max_navigations: int = 50
+    # Static JS/CSS of browser crawls served from disk - entries younger than the
+    # freshness window skip the request, older ones are revalidated
+    browser_asset_cache_enabled: bool = True
+    browser_asset_cache_dir: str = ".cache/browser-assets"
+    browser_asset_cache_fresh_seconds: float = 86400
+    # Files found by browser crawls (gallery images) downloaded at once per page,
+    # over HTTP with the page's cookies
+    browser_download_concurrency: int = 6
+
+    # Deactivation sweep - skip the sweep when a crawl saw too few ads to be trusted
+    scraper_deactivation_min_seen: int = 1
+    scraper_deactivation_min_seen_ratio: float = 0.5
+
+    # Market views - refreshed at the end of every crawl, once its ads are saved and swept
+    market_views_refresh_after_crawl: bool = True
 
     model_config = SettingsConfigDict(
         env_file=".env",
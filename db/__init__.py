@@ -1,6 +1,6 @@
 """Database module."""
 from .database import engine, SessionLocal, get_db
-from .models import Base, Brand, Model, Generation, Version, Spec, Image, Document
+from .models import Base, Brand, Model, Generation, Version, Spec, Image, Document, CarAdRaw
 
 __all__ = [
     "engine",
@@ -14,5 +14,6 @@ __all__ = [
     "Spec",
     "Image",
     "Document",
+    "CarAdRaw",
 ]
 
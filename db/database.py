@@ -2,6 +2,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from config.settings import settings
+from db.instrumentation import install_query_instrumentation
 
 # Create database engine
 engine = create_engine(
@@ -11,6 +12,9 @@ engine = create_engine(
     max_overflow=10,
 )
 
+if settings.db_instrumentation_enabled:
+    install_query_instrumentation(engine)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,143 @@
+"""Query instrumentation: per-unit-of-work counters, slow-query log and N+1 detection.
+
+A unit of work is anything wrapped in ``track_queries`` - an API request (via
+middleware), a Dagster op or a scraper run. Statements executed inside it are
+counted and timed; statements that repeat suspiciously often are reported as
+likely N+1 patterns.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Truncate logged statements/parameters so a bulk insert does not flood the log
+MAX_LOGGED_CHARS = 500
+
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\?")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class QueryStats:
+    """Statement counters for one unit of work."""
+    name: str
+    statements: int = 0
+    total_time: float = 0.0
+    slow_statements: int = 0
+    statement_counts: Counter = field(default_factory=Counter)
+    flagged: set = field(default_factory=set)
+
+    @property
+    def total_time_ms(self) -> float:
+        return self.total_time * 1000
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Normalized statements that ran more than ``threshold`` times, most frequent first."""
+        return [(sql, n) for sql, n in self.statement_counts.most_common() if n > threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a statement to its shape: literals, bind markers and IN lists collapse to ``?``."""
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _PLACEHOLDER_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _VALUE_LIST_RE.sub("(?)", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+def _truncate(value) -> str:
+    text = str(value)
+    if len(text) > MAX_LOGGED_CHARS:
+        return text[:MAX_LOGGED_CHARS] + "..."
+    return text
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    stats = _current_stats.get()
+
+    if elapsed * 1000 >= settings.db_slow_query_ms:
+        logger.warning(
+            "Slow query (%.1f ms%s): %s | params=%s",
+            elapsed * 1000,
+            f", {stats.name}" if stats else "",
+            _truncate(statement),
+            _truncate(parameters),
+        )
+        if stats:
+            stats.slow_statements += 1
+
+    if stats is None:
+        return
+
+    stats.statements += 1
+    stats.total_time += elapsed
+    key = normalize_statement(statement)
+    stats.statement_counts[key] += 1
+
+    threshold = settings.db_n_plus_one_threshold
+    if stats.statement_counts[key] > threshold and key not in stats.flagged:
+        stats.flagged.add(key)
+        logger.warning(
+            "Possible N+1 in %s: statement ran more than %d times: %s",
+            stats.name,
+            threshold,
+            _truncate(key),
+        )
+
+
+def install_query_instrumentation(engine: Engine):
+    """Attach the cursor-execute listeners to an engine (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Stats of the unit of work currently being tracked, if any."""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(name: str, log=None) -> Iterator[QueryStats]:
+    """Count statements and DB time for everything executed inside the block.
+
+    ``log`` may be any logger-like object (e.g. Dagster's ``context.log``); the
+    summary and the final counts of repeated statements are written to it when
+    the block exits.
+    """
+    stats = QueryStats(name=name)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        log = log or logger
+        if stats.statements:
+            log.info(f"{name}: {stats.statements} statements, {stats.total_time_ms:.1f} ms in DB")
+        for sql, count in stats.repeated_statements(settings.db_n_plus_one_threshold):
+            log.info(f"{name}: statement ran {count} times (possible N+1): {_truncate(sql)}")
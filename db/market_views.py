@@ -0,0 +1,73 @@
+"""Materialized views with pre-aggregated market statistics.
+
+The views are created by migration ``a81e4c7f05d3`` and refreshed at the end
+of every crawl (``ScraperRunner.refresh_market_views``), so dashboard reads are plain index scans instead of per-request
+GROUP BYs. They live in their own MetaData so Alembic autogenerate never
+tries to create them as tables.
+"""
+import time
+from typing import Dict
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, text
+from sqlalchemy.orm import Session
+
+views_metadata = MetaData()
+
+price_by_model_year = Table(
+    "mv_market_price_by_model_year",
+    views_metadata,
+    Column("make", String),
+    Column("model", String),
+    Column("year", Integer),
+    Column("currency", String),
+    Column("listings", Integer),
+    Column("avg_price", Float),
+    Column("median_price", Float),
+    Column("min_price", Float),
+    Column("max_price", Float),
+    Column("price_stddev", Float),
+    Column("avg_mileage", Float),
+)
+
+dealer_pricing = Table(
+    "mv_market_dealer_pricing",
+    views_metadata,
+    Column("dealer_type", String),
+    Column("dealer_name", String),
+    Column("make", String),
+    Column("model", String),
+    Column("currency", String),
+    Column("listings", Integer),
+    Column("avg_price", Float),
+    Column("price_stddev", Float),
+    Column("avg_mileage", Float),
+)
+
+mileage_buckets = Table(
+    "mv_market_mileage_buckets",
+    views_metadata,
+    Column("make", String),
+    Column("model", String),
+    Column("currency", String),
+    Column("mileage_bucket_km", Integer),
+    Column("listings", Integer),
+    Column("avg_price", Float),
+    Column("median_price", Float),
+)
+
+MARKET_VIEWS = [price_by_model_year, dealer_pricing, mileage_buckets]
+
+
+def refresh_market_views(db: Session, concurrently: bool = True) -> Dict[str, float]:
+    """Refresh every market view and return the seconds each refresh took.
+
+    CONCURRENTLY rebuilds the view next to the old contents and swaps in the
+    diff, so readers are never blocked while the aggregates are recomputed.
+    """
+    mode = "CONCURRENTLY " if concurrently else ""
+    timings = {}
+    for view in MARKET_VIEWS:
+        started = time.perf_counter()
+        db.execute(text(f"REFRESH MATERIALIZED VIEW {mode}{view.name}"))
+        db.commit()
+        timings[view.name] = round(time.perf_counter() - started, 3)
+    return timings
@@ -0,0 +1,59 @@
+"""create_car_ads_raw_with_crawl_tracking
+
+Revision ID: 3f6c1a9d2b47
+Revises: 82223e0caac2
+Create Date: 2026-10-18 09:10:42.118604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6c1a9d2b47'
+down_revision = '82223e0caac2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('car_ads_raw',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('source_site', sa.String(length=100), nullable=False),
+    sa.Column('source_id', sa.String(length=255), nullable=False),
+    sa.Column('source_url', sa.Text(), nullable=False),
+    sa.Column('raw_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('price', sa.Float(), nullable=True),
+    sa.Column('currency', sa.String(length=10), nullable=True),
+    sa.Column('year', sa.Integer(), nullable=True),
+    sa.Column('make', sa.String(length=100), nullable=True),
+    sa.Column('model', sa.String(length=100), nullable=True),
+    sa.Column('mileage', sa.Integer(), nullable=True),
+    sa.Column('location', sa.String(length=255), nullable=True),
+    sa.Column('dealer_name', sa.String(length=255), nullable=True),
+    sa.Column('dealer_type', sa.String(length=50), nullable=True),
+    sa.Column('fuel_type', sa.String(length=50), nullable=True),
+    sa.Column('transmission', sa.String(length=50), nullable=True),
+    sa.Column('body_type', sa.String(length=50), nullable=True),
+    sa.Column('color', sa.String(length=50), nullable=True),
+    sa.Column('engine_power', sa.Integer(), nullable=True),
+    sa.Column('engine_displacement', sa.Float(), nullable=True),
+    sa.Column('image_urls', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('local_image_paths', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('scraped_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_active', sa.Boolean(), server_default='true', nullable=False),
+    sa.Column('is_processed', sa.Boolean(), server_default='false', nullable=False),
+    sa.Column('last_crawl_run_id', sa.String(length=32), nullable=True),
+    sa.Column('last_seen_at', sa.DateTime(), nullable=True),
+    sa.Column('deactivated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source_site', 'source_id', name='uq_car_ads_raw_source')
+    )
+    op.create_index('ix_car_ads_raw_site_crawl_run', 'car_ads_raw', ['source_site', 'last_crawl_run_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_car_ads_raw_site_crawl_run', table_name='car_ads_raw')
+    op.drop_table('car_ads_raw')
@@ -0,0 +1,86 @@
+"""create_market_materialized_views
+
+Revision ID: a81e4c7f05d3
+Revises: 3f6c1a9d2b47
+Create Date: 2026-10-18 13:42:07.551920
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a81e4c7f05d3'
+down_revision = '3f6c1a9d2b47'
+branch_labels = None
+depends_on = None
+
+# Group keys are COALESCEd so every row is covered by the unique index that
+# REFRESH MATERIALIZED VIEW CONCURRENTLY requires.
+PRICE_BY_MODEL_YEAR = """
+CREATE MATERIALIZED VIEW mv_market_price_by_model_year AS
+SELECT
+    COALESCE(make, '') AS make,
+    COALESCE(model, '') AS model,
+    COALESCE(year, 0) AS year,
+    COALESCE(currency, '') AS currency,
+    count(*) AS listings,
+    avg(price) AS avg_price,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY price) AS median_price,
+    min(price) AS min_price,
+    max(price) AS max_price,
+    stddev_samp(price) AS price_stddev,
+    avg(mileage) AS avg_mileage
+FROM car_ads_raw
+WHERE is_active AND price IS NOT NULL
+GROUP BY 1, 2, 3, 4
+"""
+
+DEALER_PRICING = """
+CREATE MATERIALIZED VIEW mv_market_dealer_pricing AS
+SELECT
+    COALESCE(dealer_type, 'unknown') AS dealer_type,
+    COALESCE(dealer_name, '') AS dealer_name,
+    COALESCE(make, '') AS make,
+    COALESCE(model, '') AS model,
+    COALESCE(currency, '') AS currency,
+    count(*) AS listings,
+    avg(price) AS avg_price,
+    stddev_samp(price) AS price_stddev,
+    avg(mileage) AS avg_mileage
+FROM car_ads_raw
+WHERE is_active AND price IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5
+"""
+
+MILEAGE_BUCKETS = """
+CREATE MATERIALIZED VIEW mv_market_mileage_buckets AS
+SELECT
+    COALESCE(make, '') AS make,
+    COALESCE(model, '') AS model,
+    COALESCE(currency, '') AS currency,
+    COALESCE((mileage / 25000) * 25000, -1) AS mileage_bucket_km,
+    count(*) AS listings,
+    avg(price) AS avg_price,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY price) AS median_price
+FROM car_ads_raw
+WHERE is_active AND price IS NOT NULL
+GROUP BY 1, 2, 3, 4
+"""
+
+
+def upgrade() -> None:
+    op.execute(PRICE_BY_MODEL_YEAR)
+    op.create_index('ux_mv_market_price_by_model_year', 'mv_market_price_by_model_year',
+                    ['make', 'model', 'year', 'currency'], unique=True)
+    op.execute(DEALER_PRICING)
+    op.create_index('ux_mv_market_dealer_pricing', 'mv_market_dealer_pricing',
+                    ['dealer_type', 'dealer_name', 'make', 'model', 'currency'], unique=True)
+    op.execute(MILEAGE_BUCKETS)
+    op.create_index('ux_mv_market_mileage_buckets', 'mv_market_mileage_buckets',
+                    ['make', 'model', 'currency', 'mileage_bucket_km'], unique=True)
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_market_mileage_buckets")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_market_dealer_pricing")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_market_price_by_model_year")
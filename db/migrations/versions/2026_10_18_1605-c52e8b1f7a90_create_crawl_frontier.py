@@ -0,0 +1,44 @@
+"""create_crawl_frontier
+
+Revision ID: c52e8b1f7a90
+Revises: a81e4c7f05d3
+Create Date: 2026-10-18 16:05:31.274118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e8b1f7a90'
+down_revision = 'a81e4c7f05d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('crawl_frontier',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('crawl', sa.String(length=100), nullable=False),
+    sa.Column('site', sa.String(length=100), nullable=False),
+    sa.Column('url', sa.Text(), nullable=False),
+    sa.Column('url_hash', sa.String(length=64), nullable=False),
+    sa.Column('crawl_run_id', sa.String(length=32), nullable=False),
+    sa.Column('state', sa.String(length=20), server_default='pending', nullable=False),
+    sa.Column('priority', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('next_eligible_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('claimed_by', sa.String(length=100), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('crawl', 'url_hash', name='uq_crawl_frontier_url')
+    )
+    op.create_index('ix_crawl_frontier_claim', 'crawl_frontier', ['crawl', 'state', 'next_eligible_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_crawl_frontier_claim', table_name='crawl_frontier')
+    op.drop_table('crawl_frontier')
@@ -0,0 +1,55 @@
+"""create_scrape_runs
+
+Revision ID: e4b9d07a6c15
+Revises: c52e8b1f7a90
+Create Date: 2026-10-18 23:30:12.540917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b9d07a6c15'
+down_revision = 'c52e8b1f7a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('scrape_runs',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('crawl_run_id', sa.String(length=32), nullable=False),
+    sa.Column('crawl', sa.String(length=100), nullable=True),
+    sa.Column('site', sa.String(length=100), nullable=False),
+    sa.Column('worker_id', sa.String(length=100), nullable=True),
+    sa.Column('status', sa.String(length=20), server_default='running', nullable=False),
+    sa.Column('started_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('pages_fetched', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('pages_from_cache', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('fetch_errors', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('bytes_fetched', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('status_counts', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('fetch_latency_p50_ms', sa.Float(), nullable=True),
+    sa.Column('fetch_latency_p90_ms', sa.Float(), nullable=True),
+    sa.Column('fetch_latency_p99_ms', sa.Float(), nullable=True),
+    sa.Column('pages_parsed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('parse_seconds', sa.Float(), server_default='0', nullable=False),
+    sa.Column('containers_found', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('listings_kept', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rows_inserted', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rows_seen', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rows_failed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('images_downloaded', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_scrape_runs_crawl_run', 'scrape_runs', ['crawl_run_id'], unique=False)
+    op.create_index('ix_scrape_runs_site_started', 'scrape_runs', ['site', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scrape_runs_site_started', table_name='scrape_runs')
+    op.drop_index('ix_scrape_runs_crawl_run', table_name='scrape_runs')
+    op.drop_table('scrape_runs')
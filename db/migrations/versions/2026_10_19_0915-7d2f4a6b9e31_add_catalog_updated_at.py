@@ -0,0 +1,29 @@
+"""add_catalog_updated_at
+
+Revision ID: 7d2f4a6b9e31
+Revises: e4b9d07a6c15
+Create Date: 2026-10-19 09:15:42.118306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f4a6b9e31'
+down_revision = 'e4b9d07a6c15'
+branch_labels = None
+depends_on = None
+
+# Tables of the Brand -> Model -> Generation -> Version -> Spec tree served by the catalog API
+CATALOG_TABLES = ['brands', 'models', 'generations', 'versions', 'specs', 'images', 'documents']
+
+
+def upgrade() -> None:
+    for table in CATALOG_TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    for table in reversed(CATALOG_TABLES):
+        op.drop_column(table, 'updated_at')
@@ -1,6 +1,7 @@
 """Database models for the car platform."""
 from sqlalchemy import (
-    Column, Integer, String, Text, ForeignKey, REAL, JSON
+    BigInteger, Column, Integer, String, Text, ForeignKey, REAL, JSON, Boolean, DateTime, Float,
+    Index, UniqueConstraint, func
 )
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.dialects.postgresql import JSONB
@@ -14,6 +15,8 @@ class Brand(Base):
     name = Column(String(100), nullable=False, unique=True)
     country = Column(String(50))
     url = Column(Text)
+    # Bumped on every write, so the catalog API can tell when a cached generation tree is stale
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     models = relationship("Model", back_populates="brand", cascade="all, delete-orphan")
 
     def __repr__(self):
@@ -29,6 +32,7 @@ class Model(Base):
     start_year = Column(Integer)
     end_year = Column(Integer)
     url = Column(Text)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     brand = relationship("Brand", back_populates="models")
     generations = relationship("Generation", back_populates="model", cascade="all, delete-orphan")
 
@@ -46,6 +50,7 @@ class Generation(Base):
     end_year = Column(Integer)
     description = Column(Text)
     url = Column(Text)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     model = relationship("Model", back_populates="generations")
     versions = relationship("Version", back_populates="generation", cascade="all, delete-orphan")
     documents = relationship("Document", back_populates="generation", cascade="all, delete-orphan")
@@ -63,6 +68,7 @@ class Version(Base):
     engine_type = Column(String(50))
     engine_details = Column(Text)
     url = Column(Text)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     generation = relationship("Generation", back_populates="versions")
     spec = relationship("Spec", back_populates="version", uselist=False, cascade="all, delete-orphan")
     images = relationship("Image", back_populates="version", cascade="all, delete-orphan")
@@ -154,6 +160,7 @@ class Spec(Base):
     # Extra data (infotainment, features, unmapped specs)
     extra = Column(JSONB)
     
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     version = relationship("Version", back_populates="spec")
 
 
@@ -163,6 +170,7 @@ class Image(Base):
     version_id = Column(Integer, ForeignKey("versions.id"), nullable=False)
     url = Column(Text, nullable=False)
     caption = Column(String(255))
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     version = relationship("Version", back_populates="images")
 
 
@@ -172,5 +180,127 @@ class Document(Base):
     generation_id = Column(Integer, ForeignKey("generations.id"), nullable=False)
     doc_type = Column(String(50))
     url = Column(Text)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     generation = relationship("Generation", back_populates="documents")
 
+
+class CarAdRaw(Base):
+    __tablename__ = "car_ads_raw"
+    __table_args__ = (
+        UniqueConstraint("source_site", "source_id", name="uq_car_ads_raw_source"),
+        Index("ix_car_ads_raw_site_crawl_run", "source_site", "last_crawl_run_id"),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_site = Column(String(100), nullable=False)
+    source_id = Column(String(255), nullable=False)
+    source_url = Column(Text, nullable=False)
+    raw_data = Column(JSONB)
+
+    title = Column(String(255))
+    price = Column(Float)
+    currency = Column(String(10))
+    year = Column(Integer)
+    make = Column(String(100))
+    model = Column(String(100))
+    mileage = Column(Integer)
+    location = Column(String(255))
+    dealer_name = Column(String(255))
+    dealer_type = Column(String(50))
+    fuel_type = Column(String(50))
+    transmission = Column(String(50))
+    body_type = Column(String(50))
+    color = Column(String(50))
+    engine_power = Column(Integer)
+    engine_displacement = Column(Float)
+    image_urls = Column(JSONB)
+    local_image_paths = Column(JSONB)
+
+    scraped_at = Column(DateTime, nullable=False, server_default=func.now())
+    is_active = Column(Boolean, nullable=False, default=True, server_default="true")
+    is_processed = Column(Boolean, nullable=False, default=False, server_default="false")
+
+    # Crawl tracking - every crawl stamps the ads it sees, the rest get deactivated
+    last_crawl_run_id = Column(String(32))
+    last_seen_at = Column(DateTime)
+    deactivated_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<CarAdRaw(id={self.id}, source='{self.source_site}:{self.source_id}')>"
+
+
+class CrawlFrontier(Base):
+    """URL queue of resumable crawls, shared by every scraper process (see scraper/frontier.py)."""
+    __tablename__ = "crawl_frontier"
+    __table_args__ = (
+        UniqueConstraint("crawl", "url_hash", name="uq_crawl_frontier_url"),
+        Index("ix_crawl_frontier_claim", "crawl", "state", "next_eligible_at"),
+    )
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # Name of the crawl (scrape config) the URL belongs to
+    crawl = Column(String(100), nullable=False)
+    # Site config that knows how to scrape the URL
+    site = Column(String(100), nullable=False)
+    url = Column(Text, nullable=False)
+    # SHA-256 of the normalized URL - the dedup key
+    url_hash = Column(String(64), nullable=False)
+    crawl_run_id = Column(String(32), nullable=False)
+
+    # pending -> in_progress -> done | failed (in_progress with an expired lease is claimable again)
+    state = Column(String(20), nullable=False, default="pending", server_default="pending")
+    priority = Column(Integer, nullable=False, default=0, server_default="0")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_eligible_at = Column(DateTime, nullable=False, server_default=func.now())
+    claimed_by = Column(String(100))
+    lease_expires_at = Column(DateTime)
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<CrawlFrontier(id={self.id}, crawl='{self.crawl}', state='{self.state}', url='{self.url}')>"
+
+
+class ScrapeRun(Base):
+    """Telemetry of one scraper process's crawl of one site (see scraper/telemetry.py)."""
+    __tablename__ = "scrape_runs"
+    __table_args__ = (
+        Index("ix_scrape_runs_crawl_run", "crawl_run_id"),
+        Index("ix_scrape_runs_site_started", "site", "started_at"),
+    )
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # A resumed or multi-worker crawl writes one row per process under the same crawl_run_id
+    crawl_run_id = Column(String(32), nullable=False)
+    crawl = Column(String(100))
+    site = Column(String(100), nullable=False)
+    worker_id = Column(String(100))
+    # running -> finished | failed
+    status = Column(String(20), nullable=False, default="running", server_default="running")
+    started_at = Column(DateTime, nullable=False, server_default=func.now())
+    finished_at = Column(DateTime)
+
+    # Fetch stage - every HTTP response (retries included) and cache hits
+    pages_fetched = Column(Integer, nullable=False, default=0, server_default="0")
+    pages_from_cache = Column(Integer, nullable=False, default=0, server_default="0")
+    fetch_errors = Column(Integer, nullable=False, default=0, server_default="0")
+    bytes_fetched = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # {"200": 41, "429": 2}
+    status_counts = Column(JSONB)
+    fetch_latency_p50_ms = Column(Float)
+    fetch_latency_p90_ms = Column(Float)
+    fetch_latency_p99_ms = Column(Float)
+
+    # Parse stage
+    pages_parsed = Column(Integer, nullable=False, default=0, server_default="0")
+    parse_seconds = Column(Float, nullable=False, default=0, server_default="0")
+    containers_found = Column(Integer, nullable=False, default=0, server_default="0")
+    listings_kept = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Persistence and image stages
+    rows_inserted = Column(Integer, nullable=False, default=0, server_default="0")
+    rows_seen = Column(Integer, nullable=False, default=0, server_default="0")
+    rows_failed = Column(Integer, nullable=False, default=0, server_default="0")
+    images_downloaded = Column(Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f"<ScrapeRun(id={self.id}, run='{self.crawl_run_id}', site='{self.site}', status='{self.status}')>"
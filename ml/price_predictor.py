@@ -1,4 +1,6 @@
 """Price prediction model for car market analysis."""
+import math
+from datetime import date
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Any, Optional, Tuple
@@ -178,22 +180,28 @@ class CarPricePredictor:
             "feature_values": dict(zip(self.feature_columns, features))
         }
     
-    def analyze_market(self, car_ads: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze market trends and provide insights."""
-        if not car_ads:
-            return {"error": "No data available"}
-        
-        df = pd.DataFrame(car_ads)
-        df = df.dropna(subset=['price'])
-        
-        if len(df) == 0:
+    def analyze_market(
+        self,
+        price_rows: List[Dict[str, Any]],
+        dealer_rows: List[Dict[str, Any]],
+        mileage_rows: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Analyze market trends from the pre-aggregated market views and provide insights.
+        
+        The rows come from ``mv_market_price_by_model_year``,
+        ``mv_market_dealer_pricing`` and ``mv_market_mileage_buckets``. Counts,
+        means, extremes and standard deviations are combined exactly from the
+        groups; the median is the listing-weighted median of the group medians.
+        """
+        price_rows = [row for row in price_rows if row['listings']]
+        if not price_rows:
             return {"error": "No price data available"}
         
         analysis = {
-            "market_overview": self._analyze_market_overview(df),
-            "price_trends": self._analyze_price_trends(df),
-            "dealer_analysis": self._analyze_dealers(df),
-            "condition_analysis": self._analyze_conditions(df),
+            "market_overview": self._analyze_market_overview(price_rows),
+            "price_trends": self._analyze_price_trends(price_rows, mileage_rows),
+            "dealer_analysis": self._analyze_dealers(dealer_rows),
+            "condition_analysis": self._analyze_conditions(price_rows),
             "recommendations": []
         }
         
@@ -202,56 +210,87 @@ class CarPricePredictor:
         
         return analysis
     
-    def _analyze_market_overview(self, df: pd.DataFrame) -> Dict[str, Any]:
+    @staticmethod
+    def _pooled(rows: List[Dict[str, Any]]) -> Tuple[int, float, float]:
+        """Listings, mean price and sample standard deviation of the union of aggregated groups."""
+        total = sum(row['listings'] for row in rows)
+        mean = sum(row['listings'] * float(row['avg_price']) for row in rows) / total
+        if total < 2:
+            return total, mean, 0.0
+        within = sum((row['listings'] - 1) * float(row['price_stddev'] or 0.0) ** 2 for row in rows)
+        between = sum(row['listings'] * (float(row['avg_price']) - mean) ** 2 for row in rows)
+        return total, mean, math.sqrt((within + between) / (total - 1))
+    
+    @staticmethod
+    def _grouped(rows: List[Dict[str, Any]], key: str) -> Dict[Any, List[Dict[str, Any]]]:
+        groups: Dict[Any, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(row[key], []).append(row)
+        return groups
+    
+    def _analyze_market_overview(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze overall market conditions."""
+        total, mean, std = self._pooled(rows)
+        
+        # Listing-weighted median of the group medians
+        half = total / 2
+        seen = 0
+        median = None
+        for row in sorted(rows, key=lambda row: row['median_price']):
+            seen += row['listings']
+            if seen >= half:
+                median = float(row['median_price'])
+                break
+        
         return {
-            "total_listings": len(df),
-            "average_price": float(df['price'].mean()),
-            "median_price": float(df['price'].median()),
+            "total_listings": total,
+            "average_price": mean,
+            "median_price": median,
             "price_range": {
-                "min": float(df['price'].min()),
-                "max": float(df['price'].max())
+                "min": float(min(row['min_price'] for row in rows)),
+                "max": float(max(row['max_price'] for row in rows))
             },
-            "price_std": float(df['price'].std())
+            "price_std": std
         }
     
-    def _analyze_price_trends(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Analyze price trends by various factors."""
+    def _analyze_price_trends(
+        self, price_rows: List[Dict[str, Any]], mileage_rows: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Analyze price trends by year and by 25 000 km mileage bucket."""
         trends = {}
         
-        # Price by year
-        if 'year' in df.columns:
-            year_prices = df.groupby('year')['price'].agg(['mean', 'count']).reset_index()
-            trends['by_year'] = {
-                row['year']: {'avg_price': float(row['mean']), 'count': int(row['count'])}
-                for _, row in year_prices.iterrows()
-            }
-        
-        # Price by mileage
-        if 'mileage' in df.columns:
-            df['mileage_bucket'] = pd.cut(df['mileage'], bins=5, labels=['Very Low', 'Low', 'Medium', 'High', 'Very High'])
-            mileage_prices = df.groupby('mileage_bucket')['price'].mean()
-            trends['by_mileage'] = {str(k): float(v) for k, v in mileage_prices.items()}
+        # Price by year (0 = unknown year)
+        trends['by_year'] = {}
+        for year, rows in sorted(self._grouped(price_rows, 'year').items()):
+            if year:
+                count, mean, _ = self._pooled(rows)
+                trends['by_year'][year] = {'avg_price': mean, 'count': count}
+        
+        # Price by mileage (-1 = unknown mileage)
+        trends['by_mileage'] = {}
+        for bucket, rows in sorted(self._grouped(mileage_rows, 'mileage_bucket_km').items()):
+            rows = [row for row in rows if row['listings']]
+            if bucket >= 0 and rows:
+                label = f"{bucket // 1000}-{(bucket + 25000) // 1000}k km"
+                trends['by_mileage'][label] = sum(
+                    row['listings'] * float(row['avg_price']) for row in rows
+                ) / sum(row['listings'] for row in rows)
         
         return trends
     
-    def _analyze_dealers(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_dealers(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze dealer pricing patterns."""
-        if 'dealer_type' not in df.columns:
-            return {}
-        
-        dealer_analysis = df.groupby('dealer_type')['price'].agg(['mean', 'count', 'std']).reset_index()
-        
-        return {
-            row['dealer_type']: {
-                'avg_price': float(row['mean']),
-                'listing_count': int(row['count']),
-                'price_volatility': float(row['std']) if not pd.isna(row['std']) else 0.0
+        dealer_analysis = {}
+        for dealer_type, group in self._grouped([row for row in rows if row['listings']], 'dealer_type').items():
+            count, mean, std = self._pooled(group)
+            dealer_analysis[dealer_type] = {
+                'avg_price': mean,
+                'listing_count': count,
+                'price_volatility': std
             }
-            for _, row in dealer_analysis.iterrows()
-        }
+        return dealer_analysis
     
-    def _analyze_conditions(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_conditions(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze car conditions and their impact on price."""
         # This would integrate with image analysis results
         # For now, we'll use basic heuristics
@@ -262,17 +301,19 @@ class CarPricePredictor:
             "condition_factors": []
         }
         
-        if 'mileage' in df.columns and 'year' in df.columns:
-            # Calculate depreciation impact
-            df['age'] = 2024 - df['year']
-            df['mileage_per_year'] = df['mileage'] / (df['age'] + 1)
-            
-            # High mileage impact
-            high_mileage = df[df['mileage_per_year'] > 20000]
-            if len(high_mileage) > 0:
-                condition_analysis["high_mileage_impact"] = float(
-                    (df['price'].mean() - high_mileage['price'].mean()) / df['price'].mean()
-                )
+        # Groups whose average car has done more than 20 000 km a year
+        # (next model year cars, listed before it starts, count as a year old)
+        current_year = date.today().year
+        high_mileage = [
+            row for row in rows
+            if row['year'] and row['avg_mileage'] is not None
+            and float(row['avg_mileage']) / max(current_year - row['year'] + 1, 1) > 20000
+        ]
+        if high_mileage:
+            _, mean, _ = self._pooled(rows)
+            _, high_mileage_mean, _ = self._pooled(high_mileage)
+            if mean:
+                condition_analysis["high_mileage_impact"] = (mean - high_mileage_mean) / mean
                 condition_analysis["condition_factors"].append("High mileage reduces value")
         
         return condition_analysis
@@ -298,10 +339,10 @@ class CarPricePredictor:
         
         # Mileage recommendations
         if "by_mileage" in trends:
-            mileage_data = trends["by_mileage"]
-            if "Low" in mileage_data and "High" in mileage_data:
-                low_price = mileage_data["Low"]
-                high_price = mileage_data["High"]
+            mileage_prices = list(trends["by_mileage"].values())
+            if len(mileage_prices) > 1:
+                low_price = mileage_prices[0]
+                high_price = mileage_prices[-1]
                 if low_price < high_price * 0.8:
                     recommendations.append("Low mileage cars offer good value")
         
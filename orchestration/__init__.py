@@ -1,6 +1,6 @@
 from dagster import Definitions
 
-from orchestration.jobs import enrichment_job, enrichment_db_job, targeted_scrape_job, build_training_dataset_job, collect_and_build_dataset_job, collect_images_job, collect_auto_data_images_job, crawl_site_images_job
+from orchestration.jobs import enrichment_job, enrichment_db_job, targeted_scrape_job, build_training_dataset_job, collect_and_build_dataset_job, collect_images_job, collect_auto_data_images_job, crawl_site_images_job, refresh_market_views_job, reconcile_source_ids_job
 from orchestration.resources import image_dir_resource, db_session_resource, dataset_dir_resource
 
 
@@ -14,6 +14,8 @@ defs = Definitions(
         collect_images_job,
         collect_auto_data_images_job,
         crawl_site_images_job,
+        refresh_market_views_job,
+        reconcile_source_ids_job,
     ],
     resources={
         "image_dir": image_dir_resource,
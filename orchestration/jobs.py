@@ -2,8 +2,11 @@ from pathlib import Path
 
 from dagster import OpExecutionContext, Out, job, op
 
+from db.instrumentation import track_queries
+from db.market_views import refresh_market_views
 from ml.infer_color import scan_directory, print_report
 from ml.infer_color import infer_dominant_color
+from scraper.reconcile import reconcile_source_ids
 
 try:
     from db.models import CarAdRaw, CarAdEnriched  # type: ignore
@@ -55,33 +58,34 @@ def persist_detected_colors_op(context: OpExecutionContext) -> str:
     updated = 0
     scanned = 0
     try:
-        ads = (
-            db.query(CarAdRaw)
-            .filter(CarAdRaw.is_active == True)
-            .order_by(CarAdRaw.scraped_at.desc())
-            .limit(200)
-            .all()
-        )
-        context.log.info(f"Fetched {len(ads)} ads for enrichment")
-        for ad in ads:
-            scanned += 1
-            paths = ad.local_image_paths or []
-            if not paths:
-                continue
-            first = paths[0]
-            color, conf = infer_dominant_color(first)
-            if not color:
-                continue
-            enriched = ad.enriched
-            if enriched is None:
-                enriched = CarAdEnriched(raw_ad_id=ad.id)
-                db.add(enriched)
-            enriched.detected_color = color
-            enriched.detected_color_confidence = conf
-            context.log.info(f"ad_id={ad.id} color={color} conf={conf}")
-            updated += 1
-        db.commit()
-        return f"Scanned: {scanned}, Updated: {updated}"
+        with track_queries(f"op:{context.op.name}", log=context.log):
+            ads = (
+                db.query(CarAdRaw)
+                .filter(CarAdRaw.is_active == True)
+                .order_by(CarAdRaw.scraped_at.desc())
+                .limit(200)
+                .all()
+            )
+            context.log.info(f"Fetched {len(ads)} ads for enrichment")
+            for ad in ads:
+                scanned += 1
+                paths = ad.local_image_paths or []
+                if not paths:
+                    continue
+                first = paths[0]
+                color, conf = infer_dominant_color(first)
+                if not color:
+                    continue
+                enriched = ad.enriched
+                if enriched is None:
+                    enriched = CarAdEnriched(raw_ad_id=ad.id)
+                    db.add(enriched)
+                enriched.detected_color = color
+                enriched.detected_color_confidence = conf
+                context.log.info(f"ad_id={ad.id} color={color} conf={conf}")
+                updated += 1
+            db.commit()
+            return f"Scanned: {scanned}, Updated: {updated}"
     except Exception as e:  # pragma: no cover - surfaced in Dagster logs
         db.rollback()
         return f"Error: {e}"
@@ -94,4 +98,46 @@ def enrichment_db_job():
     persist_detected_colors_op()
 
 
+@op(required_resource_keys={"db_session"}, description="Refresh the market statistics materialized views")
+def refresh_market_views_op(context: OpExecutionContext) -> str:
+    db = context.resources.db_session()
+    try:
+        with track_queries(f"op:{context.op.name}", log=context.log):
+            timings = refresh_market_views(db, concurrently=True)
+        for view_name, seconds in timings.items():
+            context.log.info(f"Refreshed {view_name} in {seconds}s")
+        return f"Refreshed {len(timings)} views in {sum(timings.values()):.2f}s"
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@job(description="Recompute market aggregates (price by year, dealers, mileage buckets) on demand - crawls refresh them when they finish")
+def refresh_market_views_job():
+    refresh_market_views_op()
+
+
+@op(required_resource_keys={"db_session"}, description="Merge duplicate raw ads and move them to stable source ids")
+def reconcile_source_ids_op(context: OpExecutionContext) -> str:
+    db = context.resources.db_session()
+    try:
+        with track_queries(f"op:{context.op.name}", log=context.log):
+            results = reconcile_source_ids(db)
+        for result in results:
+            context.log.info(
+                f"{result.source_site}: merged {result.groups_merged} groups ({result.rows_removed} rows removed), "
+                f"rewrote {result.ids_rewritten} ids, {result.unresolved} still content-hashed"
+            )
+        return f"Removed {sum(r.rows_removed for r in results)} duplicate ads"
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 
+@job(description="Reconcile raw ads stored under content-hash ids with their stable source ids")
+def reconcile_source_ids_job():
+    reconcile_source_ids_op()
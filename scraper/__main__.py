@@ -0,0 +1,140 @@
+"""Command line entry point: ``python -m scraper <command>``.
+
+Commands:
+    run CONFIG              crawl a job in this process, then sweep ads it no longer saw
+    seed CONFIG             queue a job's start pages in the frontier under a new crawl run id
+    worker CONFIG [...]     claim and scrape frontier tasks of the jobs until stopped
+    sweep CONFIG --crawl-run-id ID
+                            deactivate ads the (finished) crawl run did not see, refresh market views
+
+Distributed crawl, with ``SCRAPER_FRONTIER_BACKEND=postgres``:
+    python -m scraper seed scraper/configs/bmw_m5_2019plus.json
+    python -m scraper worker scraper/configs/bmw_m5_2019plus.json --exit-when-idle   # on N processes/hosts
+    python -m scraper sweep scraper/configs/bmw_m5_2019plus.json --crawl-run-id <id>
+"""
+import argparse
+import uuid
+
+from db.instrumentation import track_queries
+from scraper.frontier import IN_PROGRESS, PENDING, open_frontier
+from scraper.main import ScraperRunner, load_scrape_config, main as run_main, site_url
+from scraper.registry import get_site
+from scraper.worker import ScrapeWorker
+
+
+def _open_shared_frontier():
+    frontier = open_frontier()
+    if frontier is None:
+        raise SystemExit("Workers need a frontier: set SCRAPER_FRONTIER_BACKEND to postgres (or sqlite)")
+    return frontier
+
+
+def seed(config_path: str) -> str:
+    """Queue the start pages of a job's sites; returns the crawl run id the workers will use."""
+    config = load_scrape_config(config_path)
+    crawl = config['name']
+    frontier = _open_shared_frontier()
+    try:
+        run_id = frontier.unfinished_run(crawl)
+        if run_id:
+            print(f"Crawl run {run_id} of {crawl} is unfinished - workers will resume it")
+            return run_id
+
+        run_id = uuid.uuid4().hex
+        for site_config in config.get('sites', []):
+            if get_site(site_config['name']) is None:
+                print(f"  ⚠️  No scraper implemented for site: {site_config['name']}")
+                continue
+            frontier.add(crawl, site_config['name'], [site_url(site_config)], run_id)
+        print(f"Seeded crawl run {run_id} of {crawl}: {frontier.counts(crawl)}")
+        return run_id
+    finally:
+        frontier.close()
+
+
+def work(config_paths, worker_id=None, batch_size=None, exit_when_idle=False):
+    worker = ScrapeWorker(
+        config_paths,
+        _open_shared_frontier(),
+        worker_id=worker_id,
+        batch_size=batch_size,
+        exit_when_idle=exit_when_idle,
+    )
+    try:
+        with track_queries(f"worker:{worker.worker_id}"):
+            worker.run()
+    finally:
+        worker.close()
+
+
+def _check_crawl_finished(crawl: str, crawl_run_id: str):
+    """Exit unless the crawl has no pending or in-progress tasks left, of this run or any other."""
+    frontier = _open_shared_frontier()
+    try:
+        unfinished = frontier.unfinished_run(crawl)
+        counts = frontier.counts(crawl)
+    finally:
+        frontier.close()
+    if unfinished or counts.get(PENDING) or counts.get(IN_PROGRESS):
+        run = "this run" if unfinished == crawl_run_id else f"crawl run {unfinished}"
+        raise SystemExit(
+            f"Crawl {crawl} is not finished: {run} still has {counts.get(PENDING, 0)} pending and "
+            f"{counts.get(IN_PROGRESS, 0)} in-progress tasks - sweeping now would deactivate ads on pages "
+            f"not crawled yet"
+        )
+
+
+def sweep(config_path: str, crawl_run_id: str) -> int:
+    """Deactivate the ads of a job's sites that a finished crawl run did not see, then refresh the market views.
+
+    Refuses (exits non-zero) while the job's crawl still has tasks in the frontier.
+    """
+    _check_crawl_finished(load_scrape_config(config_path)['name'], crawl_run_id)
+    runner = ScraperRunner(config_path)
+    try:
+        runner.crawl_run_id = crawl_run_id
+        runner.scraped_sites = [
+            site_config for site_config in runner.config.get('sites', []) if get_site(site_config['name'])
+        ]
+        deactivated = runner.sweep_inactive_ads()
+        runner.refresh_market_views()
+        return deactivated
+    finally:
+        runner.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m scraper", description="Run scrape jobs and scraper workers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Crawl a job in this process")
+    run_parser.add_argument("config", nargs="?", default="scraper/configs/bmw_m5_2019plus.json")
+
+    seed_parser = commands.add_parser("seed", help="Queue a job's start pages for workers")
+    seed_parser.add_argument("config")
+
+    worker_parser = commands.add_parser("worker", help="Claim and scrape frontier tasks until stopped")
+    worker_parser.add_argument("configs", nargs="+", help="Scrape job configs whose crawls to work on")
+    worker_parser.add_argument("--worker-id", help="Lease owner name (default: host:pid)")
+    worker_parser.add_argument("--batch-size", type=int, help="Tasks in flight (default: SCRAPER_FRONTIER_BATCH_SIZE)")
+    worker_parser.add_argument(
+        "--exit-when-idle", action="store_true", help="Exit once the crawls have no pending or leased tasks"
+    )
+
+    sweep_parser = commands.add_parser("sweep", help="Deactivate ads a finished crawl run did not see, refresh market views")
+    sweep_parser.add_argument("config")
+    sweep_parser.add_argument("--crawl-run-id", required=True)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run_main(args.config)
+    elif args.command == "seed":
+        seed(args.config)
+    elif args.command == "worker":
+        work(args.configs, args.worker_id, args.batch_size, args.exit_when_idle)
+    elif args.command == "sweep":
+        sweep(args.config, args.crawl_run_id)
+
+
+if __name__ == "__main__":
+    main()
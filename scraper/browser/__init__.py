@@ -0,0 +1 @@
+"""Shared Playwright browser for the browser-based crawlers."""
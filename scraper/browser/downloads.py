@@ -0,0 +1,99 @@
+"""Direct HTTP downloads in a browser page's session.
+
+Files a crawler found on a page (gallery images) are fetched with ``httpx``
+instead of a browser tab each: ``ContextDownloader.from_page`` copies the
+page's cookies, user agent and URL (as the Referer) into a client, so the
+requests look like the page's own image loads, and downloads run
+``concurrency`` at a time. Bodies are streamed to disk and hashed as they
+arrive, so no file is read back for its checksum.
+"""
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import httpx
+
+from config.settings import settings
+
+
+@dataclass
+class DownloadedFile:
+    """A file downloaded to disk, with the SHA-256 of its content."""
+    url: str
+    path: Path
+    checksum: str
+    size: int
+    content_type: str
+
+
+class ContextDownloader:
+    """Concurrent, streamed downloads with a browser context's cookies and headers."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        concurrency: Optional[int] = None,
+        accept_types: Tuple[str, ...] = ("image/",),
+    ):
+        self.client = client
+        self.accept_types = accept_types
+        self._semaphore = asyncio.Semaphore(concurrency or settings.browser_download_concurrency)
+
+    @classmethod
+    async def from_page(cls, page, concurrency: Optional[int] = None, **kwargs) -> "ContextDownloader":
+        """A downloader sending ``page``'s cookies and user agent, with the page as the Referer."""
+        cookies = httpx.Cookies()
+        for cookie in await page.context.cookies():
+            cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+        user_agent = await page.evaluate("navigator.userAgent")
+        client = httpx.AsyncClient(
+            headers={
+                "User-Agent": user_agent or settings.scraper_user_agent,
+                "Referer": page.url,
+                "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+            },
+            cookies=cookies,
+            timeout=settings.scraper_timeout_seconds,
+            follow_redirects=True,
+        )
+        return cls(client, concurrency, **kwargs)
+
+    async def __aenter__(self) -> "ContextDownloader":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def download(self, url: str, path: Path) -> Optional[DownloadedFile]:
+        """Stream ``url`` to ``path``; None (and no file) on an error or an unexpected content type."""
+        async with self._semaphore:
+            try:
+                return await self._stream(url, path)
+            except (httpx.HTTPError, OSError, ValueError) as e:
+                print(f"  ✗ Error downloading {url}: {e}")
+                path.unlink(missing_ok=True)
+                return None
+
+    async def download_all(self, downloads: Sequence[Tuple[str, Path]]) -> List[Optional[DownloadedFile]]:
+        """Download ``(url, path)`` pairs concurrently; results are in the order given."""
+        return await asyncio.gather(*(self.download(url, path) for url, path in downloads))
+
+    async def _stream(self, url: str, path: Path) -> DownloadedFile:
+        async with self.client.stream("GET", url) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "").lower()
+            if self.accept_types and not content_type.startswith(self.accept_types):
+                raise ValueError(f"unexpected content type {content_type or 'none'}")
+            sha256 = hashlib.sha256()
+            size = 0
+            with open(path, "wb") as f:
+                async for chunk in response.aiter_bytes():
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+        return DownloadedFile(url=url, path=path, checksum=sha256.hexdigest(), size=size, content_type=content_type)
+
+    async def aclose(self):
+        await self.client.aclose()
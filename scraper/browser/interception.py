@@ -0,0 +1,169 @@
+"""Request interception for browser crawls: blocking and a static-asset cache.
+
+Each crawler picks an ``InterceptionPolicy``:
+
+* requests to ad and tracking domains are aborted;
+* resource types the crawler does not need are aborted - spec pages whose data
+  lives in the DOM need no images, media or fonts;
+* scripts and stylesheets are served from a disk cache (``HttpCache``) through
+  ``route.fulfill``. Entries younger than the freshness window are served
+  without a request, older ones are revalidated with their validators, so the
+  same bundles are not downloaded again on every page of a crawl.
+
+``InterceptionStats`` counts what was blocked and the bytes served from the
+cache instead of the network. Aborted requests are only counted - they are
+never downloaded, so their size is unknown.
+"""
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from config.settings import settings
+from scraper.http_cache import HttpCache
+
+# Resources worth keeping on disk: versioned bundles shared by every page of a site
+STATIC_ASSET_TYPES = frozenset(["script", "stylesheet"])
+
+# Not needed when the data is read from the DOM
+DOM_ONLY_BLOCKED_TYPES = frozenset(["image", "media", "font"])
+
+# Describe the transfer, not the decoded body that is stored and fulfilled
+_UNCACHED_HEADERS = frozenset(["content-encoding", "content-length", "transfer-encoding"])
+
+AD_DOMAINS = (
+    'doubleclick.net', 'googlesyndication.com', 'google.com/recaptcha',
+    'lijit.com', 'rubiconproject.com', 'crwdcntrl.net', 'pubmatic.com',
+    'bidberry.net', 'adtrafficquality.google', 'safeframe', 'casalemedia.com',
+    'adsrvr.org', 'advertising.com', 'adnxs.com', 'quantserve.com',
+    'googletagmanager.com', 'googletagservices.com', 'google-analytics.com',
+    'scorecardresearch.com', 'amazon-adsystem.com', 'ads-twitter.com',
+    'facebook.net', 'outbrain.com', 'taboola.com', 'criteo.com',
+    'tappx.com', 'indexww.com', 'snigelweb.com', 'clearnview.com',
+)
+
+
+@dataclass(frozen=True)
+class InterceptionPolicy:
+    """What a crawler's pages may load."""
+    name: str
+    blocked_resource_types: FrozenSet[str] = frozenset()
+    blocked_domains: Tuple[str, ...] = AD_DOMAINS
+    cache_static_assets: bool = True
+
+
+POLICIES: Dict[str, InterceptionPolicy] = {
+    # Specs are read from the DOM; images are stored as URLs only
+    'autoevolution': InterceptionPolicy('autoevolution', DOM_ONLY_BLOCKED_TYPES),
+    # Gallery images must still load for the slide-by-slide fallback
+    'collectingcars': InterceptionPolicy('collectingcars', frozenset(["media", "font"])),
+}
+
+
+@dataclass
+class InterceptionStats:
+    """Counters of one crawl's intercepted requests."""
+    requests: int = 0
+    blocked_domain: int = 0
+    blocked_types: Counter = field(default_factory=Counter)
+    cache_hits: int = 0
+    cache_revalidated: int = 0
+    cache_misses: int = 0
+    # Asset bytes served from disk instead of downloaded
+    bytes_saved: int = 0
+    # Asset bytes downloaded (and cached) this run
+    bytes_downloaded: int = 0
+
+    @property
+    def blocked(self) -> int:
+        return self.blocked_domain + sum(self.blocked_types.values())
+
+    def summary(self) -> str:
+        types = ", ".join(f"{count} {kind}" for kind, count in self.blocked_types.most_common()) or "none"
+        return (
+            f"{self.requests} requests, {self.blocked} blocked ({self.blocked_domain} ad/tracking, {types}); "
+            f"assets: {self.cache_hits} from cache, {self.cache_revalidated} revalidated, "
+            f"{self.cache_misses} downloaded; {self.bytes_saved / 1024:.0f} KiB saved, "
+            f"{self.bytes_downloaded / 1024:.0f} KiB downloaded"
+        )
+
+
+class RequestInterceptor:
+    """Applies an ``InterceptionPolicy`` to every request of the contexts it is installed on."""
+
+    def __init__(self, policy: InterceptionPolicy, cache: Optional[HttpCache] = None):
+        self.policy = policy
+        self.cache = cache if policy.cache_static_assets else None
+        self.stats = InterceptionStats()
+
+    @classmethod
+    def for_crawler(cls, name: str) -> "RequestInterceptor":
+        """The interceptor of a crawler's policy, with the configured asset cache."""
+        cache = None
+        if settings.browser_asset_cache_enabled:
+            cache = HttpCache(settings.browser_asset_cache_dir, settings.browser_asset_cache_fresh_seconds)
+        return cls(POLICIES[name], cache)
+
+    async def install(self, context):
+        """Route all requests of a browser context through the policy (a ``BrowserPool`` hook)."""
+        await context.route("**/*", self.handle)
+
+    async def handle(self, route):
+        request = route.request
+        self.stats.requests += 1
+        if any(domain in request.url for domain in self.policy.blocked_domains):
+            self.stats.blocked_domain += 1
+            await route.abort()
+        elif request.resource_type in self.policy.blocked_resource_types:
+            self.stats.blocked_types[request.resource_type] += 1
+            await route.abort("blockedbyclient")
+        elif self._cacheable(request):
+            await self._serve_asset(route)
+        else:
+            await route.continue_()
+
+    def _cacheable(self, request) -> bool:
+        return (
+            self.cache is not None
+            and request.resource_type in STATIC_ASSET_TYPES
+            and request.method == "GET"
+            and request.url.startswith(("http://", "https://"))
+        )
+
+    async def _serve_asset(self, route):
+        url = route.request.url
+        entry = await asyncio.to_thread(self.cache.get, url)
+        body = await asyncio.to_thread(self.cache.read_body, url) if entry else None
+        if entry is not None and body is not None and entry.age() < self.cache.fresh_seconds:
+            self.stats.cache_hits += 1
+            self.stats.bytes_saved += len(body)
+            await route.fulfill(status=entry.status_code, headers=entry.headers, body=body)
+            return
+
+        headers = dict(route.request.headers)
+        if entry is not None and body is not None:
+            headers.update(entry.validators())
+        try:
+            response = await route.fetch(headers=headers)
+        except Exception:
+            # Let the browser make the request itself and report its own error
+            await route.continue_()
+            return
+
+        if response.status == 304 and entry is not None and body is not None:
+            self.stats.cache_revalidated += 1
+            self.stats.bytes_saved += len(body)
+            await asyncio.to_thread(self.cache.revalidated, entry, response.headers)
+            await route.fulfill(status=entry.status_code, headers=entry.headers, body=body)
+            return
+
+        fetched = await response.body()
+        self.stats.cache_misses += 1
+        self.stats.bytes_downloaded += len(fetched)
+        # The body is already decoded - passing the encoding on would make the browser decode it twice
+        response_headers = {
+            name: value for name, value in response.headers.items() if name.lower() not in _UNCACHED_HEADERS
+        }
+        if response.status == 200:
+            await asyncio.to_thread(self.cache.store, url, response.status, response_headers, fetched)
+        await route.fulfill(status=response.status, headers=response_headers, body=fetched)
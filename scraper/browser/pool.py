@@ -0,0 +1,207 @@
+"""One Chromium process shared by the browser-based crawlers.
+
+``BrowserPool`` owns a single browser and up to ``size`` slots, each a browser
+context with one page. Asyncio tasks borrow a page with ``async with
+pool.page() as page`` and so crawl ``size`` pages at once on one browser
+process. Contexts start from the pool's storage state (cookies and local
+storage, e.g. an accepted consent banner), and a slot's context and page are
+replaced after ``max_navigations`` main-frame navigations - long-lived pages
+keep growing their heap - or when the page crashed or was closed. The state of
+a retired context carries over to its successor and is written back to
+``storage_state_path`` when the pool closes.
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
+
+from config.settings import settings
+
+# Called with every new context (routes, stealth) or page (event listeners)
+ContextHook = Callable[[BrowserContext], Awaitable[None]]
+PageHook = Callable[[Page], Awaitable[None]]
+
+
+@dataclass
+class _Slot:
+    context: Optional[BrowserContext] = None
+    page: Optional[Page] = None
+    navigations: int = 0
+    crashed: bool = False
+
+
+@dataclass
+class PoolStats:
+    """Counters of one pool's lifetime."""
+    leases: int = 0
+    navigations: int = 0
+    recycled: int = 0
+    contexts: int = 0
+    peak_in_use: int = 0
+
+
+class BrowserPool:
+    """A browser with a fixed number of reusable context/page slots.
+
+    Use as an async context manager::
+
+        async with BrowserPool(size=4, storage_state_path=COOKIES) as pool:
+            async def crawl(url):
+                async with pool.page() as page:
+                    await page.goto(url)
+                    ...
+            await asyncio.gather(*(crawl(url) for url in urls))
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_navigations: Optional[int] = None,
+        headless: bool = True,
+        storage_state_path: Optional[Union[str, Path]] = None,
+        launch_options: Optional[Dict[str, Any]] = None,
+        context_options: Optional[Dict[str, Any]] = None,
+        on_context: Optional[ContextHook] = None,
+        on_page: Optional[PageHook] = None,
+    ):
+        self.size = size or settings.browser_pool_size
+        self.max_navigations = max_navigations or settings.browser_page_max_navigations
+        self.headless = headless
+        self.storage_state_path = Path(storage_state_path) if storage_state_path else None
+        self.launch_options = launch_options or {}
+        self.context_options = context_options or {}
+        self.on_context = on_context
+        self.on_page = on_page
+        self.stats = PoolStats()
+
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._slots: asyncio.Queue = asyncio.Queue()
+        self._live: List[_Slot] = []
+        self._storage_state: Optional[Dict[str, Any]] = None
+        self._in_use = 0
+
+    @property
+    def browser(self) -> Browser:
+        if self._browser is None:
+            raise RuntimeError("BrowserPool is not started")
+        return self._browser
+
+    @property
+    def storage_state_loaded(self) -> bool:
+        """Whether contexts start from a saved state (cookie consent is likely settled)."""
+        return self._storage_state is not None
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        if self.storage_state_path and self.storage_state_path.exists():
+            self._storage_state = json.loads(self.storage_state_path.read_text())
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless, **self.launch_options)
+        # Slots get their context on first use, so a pool larger than the work costs nothing
+        for _ in range(self.size):
+            self._slots.put_nowait(_Slot())
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Borrow a page; waits while all ``size`` pages are in use."""
+        slot = await self._slots.get()
+        try:
+            if slot.page is None:
+                await self._open(slot)
+            elif slot.crashed or slot.page.is_closed() or slot.navigations >= self.max_navigations:
+                await self._recycle(slot)
+                await self._open(slot)
+            self.stats.leases += 1
+            self._in_use += 1
+            self.stats.peak_in_use = max(self.stats.peak_in_use, self._in_use)
+            try:
+                yield slot.page
+            finally:
+                self._in_use -= 1
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def save_storage_state(self):
+        """Write the newest context state to ``storage_state_path``."""
+        for slot in self._live:
+            if slot.context is not None:
+                await self._capture_state(slot.context)
+                break
+        if self.storage_state_path and self._storage_state is not None:
+            self.storage_state_path.parent.mkdir(parents=True, exist_ok=True)
+            self.storage_state_path.write_text(json.dumps(self._storage_state))
+
+    async def close(self):
+        if self._browser is None:
+            return
+        try:
+            await self.save_storage_state()
+        finally:
+            for slot in self._live:
+                await self._close_slot(slot)
+            self._live.clear()
+            await self._browser.close()
+            await self._playwright.stop()
+            self._browser = None
+            self._playwright = None
+
+    async def _open(self, slot: _Slot):
+        options = dict(self.context_options)
+        if self._storage_state is not None:
+            options["storage_state"] = self._storage_state
+        slot.context = await self.browser.new_context(**options)
+        if self.on_context:
+            await self.on_context(slot.context)
+        slot.page = await slot.context.new_page()
+        slot.navigations = 0
+        slot.crashed = False
+        page = slot.page
+
+        def on_navigated(frame):
+            if frame == page.main_frame:
+                slot.navigations += 1
+                self.stats.navigations += 1
+
+        def on_crash(_):
+            slot.crashed = True
+
+        page.on("framenavigated", on_navigated)
+        page.on("crash", on_crash)
+        if self.on_page:
+            await self.on_page(page)
+        self._live.append(slot)
+        self.stats.contexts += 1
+
+    async def _recycle(self, slot: _Slot):
+        """Retire a slot's context, keeping its cookies for the next one."""
+        self.stats.recycled += 1
+        if not slot.crashed:
+            await self._capture_state(slot.context)
+        await self._close_slot(slot)
+        self._live.remove(slot)
+
+    async def _capture_state(self, context: BrowserContext):
+        try:
+            self._storage_state = await context.storage_state()
+        except Exception:
+            # A crashed or closing context has no state to give - keep the previous one
+            pass
+
+    async def _close_slot(self, slot: _Slot):
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        slot.context = None
+        slot.page = None
@@ -0,0 +1,111 @@
+"""Set-based deactivation of ads that disappeared from their source site."""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from db.models import CarAdRaw
+
+# Keep IN (...) lists well below driver/parameter limits
+SEEN_BATCH_SIZE = 1000
+
+
+@dataclass
+class SweepResult:
+    """Outcome of a deactivation sweep for one source site."""
+    source_site: str
+    crawl_run_id: str
+    seen: int
+    active_before: int
+    deactivated: int = 0
+    aborted_reason: Optional[str] = None
+
+    @property
+    def aborted(self) -> bool:
+        return self.aborted_reason is not None
+
+
+def mark_ads_seen(db: Session, source_site: str, source_ids: Iterable[str], crawl_run_id: str) -> int:
+    """Stamp the crawl run on every ad seen in it, reactivating ads that were relisted."""
+    ids = sorted(set(source_ids))
+    now = datetime.utcnow()
+    updated = 0
+
+    for start in range(0, len(ids), SEEN_BATCH_SIZE):
+        batch = ids[start:start + SEEN_BATCH_SIZE]
+        updated += db.query(CarAdRaw).filter(
+            CarAdRaw.source_site == source_site,
+            CarAdRaw.source_id.in_(batch),
+        ).update(
+            {
+                CarAdRaw.last_crawl_run_id: crawl_run_id,
+                CarAdRaw.last_seen_at: now,
+                CarAdRaw.is_active: True,
+                CarAdRaw.deactivated_at: None,
+            },
+            synchronize_session=False,
+        )
+
+    db.commit()
+    return updated
+
+
+def deactivate_missing_ads(
+    db: Session,
+    source_site: str,
+    crawl_run_id: str,
+    min_seen: Optional[int] = None,
+    min_seen_ratio: Optional[float] = None,
+) -> SweepResult:
+    """Deactivate every active ad of a site that the given crawl run did not see.
+
+    The sweep is a single UPDATE. It is skipped when the run saw fewer than
+    ``min_seen`` ads, or fewer than ``min_seen_ratio`` of the currently active
+    ads - both are signs of a partial crawl (ban, layout change, network errors)
+    rather than of cars actually being sold.
+    """
+    if min_seen is None:
+        min_seen = settings.scraper_deactivation_min_seen
+    if min_seen_ratio is None:
+        min_seen_ratio = settings.scraper_deactivation_min_seen_ratio
+
+    seen = db.query(CarAdRaw).filter(
+        CarAdRaw.source_site == source_site,
+        CarAdRaw.last_crawl_run_id == crawl_run_id,
+    ).count()
+    active_before = db.query(CarAdRaw).filter(
+        CarAdRaw.source_site == source_site,
+        CarAdRaw.is_active == True,
+    ).count()
+
+    result = SweepResult(
+        source_site=source_site,
+        crawl_run_id=crawl_run_id,
+        seen=seen,
+        active_before=active_before,
+    )
+
+    if seen < min_seen:
+        result.aborted_reason = f"saw {seen} ads, minimum is {min_seen}"
+        return result
+    if active_before and seen < active_before * min_seen_ratio:
+        result.aborted_reason = (
+            f"saw {seen} of {active_before} active ads, "
+            f"below the {min_seen_ratio:.0%} safety threshold"
+        )
+        return result
+
+    result.deactivated = db.query(CarAdRaw).filter(
+        CarAdRaw.source_site == source_site,
+        CarAdRaw.is_active == True,
+        CarAdRaw.last_crawl_run_id.is_distinct_from(crawl_run_id),
+    ).update(
+        {
+            CarAdRaw.is_active: False,
+            CarAdRaw.deactivated_at: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return result
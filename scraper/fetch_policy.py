@@ -0,0 +1,228 @@
+"""Per-host fetch policy: retries, adaptive request rate and circuit breaking.
+
+``AsyncFetcher`` consults one ``HostPolicy`` per host around every request:
+
+* Failed requests (transport errors, 429, 5xx) are retried with jittered
+  exponential backoff. A ``Retry-After`` header wins over the backoff and
+  pauses the whole host, not just the request that got it.
+* The host's request rate follows AIMD: every healthy response adds a little
+  to it, while throttling (429, or the 403/451 blocks anti-bot systems answer
+  with), server errors or responses slower than the latency target cut it by
+  a factor. The rate stays between the configured minimum and the host's
+  maximum (by default its configured politeness rate), so a crawl settles at
+  the highest rate the host tolerates.
+* A circuit breaker opens after several consecutive failures and pauses the
+  host; after the reset timeout a single probe request decides whether it
+  closes again or stays open for twice as long.
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from config.settings import settings
+
+# Responses worth retrying - the same request may well succeed later
+RETRYABLE_STATUSES = frozenset([408, 425, 429, 500, 502, 503, 504])
+# Responses that mean the host wants less from us - rate limiters and WAFs block with 403/451 as often as 429
+THROTTLING_STATUSES = frozenset([403, 429, 451])
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Raised instead of sending a request while its host is paused for too long."""
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Delay requested by a ``Retry-After`` header (seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently a failed request is retried."""
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=settings.scraper_retry_attempts,
+            base_delay=settings.scraper_retry_base_seconds,
+            max_delay=settings.scraper_retry_max_seconds,
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt`` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class AimdRate:
+    """Additive-increase / multiplicative-decrease control of a token bucket's rate."""
+
+    def __init__(self, bucket, min_rate: float, max_rate: float, increase: float, decrease_factor: float):
+        self.bucket = bucket
+        self.min_rate = min(min_rate, max_rate)
+        self.max_rate = max_rate
+        self.increase_step = increase
+        self.decrease_factor = decrease_factor
+        self.decreased_at = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def increase(self):
+        self.bucket.set_rate(min(self.max_rate, self.rate + self.increase_step))
+
+    def decrease(self, started_at: float):
+        """Cut the rate - once per feedback round.
+
+        Requests sent before the last cut report the rate they were sent at;
+        letting each of them cut again would collapse the rate after a
+        single burst of errors.
+        """
+        if started_at < self.decreased_at:
+            return
+        self.decreased_at = time.monotonic()
+        self.bucket.set_rate(max(self.min_rate, self.rate * self.decrease_factor))
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures -> half-open probe."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self, failure_threshold: int, reset_seconds: float, max_reset_seconds: float, probe_timeout: float = 60
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_reset_seconds = reset_seconds
+        self.max_reset_seconds = max_reset_seconds
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_until = 0.0
+        # A probe that never reports back (cancelled) stops blocking the host after this long
+        self.probe_timeout = probe_timeout
+        self._probe_started = None
+
+    def wait_seconds(self) -> float:
+        """How long a request has to wait before it may be sent (0 = now)."""
+        if self.state == self.CLOSED:
+            return 0.0
+        remaining = self.opened_until - time.monotonic()
+        if remaining > 0:
+            return remaining
+        now = time.monotonic()
+        if self._probe_started is not None and now - self._probe_started < self.probe_timeout:
+            # Someone else's probe is deciding - check back shortly
+            return min(self.base_reset_seconds, 1.0)
+        self.state = self.HALF_OPEN
+        self._probe_started = now
+        return 0.0
+
+    def success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_seconds = self.base_reset_seconds
+        self._probe_started = None
+
+    def failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            # The probe failed - stay open, for longer this time
+            self.reset_seconds = min(self.max_reset_seconds, self.reset_seconds * 2)
+            self._open(self.reset_seconds)
+        elif self.failures >= self.failure_threshold:
+            self._open(self.reset_seconds)
+
+    def pause(self, seconds: float):
+        """Hold requests for ``seconds`` (e.g. a Retry-After) without counting a failure."""
+        if self.state == self.CLOSED:
+            self.state = self.OPEN
+        self.opened_until = max(self.opened_until, time.monotonic() + seconds)
+
+    def _open(self, seconds: float):
+        self.state = self.OPEN
+        self._probe_started = None
+        self.opened_until = time.monotonic() + seconds
+
+
+class HostPolicy:
+    """Adaptive politeness of one host: AIMD rate plus circuit breaker."""
+
+    def __init__(self, host: str, bucket, max_rate: Optional[float] = None):
+        self.host = host
+        self.retry = RetryPolicy.from_settings()
+        self.rate = AimdRate(
+            bucket,
+            min_rate=settings.scraper_min_rate_per_second,
+            max_rate=max_rate or settings.scraper_max_rate_per_second or bucket.rate,
+            increase=settings.scraper_rate_increase,
+            decrease_factor=settings.scraper_rate_decrease_factor,
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.scraper_circuit_failure_threshold,
+            reset_seconds=settings.scraper_circuit_reset_seconds,
+            max_reset_seconds=settings.scraper_circuit_max_reset_seconds,
+            probe_timeout=2 * settings.scraper_timeout_seconds,
+        )
+        self.latency_target = settings.scraper_latency_target_seconds
+
+    async def wait_until_allowed(self):
+        """Wait out a paused host; raises ``CircuitOpenError`` rather than waiting too long."""
+        waited = 0.0
+        while True:
+            delay = self.breaker.wait_seconds()
+            if delay <= 0:
+                return
+            if waited + delay > settings.scraper_circuit_max_wait_seconds:
+                raise CircuitOpenError(f"{self.host} is paused for another {delay:.0f}s")
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def record_response(self, status_code: int, latency: float, started_at: float):
+        if status_code in RETRYABLE_STATUSES or status_code in THROTTLING_STATUSES:
+            self.rate.decrease(started_at)
+            self.breaker.failure()
+            return
+        self.breaker.success()
+        if latency > self.latency_target:
+            # The host is struggling - back off before it starts failing
+            self.rate.decrease(started_at)
+        else:
+            self.rate.increase()
+
+    def record_error(self, started_at: float):
+        """A transport error (timeout, refused or reset connection)."""
+        self.rate.decrease(started_at)
+        self.breaker.failure()
+
+    def retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Backoff before retrying.
+
+        A Retry-After header pauses the whole host instead (the pause is waited
+        out by ``wait_until_allowed``, which refuses overly long ones).
+        """
+        retry_after = retry_after_seconds(response.headers.get('retry-after')) if response is not None else None
+        if retry_after is not None:
+            self.breaker.pause(retry_after)
+            return 0.0
+        return self.retry.backoff(attempt)
@@ -0,0 +1,265 @@
+"""Asynchronous HTTP fetch engine shared by the site scrapers.
+
+One ``httpx.AsyncClient`` (and therefore one connection pool) is shared by every
+request of a crawl. Politeness is enforced per host: a semaphore caps the number
+of in-flight requests and a token bucket caps the request rate, so a crawl runs
+at its politeness budget instead of sleeping a fixed delay between requests.
+
+Failed requests are retried, and each host's rate adapts to how it responds
+(see ``scraper.fetch_policy``): the configured rate is where a host starts and,
+unless a higher ``max_rate_per_second`` is configured, the most it gets.
+
+With an ``HttpCache`` attached, fresh cached responses are served without a
+request and stale ones are revalidated with conditional headers.
+
+Every response, transport error and cache hit is recorded for the site being
+crawled (see ``scraper.telemetry``).
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from config.settings import settings
+from scraper import telemetry
+from scraper.fetch_policy import RETRYABLE_STATUSES, HostPolicy
+from scraper.http_cache import CacheEntry, HttpCache
+
+DEFAULT_HEADERS = {
+    'User-Agent': settings.scraper_user_agent,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: ``rate`` requests per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate: float):
+        """Change the rate; tokens earned so far are kept."""
+        self._refill()
+        self.rate = rate
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        # The lock makes waiters queue up in FIFO order instead of racing for tokens
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+@dataclass
+class HostLimits:
+    """Politeness budget for one host."""
+    rate_per_second: float
+    burst: int
+    max_concurrency: int
+    # Ceiling of the adaptive rate (None = settings.scraper_max_rate_per_second, else rate_per_second)
+    max_rate_per_second: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls) -> "HostLimits":
+        return cls(
+            rate_per_second=settings.scraper_rate_per_second,
+            burst=settings.scraper_burst,
+            max_concurrency=settings.scraper_max_concurrency_per_host,
+        )
+
+
+@dataclass
+class FetchResult:
+    """A fetched response body with the metadata the scrapers need."""
+    url: str
+    status_code: int
+    content: bytes
+    headers: Dict[str, str]
+    elapsed: float
+    # True when the body came from the HTTP cache (fresh hit or 304 Not Modified)
+    from_cache: bool = False
+    # SHA-256 of the body when it is cached; keys the parsed results stored for it
+    digest: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+
+class AsyncFetcher:
+    """Rate-limited async HTTP client with per-host concurrency, token buckets and fetch policies."""
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        cache: Optional[HttpCache] = None,
+    ):
+        self.client = httpx.AsyncClient(
+            headers={**DEFAULT_HEADERS, **(headers or {})},
+            timeout=timeout or settings.scraper_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.scraper_max_connections,
+                max_keepalive_connections=settings.scraper_max_connections,
+            ),
+            follow_redirects=True,
+        )
+        # Response cache (None = the one configured in settings, if enabled)
+        self.cache = cache if cache is not None else HttpCache.from_settings()
+        self._host_limits: Dict[str, HostLimits] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._policies: Dict[str, HostPolicy] = {}
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def configure_host(
+        self,
+        host: str,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_rate_per_second: Optional[float] = None,
+    ):
+        """Override the default politeness budget for a host (before its first request)."""
+        defaults = self._limits_for(host)
+        self._host_limits[host] = HostLimits(
+            rate_per_second=rate_per_second or defaults.rate_per_second,
+            burst=burst or defaults.burst,
+            max_concurrency=max_concurrency or defaults.max_concurrency,
+            max_rate_per_second=max_rate_per_second or defaults.max_rate_per_second,
+        )
+        self._buckets.pop(host, None)
+        self._semaphores.pop(host, None)
+        self._policies.pop(host, None)
+
+    def _limits_for(self, host: str) -> HostLimits:
+        return self._host_limits.get(host) or HostLimits.from_settings()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            limits = self._limits_for(host)
+            self._buckets[host] = TokenBucket(limits.rate_per_second, limits.burst)
+        return self._buckets[host]
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self._limits_for(host).max_concurrency)
+        return self._semaphores[host]
+
+    def policy(self, host: str) -> HostPolicy:
+        """Retry, adaptive rate and circuit breaker state of a host."""
+        if host not in self._policies:
+            self._policies[host] = HostPolicy(host, self._bucket(host), self._limits_for(host).max_rate_per_second)
+        return self._policies[host]
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """GET a URL within its host's budget, retrying failures; raises ``httpx.HTTPError`` on failure."""
+        host = urlparse(url).netloc
+        entry = await asyncio.to_thread(self.cache.get, url) if self.cache else None
+        cached_body = await asyncio.to_thread(self.cache.read_body, url) if entry else None
+        if cached_body is None:
+            entry = None
+
+        if entry and entry.age() < self.cache.fresh_seconds_for(host):
+            telemetry.record_cache_hit()
+            return self._cached_result(entry, cached_body, 0.0)
+
+        request_headers = {**(entry.validators() if entry else {}), **(headers or {})}
+        response, elapsed = await self._get(url, host, request_headers)
+
+        if response.status_code == 304 and entry:
+            entry = await asyncio.to_thread(self.cache.revalidated, entry, dict(response.headers))
+            telemetry.record_cache_hit()
+            return self._cached_result(entry, cached_body, elapsed)
+
+        response.raise_for_status()
+        result = FetchResult(
+            url=str(response.url),
+            status_code=response.status_code,
+            content=response.content,
+            headers=dict(response.headers),
+            elapsed=elapsed,
+        )
+        if self.cache and self._cacheable(result, host):
+            entry = await asyncio.to_thread(
+                self.cache.store, url, result.status_code, result.headers, result.content
+            )
+            result.digest = entry.digest if entry else None
+        return result
+
+    async def _get(self, url: str, host: str, headers: Dict[str, str]) -> Tuple[httpx.Response, float]:
+        """Send a GET, retrying transport errors and retryable statuses as the host's policy allows.
+
+        Returns the last response (possibly still an error status) and its latency.
+        """
+        policy = self.policy(host)
+        attempt = 0
+        while True:
+            attempt += 1
+            await policy.wait_until_allowed()
+            response = None
+            async with self._semaphore(host):
+                await self._bucket(host).acquire()
+                started = time.monotonic()
+                try:
+                    response = await self.client.get(url, headers=headers)
+                except httpx.TransportError:
+                    policy.record_error(started)
+                    telemetry.record_fetch_error()
+                    if attempt >= policy.retry.max_attempts:
+                        raise
+                elapsed = time.monotonic() - started
+                if response is not None:
+                    policy.record_response(response.status_code, elapsed, started)
+                    telemetry.record_response(response.status_code, len(response.content), elapsed)
+
+            if response is not None and (
+                response.status_code not in RETRYABLE_STATUSES or attempt >= policy.retry.max_attempts
+            ):
+                return response, elapsed
+            # Back off outside the semaphore - a waiting retry must not hold a connection slot
+            await asyncio.sleep(policy.retry_delay(attempt, response))
+
+    def _cacheable(self, result: FetchResult, host: str) -> bool:
+        # Without validators an entry is only useful inside a freshness window
+        has_validators = 'etag' in result.headers or 'last-modified' in result.headers
+        return has_validators or self.cache.fresh_seconds_for(host) > 0
+
+    @staticmethod
+    def _cached_result(entry: CacheEntry, body: bytes, elapsed: float) -> FetchResult:
+        return FetchResult(
+            url=entry.url,
+            status_code=entry.status_code,
+            content=body,
+            headers=entry.headers,
+            elapsed=elapsed,
+            from_cache=True,
+            digest=entry.digest,
+        )
+
+    async def aclose(self):
+        """Close the shared connection pool."""
+        await self.client.aclose()
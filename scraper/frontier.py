@@ -0,0 +1,481 @@
+"""Persistent crawl frontier: the queue of URLs a crawl still has to fetch.
+
+Every URL of a crawl is a task row with a state, a priority, an attempt count
+and the time it next becomes eligible. Workers claim batches of tasks under a
+lease and mark them done or failed, so the frontier - not process memory - is
+the state of a crawl:
+
+* a restarted crawl resumes from the tasks that are still pending;
+* a task whose worker died becomes claimable again once its lease expires -
+  live workers renew the leases of the tasks they still hold (heartbeats);
+* several processes (or hosts, with the Postgres backend) can share one crawl,
+  claims never hand the same task to two workers.
+
+Two backends implement the same interface: ``SqliteFrontier`` for local runs
+and ``PostgresFrontier`` (table ``crawl_frontier``) for production, where
+claims use ``SELECT ... FOR UPDATE SKIP LOCKED``.
+"""
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from config.settings import settings
+from db.models import CrawlFrontier
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = frozenset(["utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "fbclid", "gclid"])
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL, so the same page is only queued once.
+
+    Lower-cases scheme and host, drops default ports, fragments and tracking
+    parameters, and sorts the query string.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff before retrying a task that failed ``attempts`` times."""
+    base = settings.scraper_frontier_retry_base_seconds
+    return min(base * 2 ** max(attempts - 1, 0), settings.scraper_frontier_retry_max_seconds)
+
+
+@dataclass
+class FrontierTask:
+    """A claimed frontier URL."""
+    id: int
+    crawl: str
+    site: str
+    url: str
+    crawl_run_id: str
+    priority: int
+    attempts: int
+
+
+class Frontier:
+    """Interface of the frontier backends."""
+
+    def add(
+        self,
+        crawl: str,
+        site: str,
+        urls: Iterable[str],
+        crawl_run_id: str,
+        priority: int = 0,
+    ) -> int:
+        """Queue URLs for a crawl run; returns how many were queued.
+
+        URLs are deduplicated per run: a URL that is pending or in progress is
+        left alone, one finished (done or failed) by an earlier run is queued
+        again for this one.
+        """
+        raise NotImplementedError
+
+    def claim(
+        self,
+        crawl: str,
+        limit: int,
+        worker_id: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+        site: Optional[str] = None,
+    ) -> List[FrontierTask]:
+        """Lease up to ``limit`` eligible tasks (of one site, if given), highest priority first."""
+        raise NotImplementedError
+
+    def complete(self, task_ids: Iterable[int], worker_id: str) -> int:
+        """Mark tasks the worker still holds done; returns how many.
+
+        A task whose lease expired and was claimed by another worker belongs
+        to that worker now and is left alone.
+        """
+        raise NotImplementedError
+
+    def fail(self, task: FrontierTask, error: str, worker_id: str) -> bool:
+        """Record a failed attempt of a task the worker still holds; False if it no longer does.
+
+        The task is retried later with backoff, or given up after the last attempt.
+        """
+        raise NotImplementedError
+
+    def renew_leases(self, worker_id: str, lease_seconds: Optional[float] = None) -> int:
+        """Extend the lease of every task the worker holds (a heartbeat); returns how many.
+
+        A task whose lease expired and was claimed by another worker is no
+        longer held and is not renewed.
+        """
+        raise NotImplementedError
+
+    def unfinished_run(self, crawl: str) -> Optional[str]:
+        """crawl_run_id of the crawl's pending or in-progress tasks, if it was interrupted."""
+        raise NotImplementedError
+
+    def counts(self, crawl: str, site: Optional[str] = None) -> Dict[str, int]:
+        """Number of tasks per state (of one site, if given)."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_frontier (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    crawl TEXT NOT NULL,
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    url_hash TEXT NOT NULL,
+    crawl_run_id TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_eligible_at REAL NOT NULL,
+    claimed_by TEXT,
+    lease_expires_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (crawl, url_hash)
+);
+CREATE INDEX IF NOT EXISTS ix_crawl_frontier_claim ON crawl_frontier (crawl, state, next_eligible_at);
+"""
+
+TASK_COLUMNS = "id, crawl, site, url, crawl_run_id, priority, attempts"
+
+
+class SqliteFrontier(Frontier):
+    """Frontier in a local SQLite file (times are epoch seconds).
+
+    SQLite has no row locks; claims run in a ``BEGIN IMMEDIATE`` transaction,
+    which serializes them across processes sharing the file.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+        # One connection, used from the event loop's worker threads
+        self._lock = threading.Lock()
+
+    def add(self, crawl, site, urls, crawl_run_id, priority=0) -> int:
+        now = time.time()
+        rows = {url_hash(url): url for url in urls}
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT INTO crawl_frontier (crawl, site, url, url_hash, crawl_run_id, priority, "
+                "next_eligible_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (crawl, url_hash) DO UPDATE SET state = 'pending', attempts = 0, "
+                "next_eligible_at = excluded.next_eligible_at, crawl_run_id = excluded.crawl_run_id, "
+                "priority = excluded.priority, last_error = NULL, updated_at = excluded.updated_at "
+                "WHERE crawl_frontier.state IN ('done', 'failed') "
+                "AND crawl_frontier.crawl_run_id != excluded.crawl_run_id",
+                [(crawl, site, url, key, crawl_run_id, priority, now, now, now) for key, url in rows.items()],
+            )
+            return self.conn.total_changes - before
+
+    def claim(self, crawl, limit, worker_id=None, lease_seconds=None, site=None) -> List[FrontierTask]:
+        now = time.time()
+        lease_seconds = lease_seconds or settings.scraper_frontier_lease_seconds
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [row[0] for row in self.conn.execute(
+                    "SELECT id FROM crawl_frontier WHERE crawl = ? AND (? IS NULL OR site = ?) AND ("
+                    "(state = 'pending' AND next_eligible_at <= ?) OR "
+                    "(state = 'in_progress' AND lease_expires_at < ?)) "
+                    "ORDER BY priority DESC, next_eligible_at, id LIMIT ?",
+                    (crawl, site, site, now, now, limit),
+                )]
+                if not ids:
+                    self.conn.execute("COMMIT")
+                    return []
+                placeholders = ",".join("?" * len(ids))
+                self.conn.execute(
+                    f"UPDATE crawl_frontier SET state = 'in_progress', attempts = attempts + 1, "
+                    f"claimed_by = ?, lease_expires_at = ?, updated_at = ? WHERE id IN ({placeholders})",
+                    (worker_id or default_worker_id(), now + lease_seconds, now, *ids),
+                )
+                rows = self.conn.execute(
+                    f"SELECT {TASK_COLUMNS} FROM crawl_frontier WHERE id IN ({placeholders}) "
+                    "ORDER BY priority DESC, id",
+                    ids,
+                ).fetchall()
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [FrontierTask(*row) for row in rows]
+
+    def complete(self, task_ids, worker_id) -> int:
+        ids = list(task_ids)
+        if not ids:
+            return 0
+        with self._lock:
+            cursor = self.conn.execute(
+                f"UPDATE crawl_frontier SET state = 'done', lease_expires_at = NULL, updated_at = ? "
+                f"WHERE id IN ({','.join('?' * len(ids))}) AND state = 'in_progress' AND claimed_by = ?",
+                (time.time(), *ids, worker_id),
+            )
+            return cursor.rowcount
+
+    def fail(self, task, error, worker_id) -> bool:
+        now = time.time()
+        gave_up = task.attempts >= settings.scraper_frontier_max_attempts
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE crawl_frontier SET state = ?, next_eligible_at = ?, lease_expires_at = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ? AND state = 'in_progress' AND claimed_by = ?",
+                (FAILED if gave_up else PENDING, now + retry_delay(task.attempts), error, now, task.id, worker_id),
+            )
+            return cursor.rowcount > 0
+
+    def renew_leases(self, worker_id, lease_seconds=None) -> int:
+        now = time.time()
+        lease_seconds = lease_seconds or settings.scraper_frontier_lease_seconds
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE crawl_frontier SET lease_expires_at = ?, updated_at = ? "
+                "WHERE state = 'in_progress' AND claimed_by = ?",
+                (now + lease_seconds, now, worker_id),
+            )
+            return cursor.rowcount
+
+    def unfinished_run(self, crawl) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT crawl_run_id FROM crawl_frontier WHERE crawl = ? AND state IN ('pending', 'in_progress') "
+                "ORDER BY id LIMIT 1",
+                (crawl,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def counts(self, crawl, site=None) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT state, count(*) FROM crawl_frontier WHERE crawl = ? AND (? IS NULL OR site = ?) "
+                "GROUP BY state",
+                (crawl, site, site),
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self.conn.close()
+
+
+class PostgresFrontier(Frontier):
+    """Frontier in the ``crawl_frontier`` table of the main database."""
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            # Imported here: creating the engine needs database settings that SQLite runs don't
+            from db.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    def add(self, crawl, site, urls, crawl_run_id, priority=0) -> int:
+        rows = [
+            {"crawl": crawl, "site": site, "url": url, "url_hash": key,
+             "crawl_run_id": crawl_run_id, "priority": priority}
+            for key, url in {url_hash(url): url for url in urls}.items()
+        ]
+        if not rows:
+            return 0
+
+        statement = insert(CrawlFrontier).values(rows)
+        statement = statement.on_conflict_do_update(
+            constraint="uq_crawl_frontier_url",
+            set_={
+                "state": PENDING,
+                "attempts": 0,
+                "next_eligible_at": func.now(),
+                "crawl_run_id": statement.excluded.crawl_run_id,
+                "priority": statement.excluded.priority,
+                "last_error": None,
+                "updated_at": func.now(),
+            },
+            where=and_(
+                CrawlFrontier.state.in_([DONE, FAILED]),
+                CrawlFrontier.crawl_run_id != statement.excluded.crawl_run_id,
+            ),
+        )
+
+        db = self.session_factory()
+        try:
+            result = db.execute(statement)
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+    def claim(self, crawl, limit, worker_id=None, lease_seconds=None, site=None) -> List[FrontierTask]:
+        lease_seconds = lease_seconds or settings.scraper_frontier_lease_seconds
+        db = self.session_factory()
+        try:
+            # Rows locked by a concurrent claim are skipped, not waited for
+            claimable = db.query(CrawlFrontier.id).filter(
+                CrawlFrontier.crawl == crawl,
+                or_(
+                    and_(CrawlFrontier.state == PENDING, CrawlFrontier.next_eligible_at <= func.now()),
+                    and_(CrawlFrontier.state == IN_PROGRESS, CrawlFrontier.lease_expires_at < func.now()),
+                ),
+            )
+            if site is not None:
+                claimable = claimable.filter(CrawlFrontier.site == site)
+            claimable = claimable.order_by(
+                CrawlFrontier.priority.desc(), CrawlFrontier.next_eligible_at, CrawlFrontier.id
+            ).limit(limit).with_for_update(skip_locked=True).subquery()
+
+            rows = db.execute(
+                update(CrawlFrontier)
+                .where(CrawlFrontier.id.in_(claimable.select()))
+                .values(
+                    state=IN_PROGRESS,
+                    attempts=CrawlFrontier.attempts + 1,
+                    claimed_by=worker_id or default_worker_id(),
+                    lease_expires_at=func.now() + timedelta(seconds=lease_seconds),
+                    updated_at=func.now(),
+                )
+                .returning(
+                    CrawlFrontier.id, CrawlFrontier.crawl, CrawlFrontier.site, CrawlFrontier.url,
+                    CrawlFrontier.crawl_run_id, CrawlFrontier.priority, CrawlFrontier.attempts,
+                )
+            ).all()
+            db.commit()
+        finally:
+            db.close()
+        return sorted((FrontierTask(*row) for row in rows), key=lambda t: (-t.priority, t.id))
+
+    def complete(self, task_ids, worker_id) -> int:
+        ids = list(task_ids)
+        if not ids:
+            return 0
+        db = self.session_factory()
+        try:
+            completed = db.query(CrawlFrontier).filter(
+                CrawlFrontier.id.in_(ids),
+                CrawlFrontier.state == IN_PROGRESS,
+                CrawlFrontier.claimed_by == worker_id,
+            ).update(
+                {
+                    CrawlFrontier.state: DONE,
+                    CrawlFrontier.lease_expires_at: None,
+                    CrawlFrontier.updated_at: func.now(),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+            return completed
+        finally:
+            db.close()
+
+    def fail(self, task, error, worker_id) -> bool:
+        gave_up = task.attempts >= settings.scraper_frontier_max_attempts
+        db = self.session_factory()
+        try:
+            failed = db.query(CrawlFrontier).filter(
+                CrawlFrontier.id == task.id,
+                CrawlFrontier.state == IN_PROGRESS,
+                CrawlFrontier.claimed_by == worker_id,
+            ).update(
+                {
+                    CrawlFrontier.state: FAILED if gave_up else PENDING,
+                    CrawlFrontier.next_eligible_at: func.now() + timedelta(seconds=retry_delay(task.attempts)),
+                    CrawlFrontier.lease_expires_at: None,
+                    CrawlFrontier.last_error: error,
+                    CrawlFrontier.updated_at: func.now(),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+            return failed > 0
+        finally:
+            db.close()
+
+    def renew_leases(self, worker_id, lease_seconds=None) -> int:
+        lease_seconds = lease_seconds or settings.scraper_frontier_lease_seconds
+        db = self.session_factory()
+        try:
+            renewed = db.query(CrawlFrontier).filter(
+                CrawlFrontier.state == IN_PROGRESS,
+                CrawlFrontier.claimed_by == worker_id,
+            ).update(
+                {
+                    CrawlFrontier.lease_expires_at: func.now() + timedelta(seconds=lease_seconds),
+                    CrawlFrontier.updated_at: func.now(),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+        return renewed
+
+    def unfinished_run(self, crawl) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            row = db.query(CrawlFrontier.crawl_run_id).filter(
+                CrawlFrontier.crawl == crawl,
+                CrawlFrontier.state.in_([PENDING, IN_PROGRESS]),
+            ).order_by(CrawlFrontier.id).first()
+        finally:
+            db.close()
+        return row[0] if row else None
+
+    def counts(self, crawl, site=None) -> Dict[str, int]:
+        db = self.session_factory()
+        try:
+            query = db.query(CrawlFrontier.state, func.count()).filter(CrawlFrontier.crawl == crawl)
+            if site is not None:
+                query = query.filter(CrawlFrontier.site == site)
+            rows = query.group_by(CrawlFrontier.state).all()
+        finally:
+            db.close()
+        return dict(rows)
+
+
+def open_frontier(backend: Optional[str] = None) -> Optional[Frontier]:
+    """The configured frontier backend, or None for in-memory crawls."""
+    backend = backend or settings.scraper_frontier_backend
+    if backend == "sqlite":
+        return SqliteFrontier(settings.scraper_frontier_sqlite_path)
+    if backend == "postgres":
+        return PostgresFrontier()
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown frontier backend: {backend} (expected sqlite, postgres or none)")
@@ -0,0 +1,189 @@
+"""HTML parser backends behind a small tree adapter.
+
+The extractor only needs to walk a document: element children in order, tag
+names, a few attributes and the text that ``get_text()`` would see. ``HtmlTree``
+exposes exactly that, so the parser can be swapped per scraper:
+
+* ``html.parser`` - BeautifulSoup with the pure-Python stdlib parser (slowest)
+* ``lxml``        - BeautifulSoup with the lxml tree builder
+* ``lexbor``      - selectolax's lexbor engine, no BeautifulSoup objects at all
+                    (optional: ``pip install selectolax``)
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Hashable, Iterator, List, Optional, Sequence, Union
+
+from bs4 import BeautifulSoup, Tag, UnicodeDammit
+from bs4.element import CData, NavigableString
+
+from config.settings import settings
+
+PARSER_BACKENDS = ("html.parser", "lxml", "lexbor")
+
+# Strings that count towards get_text() (comments, script and style contents don't)
+TEXT_STRING_TYPES = (NavigableString, CData)
+# Elements whose text BeautifulSoup keeps out of get_text()
+NON_TEXT_TAGS = frozenset(["script", "style", "template"])
+
+
+class HtmlTree(ABC):
+    """Read-only view of a parsed document used by the extractors.
+
+    ``children`` yields element nodes and, for text, plain ``str`` values - so
+    ``isinstance(child, str)`` tells them apart whatever the backend.
+    """
+
+    backend = ""
+
+    def __init__(self, root: Any):
+        self.root = root
+
+    @abstractmethod
+    def children(self, node: Any) -> Iterator[Any]:
+        """Child elements and text of a node, in document order."""
+
+    @abstractmethod
+    def tag(self, node: Any) -> str:
+        """Lower-case tag name of an element."""
+
+    @abstractmethod
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        """Value of an element's attribute, None if it is missing."""
+
+    @abstractmethod
+    def key(self, node: Any) -> Hashable:
+        """Stable identity of a node, usable as a dict key while the tree is alive."""
+
+    @abstractmethod
+    def find_all(self, tags: Sequence[str]) -> List[Any]:
+        """Elements with one of the given tag names, in document order."""
+
+    @abstractmethod
+    def links(self) -> List[str]:
+        """href of every link in the document."""
+
+    def hrefs(self, node: Any) -> List[str]:
+        """href of every link inside an element (the element included), in document order."""
+        hrefs = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, str):
+                continue
+            if self.tag(current) == "a":
+                href = self.attr(current, "href")
+                if href:
+                    hrefs.append(href)
+            stack.extend(reversed(list(self.children(current))))
+        return hrefs
+
+    def text(self, node: Any) -> str:
+        """Equivalent of BeautifulSoup's ``get_text(strip=True)``."""
+        strings = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, str):
+                current = current.strip()
+                if current:
+                    strings.append(current)
+            else:
+                stack.extend(reversed(list(self.children(current))))
+        return "".join(strings)
+
+
+class SoupTree(HtmlTree):
+    """BeautifulSoup document (html.parser or lxml tree builder)."""
+
+    def __init__(self, root: Tag, backend: str = "html.parser"):
+        super().__init__(root)
+        self.backend = backend
+
+    def children(self, node: Tag) -> Iterator[Any]:
+        for child in node.contents:
+            if isinstance(child, Tag) or type(child) in TEXT_STRING_TYPES:
+                yield child
+
+    def tag(self, node: Tag) -> str:
+        return node.name
+
+    def attr(self, node: Tag, name: str) -> Optional[str]:
+        return node.get(name)
+
+    def key(self, node: Tag) -> Hashable:
+        return id(node)
+
+    def find_all(self, tags: Sequence[str]) -> List[Tag]:
+        return self.root.find_all(list(tags))
+
+    def links(self) -> List[str]:
+        return [link["href"] for link in self.root.find_all("a", href=True)]
+
+    def text(self, node: Tag) -> str:
+        return node.get_text(strip=True)
+
+
+class LexborTree(HtmlTree):
+    """selectolax (lexbor) document."""
+
+    backend = "lexbor"
+
+    def __init__(self, parser: Any):
+        super().__init__(parser.root)
+        # The parser owns the nodes - keep it alive as long as the tree
+        self.parser = parser
+
+    def children(self, node: Any) -> Iterator[Any]:
+        keep_text = node.tag not in NON_TEXT_TAGS
+        for child in node.iter(include_text=True):
+            tag = child.tag
+            if tag == "-text":
+                if keep_text:
+                    yield child.text(deep=False)
+            elif not tag.startswith("-"):  # skip comments and doctype
+                yield child
+
+    def tag(self, node: Any) -> str:
+        return node.tag
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+    def key(self, node: Any) -> Hashable:
+        return node.mem_id
+
+    def find_all(self, tags: Sequence[str]) -> List[Any]:
+        tags = set(tags)
+        if self.root is None:
+            return []
+        return [node for node in self.root.traverse() if node.tag in tags]
+
+    def links(self) -> List[str]:
+        return [node.attributes["href"] for node in self.parser.css("a[href]") if node.attributes["href"]]
+
+
+def parse_html(content: Union[bytes, str], backend: Optional[str] = None) -> HtmlTree:
+    """Parse a document with the given backend (default: ``settings.scraper_html_parser``)."""
+    backend = backend or settings.scraper_html_parser
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {backend} (expected one of {PARSER_BACKENDS})")
+
+    if backend == "lexbor":
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError as e:
+            raise ImportError("The lexbor parser backend requires selectolax: pip install selectolax") from e
+        if isinstance(content, bytes):
+            # Honour the declared charset (mobile.bg pages may be windows-1251)
+            content = UnicodeDammit(content, is_html=True).unicode_markup or ""
+        return LexborTree(LexborHTMLParser(content))
+
+    return SoupTree(BeautifulSoup(content, backend), backend)
+
+
+def as_tree(document: Union[HtmlTree, Tag, bytes, str], backend: Optional[str] = None) -> HtmlTree:
+    """Wrap an already parsed BeautifulSoup node, or parse raw HTML."""
+    if isinstance(document, HtmlTree):
+        return document
+    if isinstance(document, Tag):
+        return SoupTree(document)
+    return parse_html(document, backend)
@@ -0,0 +1,151 @@
+"""Disk-backed HTTP response cache for scraper fetches.
+
+Responses are stored as a JSON metadata file (validators, fetch time, body
+digest) next to the raw body, keyed by the SHA-256 of the requested URL::
+
+    <cache dir>/<key[:2]>/<key>.json
+    <cache dir>/<key[:2]>/<key>.body
+    <cache dir>/<key[:2]>/<key>.<name>.parsed.json
+
+A cached entry younger than its host's freshness window is served without a
+request. An older one is revalidated with ``If-None-Match`` /
+``If-Modified-Since``. On ``304 Not Modified`` the stored body is reused, and
+so are any parsed results a scraper stored for it (``store_parsed`` /
+``load_parsed``), so unchanged pages are neither downloaded nor parsed again.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+
+@dataclass
+class CacheEntry:
+    """Metadata of a cached response."""
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # Body digest - parsed results are only reused for the body they came from
+    digest: str
+    # time.time() of the last download or successful revalidation
+    fetched_at: float
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+def _atomic_write(path: Path, data: bytes):
+    """Write via a temporary file so concurrent readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class HttpCache:
+    """Response cache on disk with per-host freshness windows."""
+
+    def __init__(self, directory: str, fresh_seconds: float = 0):
+        self.directory = Path(directory)
+        # Default freshness window; 0 means always revalidate
+        self.fresh_seconds = fresh_seconds
+        self._host_fresh_seconds: Dict[str, float] = {}
+
+    @classmethod
+    def from_settings(cls) -> Optional["HttpCache"]:
+        """The configured cache, or None when caching is disabled."""
+        if not settings.scraper_http_cache_enabled:
+            return None
+        return cls(settings.scraper_http_cache_dir, settings.scraper_http_cache_fresh_seconds)
+
+    def configure_host(self, host: str, fresh_seconds: float):
+        """Serve cached responses of a host without revalidation for ``fresh_seconds``."""
+        self._host_fresh_seconds[host] = fresh_seconds
+
+    def fresh_seconds_for(self, host: str) -> float:
+        return self._host_fresh_seconds.get(host, self.fresh_seconds)
+
+    def _path(self, url: str, suffix: str) -> Path:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.directory / key[:2] / f"{key}{suffix}"
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Metadata of the cached response for a URL, if any."""
+        try:
+            data = json.loads(self._path(url, '.json').read_text(encoding='utf-8'))
+            return CacheEntry(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        try:
+            return self._path(url, '.body').read_bytes()
+        except OSError:
+            return None
+
+    def store(self, url: str, status_code: int, headers: Dict[str, str], body: bytes) -> Optional[CacheEntry]:
+        """Cache a downloaded response; returns None if it must not be stored."""
+        if 'no-store' in headers.get('cache-control', '').lower():
+            return None
+
+        entry = CacheEntry(
+            url=url,
+            status_code=status_code,
+            headers=headers,
+            etag=headers.get('etag'),
+            last_modified=headers.get('last-modified'),
+            digest=hashlib.sha256(body).hexdigest(),
+            fetched_at=time.time(),
+        )
+        # Body first: metadata never points at a body that is not there yet
+        _atomic_write(self._path(url, '.body'), body)
+        self._write_entry(entry)
+        return entry
+
+    def revalidated(self, entry: CacheEntry, headers: Dict[str, str]) -> CacheEntry:
+        """Record a ``304 Not Modified``: restart the freshness window, pick up new validators."""
+        entry.fetched_at = time.time()
+        entry.etag = headers.get('etag', entry.etag)
+        entry.last_modified = headers.get('last-modified', entry.last_modified)
+        self._write_entry(entry)
+        return entry
+
+    def _write_entry(self, entry: CacheEntry):
+        _atomic_write(self._path(entry.url, '.json'), json.dumps(asdict(entry)).encode('utf-8'))
+
+    def store_parsed(self, url: str, name: str, digest: str, data: Any):
+        """Store a scraper's parsed results for the body with the given digest."""
+        payload = json.dumps({'digest': digest, 'data': data}, ensure_ascii=False, default=str)
+        _atomic_write(self._path(url, f'.{name}.parsed.json'), payload.encode('utf-8'))
+
+    def load_parsed(self, url: str, name: str, digest: str) -> Optional[Any]:
+        """Parsed results stored for exactly this body, or None."""
+        try:
+            payload = json.loads(self._path(url, f'.{name}.parsed.json').read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if payload.get('digest') != digest:
+            return None
+        return payload.get('data')
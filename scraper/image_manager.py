@@ -1,6 +1,7 @@
 """Advanced image management system with deduplication and cleanup."""
 import os
 import hashlib
+import threading
 import requests
 from pathlib import Path
 from typing import List, Optional, Dict, Any
@@ -28,6 +29,8 @@ class ImageManager:
         # Create metadata file for tracking
         self.metadata_file = self.base_dir / "image_metadata.json"
         self.metadata = self._load_metadata()
+        # Guards the metadata - pipeline image workers share one manager across threads
+        self._lock = threading.RLock()
     
     def _load_metadata(self) -> Dict[str, Any]:
         """Load image metadata for tracking."""
@@ -43,7 +46,7 @@ class ImageManager:
     def _save_metadata(self):
         """Save image metadata."""
         import json
-        with open(self.metadata_file, 'w') as f:
+        with self._lock, open(self.metadata_file, 'w') as f:
             json.dump(self.metadata, f, indent=2)
     
     def _get_image_hash(self, url: str) -> str:
@@ -78,12 +81,13 @@ class ImageManager:
         try:
             # Check if we already have this image
             image_hash = self._get_image_hash(url)
-            if image_hash in self.metadata["images"]:
-                existing_path = self.metadata["images"][image_hash]["local_path"]
-                if os.path.exists(existing_path):
-                    print(f"  ✓ Image already exists: {os.path.basename(existing_path)}")
-                    return existing_path
-                else:
+            with self._lock:
+                existing = self.metadata["images"].get(image_hash)
+                if existing:
+                    existing_path = existing["local_path"]
+                    if os.path.exists(existing_path):
+                        print(f"  ✓ Image already exists: {os.path.basename(existing_path)}")
+                        return existing_path
                     # File was deleted, remove from metadata
                     del self.metadata["images"][image_hash]
             
@@ -107,15 +111,15 @@ class ImageManager:
                     f.write(chunk)
             
             # Update metadata
-            self.metadata["images"][image_hash] = {
-                "url": url,
-                "local_path": str(local_path),
-                "filename": filename,
-                "source_id": source_id,
-                "downloaded_at": str(Path(local_path).stat().st_mtime)
-            }
-            
-            self._save_metadata()
+            with self._lock:
+                self.metadata["images"][image_hash] = {
+                    "url": url,
+                    "local_path": str(local_path),
+                    "filename": filename,
+                    "source_id": source_id,
+                    "downloaded_at": str(Path(local_path).stat().st_mtime)
+                }
+                self._save_metadata()
             print(f"  ✓ Downloaded image: {filename}")
             return str(local_path)
             
@@ -146,23 +150,24 @@ class ImageManager:
                 db.commit()
                 
                 # Update metadata
-                for path in local_image_paths:
-                    image_hash = None
-                    for hash_key, img_data in self.metadata["images"].items():
-                        if img_data["local_path"] == path:
-                            image_hash = hash_key
-                            break
+                with self._lock:
+                    for path in local_image_paths:
+                        image_hash = None
+                        for hash_key, img_data in self.metadata["images"].items():
+                            if img_data["local_path"] == path:
+                                image_hash = hash_key
+                                break
+                        
+                        if image_hash:
+                            if "ad_links" not in self.metadata:
+                                self.metadata["ad_links"] = {}
+                            self.metadata["ad_links"][str(ad_id)] = {
+                                "source_id": ad.source_id,
+                                "image_paths": local_image_paths,
+                                "linked_at": str(Path(path).stat().st_mtime)
+                            }
                     
-                    if image_hash:
-                        if "ad_links" not in self.metadata:
-                            self.metadata["ad_links"] = {}
-                        self.metadata["ad_links"][str(ad_id)] = {
-                            "source_id": ad.source_id,
-                            "image_paths": local_image_paths,
-                            "linked_at": str(Path(path).stat().st_mtime)
-                        }
-                
-                self._save_metadata()
+                    self._save_metadata()
                 print(f"  ✓ Linked {len(local_image_paths)} images to ad {ad_id}")
         except Exception as e:
             print(f"  ✗ Error linking images to ad {ad_id}: {e}")
@@ -1,291 +1,225 @@
 """Intelligent field extraction system that works across different sites and languages."""
 import re
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
-from bs4 import BeautifulSoup, Tag
+from bisect import bisect_right
+from typing import Dict, Hashable, List, Any, Optional, Tuple
+from dataclasses import dataclass, field
+from scraper.html_parser import HtmlTree, as_tree
+from scraper.patterns import load_pattern_pack
+
+# Elements considered as listing containers
+CONTAINER_TAGS = frozenset(['div', 'article', 'section', 'li'])
+# Elements whose text is matched against the field patterns
+MATCHED_TAGS = CONTAINER_TAGS | frozenset(['span', 'p'])
+# Fields that say nothing about what kind of record an element holds
+NON_RECORD_FIELDS = frozenset(['image_urls'])
+
+
+@dataclass
+class NodeAnalysis:
+    """Extraction results for one element, computed once per page by ``analyze_tree``."""
+    # Matches in the element's own text - the text nodes no matched descendant owns (span/div/p/article/section/li only)
+    own_fields: Dict[str, Any]
+    # First match per field among descendant matched elements, in document order
+    child_fields: Dict[str, Any]
+    # Image URLs found in descendants (not the element itself), in document order
+    image_urls: List[str]
+    # What the parent merges: own matches first, then the descendants'
+    subtree_fields: Dict[str, Any] = field(default_factory=dict)
+    subtree_images: Dict[str, None] = field(default_factory=dict)
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        """Combined fields, preferring the more precise child element matches."""
+        results = {**self.own_fields, **self.child_fields}
+        if self.image_urls:
+            results['image_urls'] = self.image_urls
+        return results
 
 
 @dataclass
-class FieldPattern:
-    """Pattern for detecting a specific field type."""
-    name: str
-    patterns: List[str]
-    score: float
-    data_type: str
-    validation_func: Optional[callable] = None
+class PageLayout:
+    """Document order and nesting of a page's elements, for container selection."""
+    # Container elements (CONTAINER_TAGS) in document order
+    containers: List[Any]
+    # Element key -> key of its parent element
+    parents: Dict[Hashable, Hashable]
+    # Element key -> (pre-order index, pre-order index of its last descendant)
+    spans: Dict[Hashable, Tuple[int, int]]
+
+    @classmethod
+    def from_tree(cls, tree: HtmlTree) -> "PageLayout":
+        containers: List[Any] = []
+        parents: Dict[Hashable, Hashable] = {}
+        spans: Dict[Hashable, Tuple[int, int]] = {}
+        index = 0
+        # Entries are (node, parent key) on the way down and (node, None) on the way up
+        stack: List[Tuple[Any, Any]] = [(tree.root, None)]
+        entered: List[int] = []
+        while stack:
+            node, parent = stack.pop()
+            key = tree.key(node)
+            if parent is _EXIT:
+                spans[key] = (entered.pop(), index - 1)
+                continue
+            if parent is not None:
+                parents[key] = parent
+            if tree.tag(node) in CONTAINER_TAGS:
+                containers.append(node)
+            entered.append(index)
+            index += 1
+            stack.append((node, _EXIT))
+            stack.extend((child, key) for child in reversed(list(tree.children(node))) if not isinstance(child, str))
+        return cls(containers, parents, spans)
+
+    def contains(self, ancestor: Hashable, descendant: Hashable) -> bool:
+        start, end = self.spans[ancestor]
+        return start < self.spans[descendant][0] <= end
+
+
+_EXIT = object()
+
+
+def container_signature(tree: HtmlTree, element: Any) -> Tuple[str, str]:
+    """Tag and first class of an element - the cards of one list share it ("item", "item TOP")."""
+    classes = tree.attr(element, 'class') or ''
+    if isinstance(classes, (list, tuple)):
+        classes = ' '.join(classes)
+    tokens = classes.split()
+    return tree.tag(element), tokens[0] if tokens else ''
 
 
 class IntelligentFieldExtractor:
     """Intelligent field extractor that uses pattern matching and scoring."""
     
-    def __init__(self):
-        self.field_patterns = self._initialize_patterns()
-    
-    def _initialize_patterns(self) -> List[FieldPattern]:
-        """Initialize field detection patterns."""
-        return [
-            # Price patterns (multiple currencies and formats)
-            FieldPattern(
-                name="price",
-                patterns=[
-                    r'(\d+(?:[\s,\.]\d+)*)\s*(лв|€|\$|USD|EUR|BGN|лева|евро|долара)',
-                    r'(\d+(?:[\s,\.]\d+)*)\s*(лв|€|\$)',
-                    r'(\d+(?:,\d+)?)\s*(лв|€|\$)',
-                    r'(\d+(?:\.\d+)?)\s*(лв|€|\$)',
-                ],
-                score=0.9,
-                data_type="float",
-                validation_func=lambda x: 1000 <= x <= 1000000
-            ),
-            
-            # Year patterns
-            FieldPattern(
-                name="year",
-                patterns=[
-                    r'(20\d{2})',
-                    r'(19\d{2})',
-                    r'(\d{4})\s*г\.',
-                    r'(\d{4})\s*год',
-                ],
-                score=0.95,
-                data_type="int",
-                validation_func=lambda x: 1990 <= x <= 2030
-            ),
-            
-            # Mileage patterns (multiple languages)
-            FieldPattern(
-                name="mileage",
-                patterns=[
-                    r'(\d+(?:[\s,\.]\d+)*)\s*км',
-                    r'(\d+(?:[\s,\.]\d+)*)\s*mile',
-                    r'(\d+(?:[\s,\.]\d+)*)\s*km',
-                    r'(\d+(?:,\d+)?)\s*км',
-                    r'(\d+(?:\.\d+)?)\s*км',
-                ],
-                score=0.9,
-                data_type="int",
-                validation_func=lambda x: 0 <= x <= 1000000
-            ),
-            
-            # Engine power patterns
-            FieldPattern(
-                name="engine_power",
-                patterns=[
-                    r'(\d+)\s*к\.с\.',
-                    r'(\d+)\s*hp',
-                    r'(\d+)\s*PS',
-                    r'(\d+)\s*horsepower',
-                    r'(\d+)\s*к\.с',
-                ],
-                score=0.85,
-                data_type="int",
-                validation_func=lambda x: 50 <= x <= 2000
-            ),
-            
-            # Engine displacement patterns
-            FieldPattern(
-                name="engine_displacement",
-                patterns=[
-                    r'(\d+)\s*куб\.см',
-                    r'(\d+(?:\.\d+)?)\s*L',
-                    r'(\d+(?:\.\d+)?)\s*л',
-                    r'(\d+(?:\.\d+)?)\s*liter',
-                ],
-                score=0.8,
-                data_type="float",
-                validation_func=lambda x: 0.5 <= x <= 10.0
-            ),
-            
-            # Fuel type patterns
-            FieldPattern(
-                name="fuel_type",
-                patterns=[
-                    r'(Бензинов|Дизел|Хибрид|Електрически)',
-                    r'(Gasoline|Diesel|Hybrid|Electric)',
-                    r'(Benzin|Diesel|Hybrid|Elektro)',
-                    r'(Essence|Diesel|Hybride|Électrique)',
-                ],
-                score=0.7,
-                data_type="string",
-                validation_func=None
-            ),
-            
-            # Transmission patterns
-            FieldPattern(
-                name="transmission",
-                patterns=[
-                    r'(Автоматична|Ръчна)',
-                    r'(Automatic|Manual)',
-                    r'(Automatik|Schaltgetriebe)',
-                    r'(Automatique|Manuelle)',
-                ],
-                score=0.7,
-                data_type="string",
-                validation_func=None
-            ),
-            
-            # Body type patterns
-            FieldPattern(
-                name="body_type",
-                patterns=[
-                    r'(Седан|Купе|Кабрио|Хечбек|СУВ|Пикап)',
-                    r'(Sedan|Coupe|Convertible|Hatchback|SUV|Pickup)',
-                    r'(Limousine|Coupé|Cabrio|Kombi|SUV)',
-                ],
-                score=0.6,
-                data_type="string",
-                validation_func=None
-            ),
-            
-            # Color patterns
-            FieldPattern(
-                name="color",
-                patterns=[
-                    r'(Черен|Бял|Син|Червен|Сребърен|Сив|Зелен|Жълт)',
-                    r'(Black|White|Blue|Red|Silver|Gray|Green|Yellow)',
-                    r'(Schwarz|Weiß|Blau|Rot|Silber|Grau|Grün|Gelb)',
-                    r'(Noir|Blanc|Bleu|Rouge|Argent|Gris|Vert|Jaune)',
-                ],
-                score=0.5,
-                data_type="string",
-                validation_func=None
-            ),
-            
-            # Location patterns
-            FieldPattern(
-                name="location",
-                patterns=[
-                    r'гр\.\s*([^,\n]+)',
-                    r'(София|Пловдив|Варна|Бургас|Русе|Стара Загора|Плевен)',
-                    r'(Sofia|Plovdiv|Varna|Burgas|Ruse)',
-                ],
-                score=0.6,
-                data_type="string",
-                validation_func=None
-            ),
-        ]
+    def __init__(self, pattern_pack: str = "default"):
+        # Field patterns are data (scraper/patterns/*.json), compiled once per process
+        self.pattern_pack = load_pattern_pack(pattern_pack)
+        self.field_patterns = self.pattern_pack.fields
     
     def extract_fields_from_text(self, text: str) -> Dict[str, Any]:
         """Extract fields from text using intelligent pattern matching."""
-        results = {}
+        return self.pattern_pack.extract(text)
+    
+    def extract_from_html_element(self, element: Any, tree: Optional[HtmlTree] = None) -> Dict[str, Any]:
+        """Extract fields from an HTML element (a BeautifulSoup tag or a node of ``tree``)."""
+        tree = tree or as_tree(element)
+        analysis = self.analyze_tree(element, tree)[tree.key(element)]
+        if tree.tag(element) not in MATCHED_TAGS:
+            # analyze_tree only matches container-like tags; match any other root directly
+            analysis.own_fields = self.extract_fields_from_text(tree.text(element))
+        return analysis.fields
+    
+    def analyze_tree(self, root: Any, tree: Optional[HtmlTree] = None) -> Dict[Hashable, NodeAnalysis]:
+        """Analyze every element under ``root`` in one bottom-up pass.
         
-        for pattern in self.field_patterns:
-            best_match = None
-            best_score = 0
+        Each text node is matched once, as part of the own text of its nearest
+        span/div/p/article/section/li ancestor; parents merge their children's
+        results instead of re-reading and re-matching the subtree, so both the
+        text and the regex work are linear in the size of the page. Returns
+        analyses keyed by ``tree.key(element)`` (``id(element)`` for
+        BeautifulSoup trees).
+        """
+        tree = tree or as_tree(root)
+        # Text nodes not yet claimed by a matched element, in document order
+        strings: List[str] = []
+        analyses: Dict[Hashable, NodeAnalysis] = {}
+        text_starts: List[int] = []
+        
+        # Iterative post-order traversal - result pages are too deep for comfortable recursion.
+        # Entries are (node, None) on the way down and (node, children) on the way up.
+        stack: List[Tuple[Any, Optional[List[Any]]]] = [(root, None)]
+        while stack:
+            node, children = stack.pop()
             
-            for regex in pattern.patterns:
-                matches = re.finditer(regex, text, re.IGNORECASE)
-                for match in matches:
-                    try:
-                        # Extract and convert value
-                        value = self._extract_value(match, pattern.data_type)
-                        
-                        # Validate if validation function exists
-                        if pattern.validation_func and not pattern.validation_func(value):
-                            continue
-                        
-                        # Score this match
-                        score = pattern.score
-                        
-                        # Bonus for longer matches (more specific)
-                        score += len(match.group(0)) * 0.01
-                        
-                        if score > best_score:
-                            best_match = {
-                                'value': value,
-                                'raw_match': match.group(0),
-                                'score': score
-                            }
-                            best_score = score
-                    
-                    except (ValueError, IndexError):
-                        continue
+            if isinstance(node, str):
+                text = node.strip()
+                if text:
+                    strings.append(text)
+                continue
             
-            if best_match:
-                results[pattern.name] = best_match['value']
+            if children is None:
+                children = list(tree.children(node))
+                text_starts.append(len(strings))
+                stack.append((node, children))
+                stack.extend((child, None) for child in reversed(children))
+                continue
+            
+            start = text_starts.pop()
+            name = tree.tag(node)
+            text = ''
+            if name in MATCHED_TAGS:
+                # A matched element owns its text nodes, including those of inline
+                # (a, strong, td, ...) descendants, minus the ones its matched descendants took
+                text = ''.join(strings[start:])
+                del strings[start:]
+            analyses[tree.key(node)] = self._analyze_node(tree, node, name, children, text, analyses)
         
-        return results
-    
-    def _extract_value(self, match, data_type: str) -> Any:
-        """Extract and convert value from regex match."""
-        if data_type == "float":
-            # Try to extract numeric value from first group
-            value_str = match.group(1).replace(' ', '').replace(',', '')
-            return float(value_str)
-        elif data_type == "int":
-            # Try to extract numeric value from first group
-            value_str = match.group(1).replace(' ', '').replace(',', '')
-            return int(value_str)
-        else:  # string
-            return match.group(0).strip()
+        return analyses
     
-    def extract_from_html_element(self, element: Tag) -> Dict[str, Any]:
-        """Extract fields from an HTML element."""
-        # Get all text content
-        text_content = element.get_text(strip=True)
-        
-        # Also check individual child elements for more precise extraction
-        child_results = {}
-        for child in element.find_all(['span', 'div', 'p']):
-            child_text = child.get_text(strip=True)
-            if child_text:
-                child_fields = self.extract_fields_from_text(child_text)
-                for field, value in child_fields.items():
-                    if field not in child_results:
-                        child_results[field] = value
-        
-        # Extract images from this element
-        image_urls = self._extract_images_from_element(element)
-        if image_urls:
-            child_results['image_urls'] = image_urls
+    def _analyze_node(
+        self,
+        tree: HtmlTree,
+        node: Any,
+        name: str,
+        children: List[Any],
+        text: str,
+        analyses: Dict[Hashable, NodeAnalysis],
+    ) -> NodeAnalysis:
+        """Build a node's analysis from its own text and its children's analyses."""
+        own_fields = self.extract_fields_from_text(text) if text else {}
         
-        # Combine results, preferring child element results for precision
-        main_results = self.extract_fields_from_text(text_content)
+        child_fields: Dict[str, Any] = {}
+        images: Dict[str, None] = {}
+        for child in children:
+            if not isinstance(child, str):
+                child_analysis = analyses[tree.key(child)]
+                for field_name, value in child_analysis.subtree_fields.items():
+                    child_fields.setdefault(field_name, value)
+                images.update(child_analysis.subtree_images)
         
-        # Merge results, child results take precedence
-        final_results = {**main_results, **child_results}
+        analysis = NodeAnalysis(
+            own_fields=own_fields,
+            child_fields=child_fields,
+            image_urls=list(images),
+        )
         
-        return final_results
+        analysis.subtree_fields = {**child_fields, **own_fields}
+        analysis.subtree_images = {**dict.fromkeys(self._own_image_urls(tree, node, name)), **images}
+        return analysis
     
-    def _extract_images_from_element(self, element: Tag) -> List[str]:
-        """Extract image URLs from an HTML element."""
+    def _own_image_urls(self, tree: HtmlTree, node: Any, name: str) -> List[str]:
+        """Car image URLs carried by the element itself (img src or background-image)."""
         image_urls = []
         
         # Look for img tags
-        img_tags = element.find_all('img')
-        for img in img_tags:
-            src = img.get('src') or img.get('data-src')
+        if name == 'img':
+            src = tree.attr(node, 'src') or tree.attr(node, 'data-src')
             if src:
-                # Convert relative URLs to absolute
-                if src.startswith('//'):
-                    src = 'https:' + src
-                elif src.startswith('/'):
-                    src = 'https://www.mobile.bg' + src
-                elif not src.startswith('http'):
-                    src = 'https://www.mobile.bg/' + src
-                
+                src = self._absolute_image_url(src)
                 # Filter out non-car images
                 if self._is_car_image(src):
                     image_urls.append(src)
         
         # Look for background images in style attributes
-        elements_with_bg = element.find_all(attrs={'style': True})
-        for elem in elements_with_bg:
-            style = elem.get('style', '')
+        style = tree.attr(node, 'style')
+        if style:
             bg_match = re.search(r'background-image:\s*url\(["\']?([^"\']+)["\']?\)', style)
             if bg_match:
-                src = bg_match.group(1)
-                if src.startswith('//'):
-                    src = 'https:' + src
-                elif src.startswith('/'):
-                    src = 'https://www.mobile.bg' + src
-                elif not src.startswith('http'):
-                    src = 'https://www.mobile.bg/' + src
-                
+                src = self._absolute_image_url(bg_match.group(1))
                 if self._is_car_image(src):
                     image_urls.append(src)
         
-        return list(set(image_urls))  # Remove duplicates
+        return image_urls
+    
+    def _absolute_image_url(self, src: str) -> str:
+        """Convert relative URLs to absolute."""
+        if src.startswith('//'):
+            return 'https:' + src
+        elif src.startswith('/'):
+            return 'https://www.mobile.bg' + src
+        elif not src.startswith('http'):
+            return 'https://www.mobile.bg/' + src
+        return src
     
     def _is_car_image(self, url: str) -> bool:
         """Check if an image URL is likely a car image."""
@@ -317,49 +251,124 @@ class IntelligentFieldExtractor:
         
         return False
     
-    def analyze_page_structure(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
-        """Analyze page structure to find potential car listing containers."""
-        containers = []
+    def analyze_page_structure(self, soup: Any) -> List[Dict[str, Any]]:
+        """Find the listing containers of a page - one per listing, none inside another.
         
-        # Strategy 1: Look for elements with high field density
-        all_elements = soup.find_all(['div', 'article', 'section', 'li'])
+        Candidates are container elements with at least two fields. The cards
+        of a result list are siblings sharing a tag and first class that carry
+        the same kinds of fields (a record group); the parts of one card differ
+        in both. The innermost record groups are returned, so the page body,
+        the result list and other wrappers around the cards never are, and no
+        listing is extracted twice. A page without repeating cards (an ad's own
+        page) falls back to the best-scoring candidates that do not overlap.
         
-        for i, element in enumerate(all_elements):
-            if not element.get_text(strip=True):
-                continue
-                
-            # Extract fields from this element
-            fields = self.extract_from_html_element(element)
+        Accepts a BeautifulSoup document or any parsed ``HtmlTree``.
+        """
+        tree = as_tree(soup)
+        analyses = self.analyze_tree(tree.root, tree)
+        layout = PageLayout.from_tree(tree)
+        
+        candidates = []
+        for i, element in enumerate(layout.containers):
+            # Fields of this element, already computed bottom-up
+            fields = analyses[tree.key(element)].fields
             
             if len(fields) >= 2:  # At least 2 fields found
                 score = sum(len(str(v)) for v in fields.values()) / len(fields)
-                containers.append({
+                candidates.append({
                     'element': element,
                     'fields': fields,
                     'score': score,
                     'page_order': i,  # Preserve original page order
-                    'text_preview': element.get_text(strip=True)[:200]
                 })
         
+        records = self._record_group_members(tree, layout, candidates)
+        if records:
+            # Innermost record groups: drop members that hold members of a nested group
+            starts = sorted(layout.spans[tree.key(c['element'])][0] for c in records)
+            containers = []
+            for candidate in records:
+                start, end = layout.spans[tree.key(candidate['element'])]
+                if bisect_right(starts, end) == bisect_right(starts, start):
+                    containers.append(candidate)
+        else:
+            containers = self._non_overlapping(tree, layout, candidates)
+        
+        # The containers do not overlap, so reading their text is linear too
+        for container in containers:
+            text = tree.text(container['element'])
+            container['text'] = text
+            container['text_preview'] = text[:200]
+        
         # Sort by score (highest first), but preserve page order for same scores
         containers.sort(key=lambda x: (x['score'], -x['page_order']), reverse=True)
         
-        return containers[:20]  # Return top 20 candidates
+        return containers
     
-    def extract_car_listing(self, element: Tag) -> Dict[str, Any]:
-        """Extract a complete car listing from an HTML element."""
+    @staticmethod
+    def _record_group_members(
+        tree: HtmlTree, layout: PageLayout, candidates: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Candidates that repeat as siblings with a shared signature and shared kinds of fields."""
+        groups: Dict[Tuple[Hashable, Tuple[str, str]], List[Dict[str, Any]]] = {}
+        for candidate in candidates:
+            element = candidate['element']
+            parent = layout.parents.get(tree.key(element))
+            groups.setdefault((parent, container_signature(tree, element)), []).append(candidate)
+        
+        members = []
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            shared = set.intersection(*(set(c['fields']) - NON_RECORD_FIELDS for c in group))
+            if shared:
+                members.extend(group)
+        return members
+    
+    @staticmethod
+    def _non_overlapping(
+        tree: HtmlTree, layout: PageLayout, candidates: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Best-scoring candidates, skipping any that contain or sit inside one already taken."""
+        taken: List[Dict[str, Any]] = []
+        for candidate in sorted(candidates, key=lambda x: (x['score'], -x['page_order']), reverse=True):
+            key = tree.key(candidate['element'])
+            if not any(
+                layout.contains(key, tree.key(other['element'])) or layout.contains(tree.key(other['element']), key)
+                for other in taken
+            ):
+                taken.append(candidate)
+        return taken
+    
+    def extract_car_listing(
+        self,
+        element: Any,
+        fields: Optional[Dict[str, Any]] = None,
+        text: Optional[str] = None,
+        tree: Optional[HtmlTree] = None,
+    ) -> Dict[str, Any]:
+        """Extract a complete car listing from an HTML element.
+        
+        ``fields`` and ``text`` can be passed from ``analyze_page_structure`` to
+        avoid extracting the element a second time.
+        """
         # Extract all fields
-        fields = self.extract_from_html_element(element)
+        if fields is None or text is None:
+            tree = tree or as_tree(element)
+        if fields is None:
+            fields = self.extract_from_html_element(element, tree)
+        if text is None:
+            text = tree.text(element)
         
         # Create structured listing
         listing = {
             'source_site': 'unknown',
             'source_id': 'unknown',
             'source_url': 'unknown',
-            'raw_data': {'text_content': element.get_text(strip=True)},
+            'raw_data': {'text_content': text},
             'title': None,
             'price': fields.get('price'),
-            'currency': self._extract_currency(element.get_text()),
+            'currency': self._extract_currency(text),
             'year': fields.get('year'),
             'make': 'BMW',  # Default for this scraper
             'model': 'M5',  # Default for this scraper
@@ -406,8 +415,8 @@ def test_intelligent_extractor():
     results = extractor.extract_fields_from_text(sample_text)
     
     print("=== INTELLIGENT EXTRACTION TEST ===")
-    for field, value in results.items():
-        print(f"{field}: {value}")
+    for name, value in results.items():
+        print(f"{name}: {value}")
     
     return results
 
@@ -1,156 +1,354 @@
 """Main scraper runner."""
+import asyncio
 import json
-import time
-import random
+import math
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Any, List
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
 from sqlalchemy.orm import Session
 
 from config.settings import settings
 from db.database import SessionLocal
-from db.models import CarAdRaw
+from db.instrumentation import track_queries
+from db.market_views import refresh_market_views
+from scraper.deactivation import deactivate_missing_ads
+from scraper.fetcher import AsyncFetcher
+from scraper.frontier import IN_PROGRESS, PENDING, Frontier, FrontierTask, default_worker_id, open_frontier
+from scraper.incremental import KnownAdsCutoff, is_incremental
+from scraper.pagination import Paginator, with_query_params
+from scraper.pipeline import PipelineStats, ScrapePipeline
+from scraper.registry import SitePlugin, SiteScraper, get_site
+from scraper.telemetry import FAILED, FINISHED, CrawlTelemetry
+
+
+def load_scrape_config(config_path) -> Dict[str, Any]:
+    """Load a scrape job's configuration from its JSON file."""
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+
+def source_site(site_config: Dict[str, Any]) -> str:
+    """``source_site`` of a site's ads - what its telemetry and deactivation sweep are keyed by."""
+    return site_config.get('source_site', site_config.get('name'))
+
+
+def site_url(site_config: Dict[str, Any]) -> str:
+    """Search URL of a site - sorted newest-first for incremental crawls."""
+    base_url = site_config.get('base_url')
+    if is_incremental(site_config):
+        return with_query_params(base_url, site_config['incremental'].get('sort_params', {}))
+    return base_url
+
+
+def configure_site(fetcher: AsyncFetcher, site_config: Dict[str, Any], plugin: SitePlugin, host_share: int = 1):
+    """Apply a site's politeness and cache settings to a fetcher.
+    
+    ``host_share`` splits the host's budget between that many processes
+    crawling it at once (scraper workers): each gets 1/N of the rates and
+    burst, and of the concurrency, but never less than one request at a time.
+    """
+    base_url = site_config.get('base_url')
+    if not base_url:
+        return
+    host = urlparse(base_url).netloc
+    
+    # Plugin defaults, overridden by the config's {"rate_per_second", "burst", "max_concurrency",
+    # "max_rate_per_second"} - the adaptive rate starts at rate_per_second and may grow to the max
+    host_limits = plugin.host_limits(site_config)
+    if host_limits and host_share > 1:
+        host_limits = {
+            key: value / host_share if key.endswith('per_second') else max(math.ceil(value / host_share), 1)
+            for key, value in host_limits.items()
+        }
+    if host_limits:
+        fetcher.configure_host(host, **host_limits)
+    
+    # Per-site cache freshness: {"fresh_seconds"} - cached pages younger than this are not re-requested
+    http_cache = site_config.get('http_cache')
+    if http_cache and fetcher.cache:
+        fetcher.cache.configure_host(host, **http_cache)
+
+
+@asynccontextmanager
+async def lease_heartbeat(frontier: Frontier, worker_id: str):
+    """Renew the leases of the tasks ``worker_id`` holds while the block runs, so live work is never re-claimed."""
+    async def renew():
+        while True:
+            await asyncio.sleep(settings.scraper_worker_heartbeat_seconds)
+            try:
+                await asyncio.to_thread(frontier.renew_leases, worker_id)
+            except Exception as e:
+                print(f"  ⚠️  Lease heartbeat failed: {e}")
+    
+    heartbeat = asyncio.create_task(renew())
+    try:
+        yield
+    finally:
+        heartbeat.cancel()
+        await asyncio.gather(heartbeat, return_exceptions=True)
+
+
+async def crawl_frontier_task(
+    frontier: Frontier,
+    task: FrontierTask,
+    worker_id: str,
+    site_config: Dict[str, Any],
+    scraper: SiteScraper,
+    pipeline: ScrapePipeline,
+    cutoff: Optional[KnownAdsCutoff] = None,
+):
+    """Scrape one results page, queue the pages it links to and hand its ads to the pipeline.
+    
+    The task is completed once the pipeline has committed the page's ads -
+    unless ``worker_id`` lost its lease meanwhile, then the task is left to
+    the worker that claimed it since. Incremental sites (with a ``cutoff``) only queue the next page, and only
+    while the cutoff's run of known ads has not been reached.
+    """
+    page = await scraper.scrape_page(task.url)
+    if page is None:
+        await asyncio.to_thread(frontier.fail, task, "Request failed", worker_id)
+        return
+    listings, links = page
+    
+    if listings:
+        # An empty page is past the last result - don't follow its pagination
+        paginator = Paginator(site_url(site_config), site_config.get('pagination'))
+        last_page = paginator.last_page(links)
+        if cutoff is None:
+            page_urls = [url for _, url in paginator.remaining_pages(last_page)]
+        elif await cutoff.reached(listings):
+            # Checked before saving - the page's own new ads must not count as known
+            print(f"Reached {cutoff.consecutive_known} consecutive known ads - stopping {task.site}")
+            page_urls = []
+        else:
+            next_page = (paginator.page_number(task.url) or paginator.start) + 1
+            page_urls = [paginator.page_url(next_page)] if next_page <= last_page else []
+        await asyncio.to_thread(frontier.add, task.crawl, task.site, page_urls, task.crawl_run_id)
+    
+    async def saved(ok: bool):
+        # Done only once the ads are committed: a crash in between re-scrapes the page instead of losing it
+        if ok:
+            held = await asyncio.to_thread(frontier.complete, [task.id], worker_id)
+        else:
+            held = await asyncio.to_thread(frontier.fail, task, "Saving ads failed", worker_id)
+        if not held:
+            print(f"  ⚠️  Lease on {task.url} was lost - left to the worker that holds it now")
+    
+    await pipeline.put(listings, on_saved=saved)
 
 
 class ScraperRunner:
     """Main scraper class for running configured scrape jobs."""
     
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, frontier: Optional[Frontier] = None):
         """Initialize scraper with configuration."""
         self.config_path = Path(config_path)
-        self.config = self._load_config()
+        self.config = load_scrape_config(self.config_path)
         self.db: Session = SessionLocal()
+        # Every ad seen by this run is stamped with the id; unseen ones are swept afterwards
+        self.crawl_run_id = uuid.uuid4().hex
+        self.scraped_sites: List[Dict[str, Any]] = []
+        # Per-site counters of this run, saved to scrape_runs when the crawl ends
+        self.telemetry: Optional[CrawlTelemetry] = None
+        # Crawl state lives in the frontier (when one is configured), so interrupted runs resume
+        self.frontier = frontier if frontier is not None else open_frontier()
+        # Owner of this run's frontier leases
+        self.worker_id = default_worker_id()
     
-    def _load_config(self) -> Dict[str, Any]:
-        """Load scraper configuration from JSON file."""
-        with open(self.config_path, 'r') as f:
-            return json.load(f)
-    
-    def _get_delay(self) -> float:
-        """Get random delay between requests."""
-        return random.uniform(
-            settings.scraper_delay_min,
-            settings.scraper_delay_max
-        )
-    
-    def scrape(self) -> List[Dict[str, Any]]:
+    def scrape(self) -> PipelineStats:
         """Run the scraper based on configuration."""
+        return asyncio.run(self.scrape_async())
+    
+    async def scrape_async(self) -> PipelineStats:
+        """Scrape all configured sites at once through one shared, rate-limited fetcher.
+        
+        Politeness budgets are per host, so sites on different hosts never slow
+        each other down. Ads stream into the database (and their images into the
+        image store) while the crawl is still running - see ``ScrapePipeline``.
+        """
         print(f"Starting scrape job: {self.config.get('name')}")
         print(f"Target: {self.config.get('make')} {self.config.get('model')}")
         print(f"Year range: {self.config.get('year_from')} - {self.config.get('year_to', 'present')}")
         
-        # TODO: Implement actual scraping logic
-        # This is a placeholder structure
-        scraped_ads = []
-        
+        sites = []
         for site_config in self.config.get('sites', []):
-            print(f"\nScraping {site_config['name']}...")
-            site_ads = self._scrape_site(site_config)
-            scraped_ads.extend(site_ads)
+            plugin = get_site(site_config['name'])
+            if plugin is None:
+                print(f"  ⚠️  No scraper implemented for site: {site_config['name']}")
+                continue
+            sites.append((site_config, plugin))
+        
+        async with AsyncFetcher() as fetcher:
+            for site_config, plugin in sites:
+                configure_site(fetcher, site_config, plugin)
+                self.scraped_sites.append(site_config)
+            
+            if self.frontier:
+                crawl = self.config.get('name')
+                run_id = await asyncio.to_thread(self.frontier.unfinished_run, crawl)
+                if run_id:
+                    print(f"\nResuming interrupted crawl run {run_id}")
+                    self.crawl_run_id = run_id
             
-            # Delay between sites
-            time.sleep(self._get_delay())
+            self.telemetry = CrawlTelemetry(self.crawl_run_id, self.config.get('name'))
+            status = FAILED
+            try:
+                async with ScrapePipeline(self.crawl_run_id, telemetry=self.telemetry) as pipeline:
+                    if self.frontier:
+                        await self._crawl_frontier(sites, fetcher, pipeline)
+                    else:
+                        await asyncio.gather(*(
+                            self._scrape_site(site_config, plugin, fetcher, pipeline) for site_config, plugin in sites
+                        ))
+                status = FINISHED
+            finally:
+                await self._save_telemetry(status)
         
-        print(f"\nTotal ads scraped: {len(scraped_ads)}")
-        return scraped_ads
+        stats = pipeline.stats
+        print(f"\nTotal ads scraped: {stats.scraped}")
+        print(f"Saved {stats.inserted} new ads to database ({stats.seen} already known, "
+              f"{stats.failed} failed, {stats.images} images downloaded)")
+        return stats
     
-    def _scrape_site(self, site_config: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Scrape a specific site."""
-        site_name = site_config.get('name', 'unknown')
-        base_url = site_config.get('base_url')
+    async def _save_telemetry(self, status: str):
+        """Print the run's per-site telemetry and store it in scrape_runs."""
+        for site_stats in self.telemetry.sites.values():
+            print(f"Telemetry {site_stats.summary()}")
+        try:
+            await asyncio.to_thread(self.telemetry.save, status)
+        except Exception as e:
+            # Telemetry must never fail the crawl it describes
+            print(f"  ⚠️  Could not save scrape run telemetry: {e}")
+    
+    async def _crawl_frontier(
+        self, sites: List[Tuple[Dict[str, Any], SitePlugin]], fetcher: AsyncFetcher, pipeline: ScrapePipeline
+    ):
+        """Crawl the configured sites page by page through the persistent frontier.
         
-        print(f"  URL: {base_url}")
-        print(f"  Method: {site_config.get('method', 'GET')}")
+        Each results page is a frontier task. A task is only marked done once
+        the pipeline has committed the page's ads, so a crawl that is
+        interrupted (crash, ban, deploy) resumes - with the same crawl run id -
+        from the pages it had not finished. The leases of the claimed tasks are
+        renewed for as long as the crawl runs, so pages that wait on a slow host
+        or a batch commit are not handed to another worker.
+        """
+        crawl = self.config.get('name')
+        for site_config, _ in sites:
+            await asyncio.to_thread(
+                self.frontier.add, crawl, site_config['name'], [site_url(site_config)], self.crawl_run_id
+            )
         
-        # Import and use site-specific scrapers
-        if site_name == 'mobile_bg':
-            from scraper.sites.mobile_bg import scrape_mobile_bg_bmw_m5
-            return scrape_mobile_bg_bmw_m5(base_url)
-        else:
-            print(f"  ⚠️  No scraper implemented for site: {site_name}")
-            return []
+        async with lease_heartbeat(self.frontier, self.worker_id):
+            await asyncio.gather(*(
+                self._crawl_frontier_site(crawl, site_config, plugin, fetcher, pipeline)
+                for site_config, plugin in sites
+            ))
+        print(f"\nFrontier: {await asyncio.to_thread(self.frontier.counts, crawl)}")
     
-    def save_to_db(self, ads: List[Dict[str, Any]]) -> int:
-        """Save scraped ads to database."""
-        saved_count = 0
-        
-        for ad_data in ads:
-            try:
-                # Check if ad already exists
-                existing = self.db.query(CarAdRaw).filter(
-                    CarAdRaw.source_site == ad_data['source_site'],
-                    CarAdRaw.source_id == ad_data['source_id']
-                ).first()
-                
-                if existing:
-                    print(f"Ad already exists: {ad_data['source_id']}")
-                    continue
-                
-                # Download images if available
-                downloaded_images = []
-                if ad_data.get('image_urls'):
-                    from scraper.image_manager import download_and_link_images
-                    # We'll link images after saving the ad
-                
-                # Create new ad record
-                car_ad = CarAdRaw(
-                    source_site=ad_data['source_site'],
-                    source_id=ad_data['source_id'],
-                    source_url=ad_data['source_url'],
-                    raw_data=ad_data.get('raw_data', {}),
-                    title=ad_data.get('title'),
-                    price=ad_data.get('price'),
-                    currency=ad_data.get('currency'),
-                    year=ad_data.get('year'),
-                    make=ad_data.get('make'),
-                    model=ad_data.get('model'),
-                    mileage=ad_data.get('mileage'),
-                    location=ad_data.get('location'),
-                    dealer_name=ad_data.get('dealer_name'),
-                    dealer_type=ad_data.get('dealer_type'),
-                    fuel_type=ad_data.get('fuel_type'),
-                    transmission=ad_data.get('transmission'),
-                    body_type=ad_data.get('body_type'),
-                    color=ad_data.get('color'),
-                    engine_power=ad_data.get('engine_power'),
-                    engine_displacement=ad_data.get('engine_displacement'),
-                    image_urls=ad_data.get('image_urls', []),
-                    scraped_at=datetime.utcnow(),
-                )
-                
-                self.db.add(car_ad)
-                self.db.commit()
-                
-                # Download and link images after saving the ad
-                if ad_data.get('image_urls'):
-                    from scraper.image_manager import download_and_link_images
-                    downloaded_images = download_and_link_images(
-                        ad_data['image_urls'], 
-                        ad_data['source_id'], 
-                        car_ad.id, 
-                        self.db, 
-                        max_images=1
+    async def _crawl_frontier_site(
+        self,
+        crawl: str,
+        site_config: Dict[str, Any],
+        plugin: SitePlugin,
+        fetcher: AsyncFetcher,
+        pipeline: ScrapePipeline,
+    ):
+        """Claim and scrape one site's frontier tasks until none are left."""
+        site = site_config['name']
+        scraper = plugin.create(fetcher, site_config)
+        cutoff = KnownAdsCutoff.from_site_config(site_config)
+        try:
+            with self.telemetry.site(source_site(site_config)):
+                while True:
+                    tasks = await asyncio.to_thread(
+                        self.frontier.claim, crawl, settings.scraper_frontier_batch_size,
+                        worker_id=self.worker_id, site=site,
                     )
-                
-                saved_count += 1
-                
-            except Exception as e:
-                print(f"Error saving ad {ad_data.get('source_id')}: {e}")
-                self.db.rollback()
+                    if not tasks:
+                        # Our own pages may only be waiting for their batch to be committed
+                        await pipeline.flush()
+                        counts = await asyncio.to_thread(self.frontier.counts, crawl, site)
+                        if not counts.get(PENDING) and not counts.get(IN_PROGRESS):
+                            break
+                        # Other workers hold the remaining tasks, or failed ones are backing off
+                        await asyncio.sleep(settings.scraper_frontier_poll_seconds)
+                        continue
+                    
+                    await asyncio.gather(*(
+                        crawl_frontier_task(self.frontier, task, self.worker_id, site_config, scraper, pipeline, cutoff)
+                        for task in tasks
+                    ))
+        finally:
+            await scraper.close()
+    
+    async def _scrape_site(
+        self, site_config: Dict[str, Any], plugin: SitePlugin, fetcher: AsyncFetcher, pipeline: ScrapePipeline
+    ):
+        """Scrape a specific site, streaming its listings into the pipeline."""
+        base_url = site_url(site_config)
+        print(f"\nScraping {site_config['name']}: {base_url}")
         
-        print(f"Saved {saved_count} new ads to database")
-        return saved_count
+        scraper = plugin.create(fetcher, site_config)
+        cutoff = KnownAdsCutoff.from_site_config(site_config)
+        try:
+            with self.telemetry.site(source_site(site_config)):
+                async for listing in scraper.iter_listings(base_url, site_config.get('pagination'), cutoff):
+                    await pipeline.put([listing])
+        finally:
+            await scraper.close()
+    
+    def sweep_inactive_ads(self) -> int:
+        """Deactivate ads of the scraped sites that this run did not see."""
+        total_deactivated = 0
+        
+        for site_config in self.scraped_sites:
+            thresholds = site_config.get('deactivation', {})
+            if thresholds.get('enabled') is False:
+                continue
+            if is_incremental(site_config):
+                # The crawl stopped at the first known ads - everything older went unseen
+                print(f"Deactivation sweep skipped for {source_site(site_config)}: incremental crawl")
+                continue
+            
+            result = deactivate_missing_ads(
+                self.db,
+                source_site=source_site(site_config),
+                crawl_run_id=self.crawl_run_id,
+                min_seen=thresholds.get('min_seen'),
+                min_seen_ratio=thresholds.get('min_seen_ratio'),
+            )
+            if result.aborted:
+                print(f"Deactivation sweep skipped for {result.source_site}: {result.aborted_reason}")
+            else:
+                print(f"Deactivated {result.deactivated} ads no longer listed on {result.source_site}")
+                total_deactivated += result.deactivated
+        
+        return total_deactivated
+    
+    def refresh_market_views(self):
+        """Recompute the market aggregates from the ads this crawl saved and deactivated."""
+        if not settings.market_views_refresh_after_crawl:
+            return
+        try:
+            timings = refresh_market_views(self.db, concurrently=True)
+        except Exception as e:
+            # Stale aggregates must not fail the crawl that was just saved
+            self.db.rollback()
+            print(f"  ⚠️  Could not refresh market views: {e}")
+            return
+        print(f"Refreshed {len(timings)} market views in {sum(timings.values()):.2f}s")
     
     def close(self):
         """Close database connection."""
         self.db.close()
+        if self.frontier:
+            self.frontier.close()
 
 
-def main():
-    """Main entry point for scraper."""
-    # Example usage
-    config_file = "scraper/configs/bmw_m5_2019plus.json"
-    
+def main(config_file: str = "scraper/configs/bmw_m5_2019plus.json"):
+    """Main entry point for scraper: crawl one configured job, then sweep ads it no longer saw."""
     if not Path(config_file).exists():
         print(f"Config file not found: {config_file}")
         print("Please create a scraper configuration file first.")
@@ -158,8 +356,11 @@ def main():
     
     scraper = ScraperRunner(config_file)
     try:
-        ads = scraper.scrape()
-        scraper.save_to_db(ads)
+        with track_queries(f"scrape:{scraper.config.get('name')}"):
+            # Every ad is saved by the time the crawl returns, so the sweep sees the whole run
+            scraper.scrape()
+            scraper.sweep_inactive_ads()
+            scraper.refresh_market_views()
     finally:
         scraper.close()
 
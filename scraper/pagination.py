@@ -0,0 +1,101 @@
+"""Pagination of search result pages, driven by the ``pagination`` block of a scrape config.
+
+Two URL schemes are supported::
+
+    {"type": "page_number", "param_name": "page", "start": 1}   ->  ...?page=2
+    {"type": "path", "path_format": "p-{page}", "start": 1}     ->  .../p-2
+
+The page count is read from the pagination links of the first page; the
+remaining pages are then known up front and can be fetched concurrently.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse, urlunparse
+
+DEFAULT_MAX_PAGES = 5
+
+
+def with_query_params(url: str, params: Dict[str, Any]) -> str:
+    """URL with the given query parameters set (e.g. a site's sort order)."""
+    if not params:
+        return url
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    query.update({key: [str(value)] for key, value in params.items()})
+    return urlunparse(parsed._replace(query=urlencode(query, doseq=True)))
+
+
+class Paginator:
+    """Builds page URLs and evaluates the stop conditions of one paginated search."""
+
+    def __init__(self, base_url: str, pagination: Optional[Dict[str, Any]] = None):
+        pagination = pagination or {}
+        self.base_url = base_url
+        self.type = pagination.get('type', 'page_number')
+        self.param_name = pagination.get('param_name', 'page')
+        self.path_format = pagination.get('path_format', 'p-{page}')
+        self.start = pagination.get('start', 1)
+        self.max_pages = pagination.get('max_pages', DEFAULT_MAX_PAGES)
+        # Stop conditions
+        self.stop_on_empty_page = pagination.get('stop_on_empty_page', True)
+        self.max_listings = pagination.get('max_listings')
+
+        self._base = urlparse(base_url)
+        self._base_path = self._base.path.rstrip('/')
+        self._path_re = re.compile(
+            re.escape(self.path_format).replace(re.escape('{page}'), r'(\d+)') + r'/?$'
+        )
+
+    def page_url(self, page: int) -> str:
+        """URL of the given page number (the first page is the configured base URL)."""
+        if page == self.start:
+            return self.base_url
+
+        if self.type == 'path':
+            path = f"{self._base_path}/{self.path_format.format(page=page)}"
+            return urlunparse(self._base._replace(path=path))
+
+        query = parse_qs(self._base.query)
+        query[self.param_name] = [str(page)]
+        return urlunparse(self._base._replace(query=urlencode(query, doseq=True)))
+
+    def page_number(self, href: str) -> Optional[int]:
+        """Page number a link points to, or None if it is not a page of this search."""
+        parsed = urlparse(urljoin(self.base_url, href))
+        if parsed.netloc != self._base.netloc:
+            return None
+
+        if self.type == 'path':
+            path = parsed.path.rstrip('/')
+            match = self._path_re.search(path)
+            if not match or path[:match.start()].rstrip('/') != self._base_path:
+                return None
+            return int(match.group(1))
+
+        if parsed.path.rstrip('/') != self._base_path:
+            return None
+        values = parse_qs(parsed.query).get(self.param_name)
+        if not values or not values[0].isdigit():
+            return None
+        return int(values[0])
+
+    def last_page(self, hrefs: Iterable[str]) -> int:
+        """Highest page number among the links of a results page, capped at ``max_pages``."""
+        pages = [self.start]
+        for href in hrefs:
+            page = self.page_number(href)
+            if page is not None:
+                pages.append(page)
+
+        last = max(pages)
+        if self.max_pages:
+            last = min(last, self.start + self.max_pages - 1)
+        return last
+
+    def remaining_pages(self, last_page: int) -> List[Tuple[int, str]]:
+        """(page, url) pairs after the first page, up to ``last_page``."""
+        return [(page, self.page_url(page)) for page in range(self.start + 1, last_page + 1)]
+
+    def listings_exhausted(self, count: int) -> bool:
+        """True once ``max_listings`` listings have been produced."""
+        return bool(self.max_listings) and count >= self.max_listings
@@ -0,0 +1,187 @@
+"""Declarative field-pattern packs.
+
+A pack is a JSON file in this directory listing, per field, the regexes that
+detect it (most specific first), how to convert a match and which values are
+plausible. A pack may ``extend`` another one and override some of its fields.
+
+Packs are compiled once when first loaded: all regexes of a field are combined
+into a single alternation, each alternative wrapped in a named group
+(``<field>_<n>``), so a text is scanned once per field instead of once per
+pattern, and the winning alternative is known from ``match.lastgroup``.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PACKS_DIR = Path(__file__).resolve().parent
+
+
+@dataclass
+class FieldPattern:
+    """Pattern for detecting a specific field type."""
+    name: str
+    patterns: List[str]
+    score: float
+    data_type: str
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    # Numeric values are divided by this, e.g. 1000 for cc -> litres
+    divisor: Optional[float] = None
+    ignore_case: bool = True
+
+    def is_valid(self, value: Any) -> bool:
+        if self.min_value is not None and value < self.min_value:
+            return False
+        if self.max_value is not None and value > self.max_value:
+            return False
+        return True
+
+
+@dataclass
+class FieldMatch:
+    """A converted, validated match of one field."""
+    value: Any
+    text: str
+    # Index of the pattern (alternative) that matched
+    alternative: int = 0
+    # Capture groups of the alternative that matched
+    groups: Tuple[Optional[str], ...] = field(default_factory=tuple)
+
+
+# Syntax whose meaning changes when lower-cased (\D -> \d, \S -> \s, (?P<name>...)
+_CASE_SENSITIVE_SYNTAX_RE = re.compile(r"\\[A-Z]|\(\?P")
+
+
+class CompiledField:
+    """One field's patterns compiled into a single named-group alternation.
+
+    Case-insensitive fields whose patterns survive lower-casing are matched
+    case-sensitively against the lower-cased text, which is much faster than
+    ``re.IGNORECASE`` on non-ASCII (Cyrillic) vocabularies.
+    """
+
+    def __init__(self, pattern: FieldPattern):
+        self.pattern = pattern
+        alternatives = []
+        lowercase_alternatives = []
+        # alternative group name -> (pattern index, first inner group index, number of inner groups)
+        self.alternatives: Dict[str, Tuple[int, int, int]] = {}
+        group_index = 0
+        for i, regex in enumerate(pattern.patterns):
+            name = f"{pattern.name}_{i}"
+            inner_groups = re.compile(regex).groups
+            alternatives.append(f"(?P<{name}>{regex})")
+            lowercase_alternatives.append(f"(?P<{name}>{regex.lower()})")
+            self.alternatives[name] = (i, group_index + 2, inner_groups)
+            group_index += 1 + inner_groups
+
+        flags = re.IGNORECASE if pattern.ignore_case else 0
+        self.regex = re.compile("|".join(alternatives), flags)
+        self.lowercase = pattern.ignore_case and not any(
+            _CASE_SENSITIVE_SYNTAX_RE.search(regex) for regex in pattern.patterns
+        )
+        if self.lowercase:
+            self.lowercase_regex = re.compile("|".join(lowercase_alternatives))
+
+    def _convert(self, match: re.Match, text: str) -> FieldMatch:
+        # Slice the original text - the match may have run on its lower-cased copy
+        alternative, first_group, group_count = self.alternatives[match.lastgroup]
+        groups = tuple(
+            text[match.start(g):match.end(g)] if match.start(g) >= 0 else None
+            for g in range(first_group, first_group + group_count)
+        )
+        matched = text[match.start():match.end()]
+        data_type = self.pattern.data_type
+
+        if data_type in ("int", "float"):
+            # The first group holds the number
+            value_str = groups[0].replace(' ', '').replace(',', '')
+            value = float(value_str) if data_type == "float" else int(value_str)
+            if self.pattern.divisor:
+                value = value / self.pattern.divisor
+        else:  # string
+            value = matched.strip()
+
+        return FieldMatch(value=value, text=matched, alternative=alternative, groups=groups)
+
+    def matches(self, text: str, lowered: Optional[str] = None) -> Iterator[FieldMatch]:
+        """Valid matches in document order (``lowered`` is ``text.lower()``, if already computed)."""
+        regex, subject = self.regex, text
+        if self.lowercase:
+            lowered = text.lower() if lowered is None else lowered
+            # Lower-casing may change the length of some characters - spans would not line up
+            if len(lowered) == len(text):
+                regex, subject = self.lowercase_regex, lowered
+
+        for match in regex.finditer(subject):
+            try:
+                field_match = self._convert(match, text)
+            except (ValueError, IndexError, AttributeError):
+                continue
+            if self.pattern.is_valid(field_match.value):
+                yield field_match
+
+    def best(self, text: str, lowered: Optional[str] = None) -> Optional[FieldMatch]:
+        """The best valid match: the longest (most specific), then the earliest pattern."""
+        best_match = None
+        best_key = None
+        for field_match in self.matches(text, lowered):
+            key = (len(field_match.text), -field_match.alternative)
+            if best_key is None or key > best_key:
+                best_match = field_match
+                best_key = key
+        return best_match
+
+    def first(self, text: str, lowered: Optional[str] = None) -> Optional[FieldMatch]:
+        """The first valid match in the text."""
+        return next(self.matches(text, lowered), None)
+
+
+class PatternPack:
+    """A named set of compiled field patterns."""
+
+    def __init__(self, name: str, fields: List[FieldPattern]):
+        self.name = name
+        self.fields = fields
+        self.compiled: Dict[str, CompiledField] = {f.name: CompiledField(f) for f in fields}
+
+    def __getitem__(self, field_name: str) -> CompiledField:
+        return self.compiled[field_name]
+
+    def __contains__(self, field_name: str) -> bool:
+        return field_name in self.compiled
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Best value of every field found in the text."""
+        results = {}
+        lowered = text.lower()
+        for name, compiled in self.compiled.items():
+            best = compiled.best(text, lowered)
+            if best is not None:
+                results[name] = best.value
+        return results
+
+    def first(self, field_name: str, text: str, lowered: Optional[str] = None) -> Optional[FieldMatch]:
+        """First valid match of one field, or None."""
+        return self.compiled[field_name].first(text, lowered)
+
+
+@lru_cache(maxsize=None)
+def load_pattern_pack(name: str = "default") -> PatternPack:
+    """Load and compile a pattern pack from ``scraper/patterns/<name>.json`` (cached)."""
+    path = PACKS_DIR / f"{name}.json"
+    if not path.exists():
+        raise ValueError(f"Unknown pattern pack: {name}")
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+
+    fields: Dict[str, FieldPattern] = {}
+    if data.get("extends"):
+        fields = {f.name: f for f in load_pattern_pack(data["extends"]).fields}
+    for spec in data.get("fields", []):
+        fields[spec["name"]] = FieldPattern(**spec)
+
+    return PatternPack(name, list(fields.values()))
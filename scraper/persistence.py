@@ -0,0 +1,99 @@
+"""Batched, set-based writes of scraped ads to ``car_ads_raw``."""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from db.models import CarAdRaw
+
+# Listing keys copied onto new rows
+AD_COLUMNS = (
+    'source_url', 'raw_data', 'title', 'price', 'currency', 'year', 'make', 'model', 'mileage',
+    'location', 'dealer_name', 'dealer_type', 'fuel_type', 'transmission', 'body_type', 'color',
+    'engine_power', 'engine_displacement', 'image_urls',
+)
+
+
+@dataclass
+class UpsertResult:
+    """Outcome of one batch upsert."""
+    inserted: int = 0
+    seen: int = 0
+    # (ad id, listing) of every newly inserted ad - they still need their images
+    new_ads: List[Tuple[int, Dict[str, Any]]] = field(default_factory=list)
+
+
+def _fit(column, value):
+    """Truncate strings to the column width: one oversized title must not fail the batch."""
+    length = getattr(column.type, 'length', None)
+    if length and isinstance(value, str) and len(value) > length:
+        return value[:length]
+    return value
+
+
+def _row(ad: Dict[str, Any], crawl_run_id: str, now: datetime) -> Dict[str, Any]:
+    columns = CarAdRaw.__table__.c
+    row = {
+        'source_site': ad['source_site'],
+        'source_id': ad['source_id'],
+        'scraped_at': now,
+        'last_crawl_run_id': crawl_run_id,
+        'last_seen_at': now,
+    }
+    for name in AD_COLUMNS:
+        row[name] = _fit(columns[name], ad.get(name))
+    row['raw_data'] = row['raw_data'] or {}
+    row['image_urls'] = row['image_urls'] or []
+    return row
+
+
+def upsert_ads(db: Session, ads: List[Dict[str, Any]], crawl_run_id: str) -> UpsertResult:
+    """Insert new ads and stamp the crawl run on known ones in a single statement.
+
+    Known ads keep their stored data, as before; they are only marked seen by
+    the run (and reactivated if they had been swept). Commits on success.
+    """
+    if not ads:
+        return UpsertResult()
+
+    now = datetime.utcnow()
+    # ON CONFLICT cannot touch a row twice - keep the first listing per key
+    listings: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for ad in ads:
+        listings.setdefault((ad['source_site'], ad['source_id']), ad)
+
+    statement = insert(CarAdRaw).values([_row(ad, crawl_run_id, now) for ad in listings.values()])
+    statement = statement.on_conflict_do_update(
+        constraint='uq_car_ads_raw_source',
+        set_={
+            'last_crawl_run_id': statement.excluded.last_crawl_run_id,
+            'last_seen_at': statement.excluded.last_seen_at,
+            'is_active': True,
+            'deactivated_at': None,
+        },
+    ).returning(
+        CarAdRaw.id,
+        CarAdRaw.source_site,
+        CarAdRaw.source_id,
+        # xmax is 0 only on rows this statement inserted (not on ones it updated)
+        (literal_column('xmax') == 0).label('inserted'),
+    )
+
+    try:
+        rows = db.execute(statement).all()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    result = UpsertResult()
+    for ad_id, source_site, source_id, inserted in rows:
+        if inserted:
+            result.inserted += 1
+            result.new_ads.append((ad_id, listings[(source_site, source_id)]))
+        else:
+            result.seen += 1
+    return result
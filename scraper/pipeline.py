@@ -0,0 +1,240 @@
+"""Streaming crawl pipeline: scrape, upsert and image download as concurrent stages.
+
+::
+
+    site scrapers ──pages──▶ [ads queue] ──▶ upsert stage ──new ads──▶ [image queue] ──▶ image workers
+
+Scrapers hand over each page's listings as soon as it is parsed. The upsert
+stage writes them in batches (one ``INSERT ... ON CONFLICT`` per batch), and
+the image workers download pictures of the newly inserted ads. Both queues
+are bounded: when a stage falls behind, the queue in front of it fills up and
+the stage feeding it waits, so memory stays flat and a crawl takes about as
+long as its slowest stage rather than the sum of all three.
+
+With a ``CrawlTelemetry`` attached, rows written and images downloaded are
+counted per site as well.
+"""
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config.settings import settings
+from db.database import SessionLocal
+from scraper.image_manager import ImageManager
+from scraper.persistence import UpsertResult, upsert_ads
+from scraper.telemetry import CrawlTelemetry
+
+# Called once a page's ads are written (True) or failed to be (False)
+SavedCallback = Callable[[bool], Awaitable[None]]
+
+_DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    """Counters of one pipeline run."""
+    scraped: int = 0
+    inserted: int = 0
+    seen: int = 0
+    failed: int = 0
+    images: int = 0
+
+
+class ScrapePipeline:
+    """Bounded-queue pipeline from site scrapers to ``car_ads_raw`` and the image store.
+
+    Use as an async context manager; leaving the block waits until every ad
+    handed to ``put`` is written and its images are downloaded::
+
+        async with ScrapePipeline(crawl_run_id) as pipeline:
+            async for listing in scraper.iter_listings(url):
+                await pipeline.put([listing])
+    """
+
+    def __init__(
+        self,
+        crawl_run_id: str,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        image_workers: Optional[int] = None,
+        images_per_ad: Optional[int] = None,
+        session_factory=SessionLocal,
+        telemetry: Optional[CrawlTelemetry] = None,
+    ):
+        self.crawl_run_id = crawl_run_id
+        self.batch_size = batch_size or settings.scraper_upsert_batch_size
+        # Longest time a scraped ad waits in a partial batch
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.scraper_upsert_flush_seconds
+        self.image_workers = image_workers if image_workers is not None else settings.scraper_image_workers
+        self.images_per_ad = images_per_ad if images_per_ad is not None else settings.scraper_images_per_ad
+        self.session_factory = session_factory
+        self.stats = PipelineStats()
+        self.telemetry = telemetry
+
+        queue_size = queue_size or settings.scraper_pipeline_queue_size
+        self._ads: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._images: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks: List[asyncio.Task] = []
+        self._db = None
+        self._image_manager: Optional[ImageManager] = None
+
+    async def __aenter__(self) -> "ScrapePipeline":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.join()
+        else:
+            await self.cancel()
+
+    def start(self):
+        # The upsert stage writes from a worker thread, so it gets a session of its own
+        self._db = self.session_factory()
+        self._tasks.append(asyncio.create_task(self._upsert_stage()))
+        if self.image_workers > 0 and self.images_per_ad > 0:
+            self._image_manager = ImageManager()
+            self._tasks.extend(asyncio.create_task(self._image_worker()) for _ in range(self.image_workers))
+
+    async def put(self, ads: List[Dict[str, Any]], on_saved: Optional[SavedCallback] = None):
+        """Queue a page's ads for saving; waits while the upsert stage is behind.
+
+        ``on_saved`` runs after the batch holding the page's ads is committed,
+        so callers can acknowledge work (e.g. complete a frontier task) only
+        once its results are durable.
+        """
+        self.stats.scraped += len(ads)
+        await self._ads.put((ads, on_saved))
+
+    async def flush(self):
+        """Write out everything queued so far, without waiting for a full batch."""
+        flushed = asyncio.get_running_loop().create_future()
+        await self._ads.put(flushed)
+        await flushed
+
+    async def join(self):
+        """Drain both stages and release their resources."""
+        await self._ads.put(_DONE)
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            self._close()
+
+    async def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._close()
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+        if self._image_manager is not None:
+            self._image_manager.close()
+
+    async def _upsert_stage(self):
+        batch: List[Dict[str, Any]] = []
+        callbacks: List[SavedCallback] = []
+        deadline = None
+        try:
+            while True:
+                try:
+                    if batch:
+                        item = await asyncio.wait_for(self._ads.get(), max(deadline - time.monotonic(), 0))
+                    else:
+                        item = await self._ads.get()
+                except asyncio.TimeoutError:
+                    await self._flush(batch, callbacks)
+                    batch, callbacks = [], []
+                    continue
+
+                if item is _DONE:
+                    await self._flush(batch, callbacks)
+                    return
+                if isinstance(item, asyncio.Future):
+                    await self._flush(batch, callbacks)
+                    batch, callbacks = [], []
+                    item.set_result(None)
+                    continue
+
+                ads, on_saved = item
+                if not batch:
+                    deadline = time.monotonic() + self.flush_seconds
+                batch.extend(ads)
+                if on_saved is not None:
+                    callbacks.append(on_saved)
+                # An empty page has nothing to wait for - acknowledge it with the current batch
+                if len(batch) >= self.batch_size or not batch:
+                    await self._flush(batch, callbacks)
+                    batch, callbacks = [], []
+        finally:
+            for _ in range(self.image_workers if self._image_manager else 0):
+                await self._images.put(_DONE)
+
+    async def _flush(self, batch: List[Dict[str, Any]], callbacks: List[SavedCallback]):
+        ok = True
+        if batch:
+            try:
+                result = await asyncio.to_thread(upsert_ads, self._db, batch, self.crawl_run_id)
+            except Exception as e:
+                print(f"Error saving {len(batch)} ads: {e}")
+                self.stats.failed += len(batch)
+                if self.telemetry:
+                    for site, count in Counter(ad['source_site'] for ad in batch).items():
+                        self.telemetry.stats_for(site).rows_failed += count
+                ok = False
+            else:
+                self.stats.inserted += result.inserted
+                self.stats.seen += result.seen
+                if self.telemetry:
+                    self._record_saved(batch, result)
+                if self._image_manager:
+                    for ad_id, listing in result.new_ads:
+                        if listing.get('image_urls'):
+                            # Waits while the image workers are behind
+                            await self._images.put((ad_id, listing))
+
+        for on_saved in callbacks:
+            try:
+                await on_saved(ok)
+            except Exception as e:
+                print(f"Error acknowledging saved ads: {e}")
+
+    def _record_saved(self, batch: List[Dict[str, Any]], result: UpsertResult):
+        inserted = Counter(listing['source_site'] for _, listing in result.new_ads)
+        # A batch may hold an ad twice - it was written as one row
+        rows = Counter(site for site, _ in {(ad['source_site'], ad['source_id']) for ad in batch})
+        for site, count in rows.items():
+            stats = self.telemetry.stats_for(site)
+            stats.rows_inserted += inserted[site]
+            stats.rows_seen += count - inserted[site]
+
+    async def _image_worker(self):
+        while True:
+            item = await self._images.get()
+            if item is _DONE:
+                return
+            ad_id, listing = item
+            try:
+                paths = await asyncio.to_thread(self._download_images, ad_id, listing)
+            except Exception as e:
+                print(f"  ✗ Error downloading images for ad {ad_id}: {e}")
+                continue
+            self.stats.images += len(paths)
+            if self.telemetry:
+                self.telemetry.stats_for(listing['source_site']).images_downloaded += len(paths)
+
+    def _download_images(self, ad_id: int, listing: Dict[str, Any]) -> List[str]:
+        paths = self._image_manager.download_images_for_ad(
+            listing['image_urls'], listing['source_id'], self.images_per_ad
+        )
+        if paths:
+            db = self.session_factory()
+            try:
+                self._image_manager.link_images_to_ad(db, ad_id, paths)
+            finally:
+                db.close()
+        return paths
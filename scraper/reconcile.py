@@ -0,0 +1,185 @@
+"""Merge ``car_ads_raw`` rows that are the same ad under different source ids.
+
+Before ids were taken from ad links (see ``scraper.source_ids``), a card's id
+was a hash of its text, so every price change or edited description stored
+the ad again. Rows are grouped as the same ad when
+
+* they resolve to the same stable id - from the ad link in ``source_url`` or
+  an id that already is stable, or
+* they have the same main photo (photos are per ad), unless so many rows
+  share it that it is a placeholder. Only the first image counts: a wrongly
+  detected container spanning several cards carries all of their photos and
+  would otherwise chain unrelated ads together.
+
+Rows with different stable ids are never merged. Each group is folded into its
+most recently seen row: image URLs and downloaded images of all rows are
+united, it keeps the earliest ``scraped_at``, and it takes the stable id.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from db.models import CarAdRaw
+from scraper.source_ids import AD_LINK_PATTERNS, ad_id_from_url, is_ad_id, source_id_prefix, stable_source_id
+
+# An image URL on more rows than this is a placeholder, not a photo of one ad
+MAX_ROWS_PER_IMAGE = 20
+
+
+@dataclass
+class ReconcileResult:
+    """Outcome of reconciling one source site."""
+    source_site: str
+    rows: int = 0
+    groups_merged: int = 0
+    rows_removed: int = 0
+    ids_rewritten: int = 0
+    # Rows whose id is still a content hash after reconciliation
+    unresolved: int = 0
+    merges: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def row_stable_id(source_site: str, source_id: str, source_url: Optional[str]) -> Optional[str]:
+    """Stable source id of a stored row, or None if only a content hash is known.
+
+    Older content-hash ids share the stable ids' prefix, and their 8 hex
+    chars can be all digits - an id only counts as stable if the rest has the
+    shape of a real ad id.
+    """
+    ad_id = ad_id_from_url(source_site, source_url)
+    if ad_id:
+        return stable_source_id(source_site, ad_id)
+    prefix = source_id_prefix(source_site)
+    if source_id.startswith(prefix) and is_ad_id(source_site, source_id[len(prefix):]):
+        return source_id
+    return None
+
+
+class _Groups:
+    """Union-find over row ids that refuses to join rows with different stable ids."""
+
+    def __init__(self, stable_ids: Dict[int, Optional[str]]):
+        self.parent = {row_id: row_id for row_id in stable_ids}
+        self.stable_id = dict(stable_ids)
+
+    def find(self, row_id: int) -> int:
+        while self.parent[row_id] != row_id:
+            self.parent[row_id] = self.parent[self.parent[row_id]]
+            row_id = self.parent[row_id]
+        return row_id
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        stable_a, stable_b = self.stable_id[a], self.stable_id[b]
+        if stable_a and stable_b and stable_a != stable_b:
+            return
+        self.parent[b] = a
+        self.stable_id[a] = stable_a or stable_b
+
+
+def _merged_list(values: List[Optional[List[Any]]]) -> List[Any]:
+    merged = {}
+    for items in values:
+        merged.update(dict.fromkeys(items or []))
+    return list(merged)
+
+
+def reconcile_site(db: Session, source_site: str, dry_run: bool = False) -> ReconcileResult:
+    """Merge duplicate rows of one source site and rewrite ids to stable ones."""
+    result = ReconcileResult(source_site)
+    # Group on the key columns only - full rows are loaded just for the groups that change
+    rows = db.query(
+        CarAdRaw.id,
+        CarAdRaw.source_id,
+        CarAdRaw.source_url,
+        CarAdRaw.image_urls[0].astext,
+        func.coalesce(CarAdRaw.last_seen_at, CarAdRaw.scraped_at),
+        CarAdRaw.scraped_at,
+    ).filter(CarAdRaw.source_site == source_site).all()
+    result.rows = len(rows)
+
+    groups = _Groups({row_id: row_stable_id(source_site, source_id, source_url)
+                      for row_id, source_id, source_url, _, _, _ in rows})
+    by_stable_id = defaultdict(list)
+    by_image = defaultdict(list)
+    for row_id, _, _, main_image, _, _ in rows:
+        if groups.stable_id[row_id]:
+            by_stable_id[groups.stable_id[row_id]].append(row_id)
+        if main_image:
+            by_image[main_image].append(row_id)
+    for row_ids in by_stable_id.values():
+        for row_id in row_ids[1:]:
+            groups.union(row_ids[0], row_id)
+    for row_ids in by_image.values():
+        if len(row_ids) <= MAX_ROWS_PER_IMAGE:
+            for row_id in row_ids[1:]:
+                groups.union(row_ids[0], row_id)
+
+    members = defaultdict(list)
+    for row in rows:
+        members[groups.find(row[0])].append(row)
+
+    for root, group in members.items():
+        stable_id = groups.stable_id[root]
+        # The most recently seen row has the current price and text
+        group.sort(key=lambda row: (row[4], row[5], row[0]), reverse=True)
+        keeper_id, duplicate_ids = group[0][0], [row[0] for row in group[1:]]
+        keeper_source_id = group[0][1]
+        if not duplicate_ids and (stable_id is None or keeper_source_id == stable_id):
+            if stable_id is None:
+                result.unresolved += 1
+            continue
+
+        if duplicate_ids:
+            result.groups_merged += 1
+            result.rows_removed += len(duplicate_ids)
+            result.merges.append({
+                'kept': keeper_id,
+                'removed': duplicate_ids,
+                'source_id': stable_id or keeper_source_id,
+            })
+        if stable_id and keeper_source_id != stable_id:
+            result.ids_rewritten += 1
+        elif stable_id is None:
+            result.unresolved += 1
+        if not dry_run:
+            _merge(db, keeper_id, duplicate_ids, stable_id)
+
+    if not dry_run:
+        db.commit()
+    return result
+
+
+def _merge(db: Session, keeper_id: int, duplicate_ids: List[int], stable_id: Optional[str]):
+    """Fold the duplicates' image references and first-seen time into the keeper, then drop them."""
+    ads = {ad.id: ad for ad in db.query(CarAdRaw).filter(CarAdRaw.id.in_([keeper_id, *duplicate_ids]))}
+    keeper = ads[keeper_id]
+    group = [keeper, *(ads[ad_id] for ad_id in duplicate_ids)]
+
+    keeper.image_urls = _merged_list([ad.image_urls for ad in group])
+    keeper.local_image_paths = _merged_list([ad.local_image_paths for ad in group]) or None
+    keeper.scraped_at = min(ad.scraped_at for ad in group)
+    if any(ad.is_active for ad in group):
+        keeper.is_active = True
+        keeper.deactivated_at = None
+    for ad_id in duplicate_ids:
+        db.delete(ads[ad_id])
+    # The duplicates may hold the stable id - they must be gone before the keeper takes it
+    db.flush()
+    if stable_id:
+        keeper.source_id = stable_id
+
+
+def reconcile_source_ids(
+    db: Session, source_sites: Optional[List[str]] = None, dry_run: bool = False
+) -> List[ReconcileResult]:
+    """Reconcile every site with stable ids (or the given ones)."""
+    return [
+        reconcile_site(db, source_site, dry_run)
+        for source_site in (source_sites or list(AD_LINK_PATTERNS))
+    ]
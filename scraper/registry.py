@@ -0,0 +1,120 @@
+"""Registry of site scraper plugins.
+
+A plugin is a scraper class registered under the ``name`` that scrape configs
+use for the site, with its default politeness budget::
+
+    @register_site("mobile_bg", rate_per_second=0.5, burst=2, max_concurrency=2)
+    class MobileBgScraper(SiteScraper):
+        ...
+
+Plugins are found in two places: every module of the ``scraper.sites`` package
+(imported on first lookup, so their decorators run), and the ``carbot.scrapers``
+entry-point group, which lets other packages ship scrapers::
+
+    [project.entry-points."carbot.scrapers"]
+    autoscout = "carbot_autoscout:AutoScoutScraper"
+
+A site config's ``rate_limit`` block overrides the plugin defaults.
+"""
+import importlib
+import pkgutil
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+
+ENTRY_POINT_GROUP = "carbot.scrapers"
+SITES_PACKAGE = "scraper.sites"
+
+
+class SiteScraper:
+    """Interface of site scraper plugins."""
+
+    @classmethod
+    def from_config(cls, fetcher, site_config: Dict[str, Any]) -> "SiteScraper":
+        """Scraper for one configured site, fetching through the crawl's shared fetcher."""
+        return cls(fetcher)
+
+    def iter_listings(
+        self, url: str, pagination: Optional[Dict[str, Any]] = None, cutoff=None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Crawl every results page of a search, yielding listings."""
+        raise NotImplementedError
+
+    async def scrape_page(self, url: str) -> Optional[Tuple[List[Dict[str, Any]], List[str]]]:
+        """Scrape one results page into (listings, link hrefs); None if the request failed."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+@dataclass
+class SitePlugin:
+    """A registered site scraper and its default politeness budget."""
+    name: str
+    scraper_class: Type[SiteScraper]
+    rate_limit: Dict[str, Any] = field(default_factory=dict)
+
+    def create(self, fetcher, site_config: Dict[str, Any]) -> SiteScraper:
+        return self.scraper_class.from_config(fetcher, site_config)
+
+    def host_limits(self, site_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Plugin defaults overridden by the site config's ``rate_limit`` block."""
+        return {**self.rate_limit, **(site_config.get('rate_limit') or {})}
+
+
+_plugins: Dict[str, SitePlugin] = {}
+_loaded = False
+
+
+def register_site(
+    name: str,
+    rate_per_second: Optional[float] = None,
+    burst: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> Callable[[Type[SiteScraper]], Type[SiteScraper]]:
+    """Class decorator registering a site scraper plugin."""
+    rate_limit = {
+        key: value for key, value in (
+            ('rate_per_second', rate_per_second), ('burst', burst), ('max_concurrency', max_concurrency),
+        ) if value is not None
+    }
+
+    def decorator(scraper_class: Type[SiteScraper]) -> Type[SiteScraper]:
+        _plugins[name] = SitePlugin(name, scraper_class, rate_limit)
+        return scraper_class
+
+    return decorator
+
+
+def load_plugins():
+    """Import the built-in site modules and the entry-point plugins (once)."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+
+    package = importlib.import_module(SITES_PACKAGE)
+    for module in pkgutil.iter_modules(package.__path__):
+        importlib.import_module(f"{SITES_PACKAGE}.{module.name}")
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            scraper_class = entry_point.load()
+        except Exception as e:
+            print(f"✗ Failed to load scraper plugin {entry_point.name}: {e}")
+            continue
+        # Decorated classes registered themselves on import; plain ones go under the entry point name
+        if not any(plugin.scraper_class is scraper_class for plugin in _plugins.values()):
+            _plugins[entry_point.name] = SitePlugin(entry_point.name, scraper_class)
+
+
+def get_site(name: str) -> Optional[SitePlugin]:
+    """The plugin registered for a site name, or None."""
+    load_plugins()
+    return _plugins.get(name)
+
+
+def available_sites() -> List[str]:
+    load_plugins()
+    return sorted(_plugins)
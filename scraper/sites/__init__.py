@@ -0,0 +1 @@
+"""Site scraper plugins (see scraper/registry.py)."""
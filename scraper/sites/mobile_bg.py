@@ -1,99 +1,244 @@
 """Mobile.bg scraper implementation."""
+import asyncio
 import re
 import time
-import random
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from urllib.parse import urljoin, urlparse
-import requests
+import httpx
 from bs4 import BeautifulSoup
-from config.settings import settings
+from scraper.fetcher import AsyncFetcher
+from scraper.html_parser import HtmlTree, as_tree, parse_html
+from scraper.incremental import KnownAdsCutoff
 from scraper.intelligent_extractor import IntelligentFieldExtractor
+from scraper.pagination import Paginator
+from scraper.patterns import load_pattern_pack
+from scraper.registry import SiteScraper, register_site
+from scraper.source_ids import listing_source_id
+from scraper import telemetry
 
+# Bump when extraction changes, so pages served from the HTTP cache get re-parsed
+PARSED_CACHE_VERSION = 2
 
-class MobileBgScraper:
+
+@register_site("mobile_bg", rate_per_second=0.5, burst=2, max_concurrency=2)
+class MobileBgScraper(SiteScraper):
     """Scraper for mobile.bg car listings."""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': settings.scraper_user_agent,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+    def __init__(
+        self,
+        fetcher: Optional[AsyncFetcher] = None,
+        max_containers: Optional[int] = None,
+        parser: Optional[str] = None,
+    ):
+        # Share the caller's fetcher (and its connection pool / politeness budget) when given one
+        self.fetcher = fetcher or AsyncFetcher()
+        self._owns_fetcher = fetcher is None
+        # Cap on listing containers taken per page (None = all of them)
+        self.max_containers = max_containers
+        # HTML parser backend (None = settings.scraper_html_parser)
+        self.parser = parser
         self.base_url = "https://www.mobile.bg"
         self.intelligent_extractor = IntelligentFieldExtractor()
+        self.patterns = load_pattern_pack('mobile_bg')
     
-    def _get_delay(self) -> float:
-        """Get random delay between requests."""
-        return random.uniform(
-            settings.scraper_delay_min,
-            settings.scraper_delay_max
+    @classmethod
+    def from_config(cls, fetcher: AsyncFetcher, site_config: Dict[str, Any]) -> "MobileBgScraper":
+        return cls(
+            fetcher,
+            max_containers=site_config.get('max_containers_per_page'),
+            parser=site_config.get('html_parser'),
         )
     
-    def scrape_listings_page(self, url: str) -> List[Dict[str, Any]]:
-        """Scrape car listings from a mobile.bg page using intelligent extraction."""
-        print(f"Scraping: {url}")
+    async def scrape_listings_page(self, url: str) -> List[Dict[str, Any]]:
+        """Fetch a single mobile.bg listings page and extract its car listings."""
+        page = await self.scrape_page(url)
+        return page[0] if page else []
+    
+    async def iter_listings(
+        self,
+        url: str,
+        pagination: Optional[Dict[str, Any]] = None,
+        cutoff: Optional[KnownAdsCutoff] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Crawl every results page of a search, yielding listings as each page is parsed.
+        
+        The page count comes from the pagination links of the first page; the
+        remaining pages are fetched concurrently (the fetcher keeps them within
+        the host budget) and processed in completion order.
+        
+        With a ``cutoff`` (incremental crawl of newest-first results) pages are
+        fetched one at a time instead, until the cutoff's run of known ads is hit.
+        """
+        paginator = Paginator(url, pagination)
+        seen_ids = set()
+        emitted = 0
+        
+        def new_listings(listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            # Ads shift between pages while we crawl - never emit the same one twice
+            fresh = [listing for listing in listings if listing['source_id'] not in seen_ids]
+            seen_ids.update(listing['source_id'] for listing in fresh)
+            return fresh
+        
+        page = await self.scrape_page(url)
+        if page is None:
+            return
+        first_listings, links = page
+        # Each page is checked before its listings are yielded (and saved) - its own new ads are not known
+        stop = cutoff is not None and await cutoff.reached(first_listings)
+        
+        for listing in new_listings(first_listings):
+            yield listing
+            emitted += 1
+            if paginator.listings_exhausted(emitted):
+                return
         
+        page = paginator.start
+        last_page = paginator.last_page(links)
+        print(f"Found {last_page - paginator.start + 1} result pages")
+        
+        if cutoff is not None:
+            while not stop:
+                if page >= last_page:
+                    return
+                page += 1
+                page_result = await self.scrape_page(paginator.page_url(page))
+                if page_result is None:
+                    return
+                listings = page_result[0]
+                stop = await cutoff.reached(listings)
+                fresh = new_listings(listings)
+                if not fresh and paginator.stop_on_empty_page:
+                    return
+                for listing in fresh:
+                    yield listing
+                    emitted += 1
+                    if paginator.listings_exhausted(emitted):
+                        return
+            print(f"Reached {cutoff.consecutive_known} consecutive known ads on page {page} - stopping")
+            return
+        
+        tasks = {
+            asyncio.create_task(self.scrape_page(page_url)): (page, page_url)
+            for page, page_url in paginator.remaining_pages(last_page)
+        }
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            listings = []
-            
-            # Use intelligent extractor to analyze page structure
-            print("Analyzing page structure with intelligent extractor...")
-            potential_containers = self.intelligent_extractor.analyze_page_structure(soup)
-            
-            print(f"Found {len(potential_containers)} potential car listing containers")
-            
-            for i, container_info in enumerate(potential_containers[:15]):  # Limit to top 15
-                try:
-                    element = container_info['element']
-                    fields = container_info['fields']
-                    score = container_info['score']
-                    
-                    print(f"  Container {i+1} (score: {score:.2f}): {len(fields)} fields found")
-                    
-                    # Extract complete listing using intelligent extractor
-                    listing_data = self.intelligent_extractor.extract_car_listing(element)
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: tasks[t][0]):
+                    if task not in tasks:
+                        continue  # finished, but past an empty page
+                    page, page_url = tasks.pop(task)
+                    page_result = task.result()
+                    listings = new_listings(page_result[0]) if page_result else []
                     
-                    # Set source information
-                    listing_data['source_site'] = 'mobile.bg'
-                    listing_data['source_url'] = url
+                    if not listings and page_result is not None and paginator.stop_on_empty_page:
+                        # An empty (or all-duplicate) page means we ran past the last result
+                        for pending, (pending_page, _) in list(tasks.items()):
+                            if pending_page > page:
+                                pending.cancel()
+                                del tasks[pending]
                     
-                    # Generate consistent source_id
-                    import hashlib
-                    text_content = element.get_text(strip=True)
-                    content_hash = hashlib.md5(text_content[:200].encode()).hexdigest()[:8]
-                    listing_data['source_id'] = f"mobile_bg_intelligent_{content_hash}"
-                    
-                    if listing_data and (listing_data.get('price') or listing_data.get('year') or 'BMW' in text_content):
-                        listings.append(listing_data)
-                        print(f"    ✓ Extracted: {listing_data.get('title', 'Unknown')[:50]}...")
-                        print(f"    Fields: {list(fields.keys())}")
-                    else:
-                        print(f"    ✗ Skipped: insufficient data")
-                        
-                except Exception as e:
-                    print(f"  ✗ Error extracting container {i+1}: {e}")
-                    continue
-            
-            print(f"Total listings extracted: {len(listings)}")
-            return listings
-            
-        except requests.RequestException as e:
+                    for listing in listings:
+                        yield listing
+                        emitted += 1
+                        if paginator.listings_exhausted(emitted):
+                            return
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def scrape_page(self, url: str) -> Optional[Tuple[List[Dict[str, Any]], List[str]]]:
+        """Fetch and parse a results page into (listings, link hrefs); None if the request failed.
+        
+        Pages the HTTP cache reports unchanged reuse the results parsed from
+        the same body on an earlier run instead of being parsed again.
+        """
+        print(f"Scraping: {url}")
+        
+        try:
+            result = await self.fetcher.fetch(url)
+        except httpx.HTTPError as e:
             print(f"Request error: {e}")
-            return []
+            return None
+        
+        cache = self.fetcher.cache
+        parsed_name = f"mobile_bg_v{PARSED_CACHE_VERSION}_{self.max_containers or 'all'}"
+        if result.from_cache and cache:
+            parsed = await asyncio.to_thread(cache.load_parsed, url, parsed_name, result.digest)
+            if parsed is not None:
+                print("  Not modified - reusing parsed listings")
+                return parsed['listings'], parsed['links']
+        
+        tree = parse_html(result.content, self.parser)
+        listings = self._extract_page_listings(tree, url)
+        links = tree.links()
+        if cache and result.digest:
+            await asyncio.to_thread(
+                cache.store_parsed, url, parsed_name, result.digest, {'listings': listings, 'links': links}
+            )
+        return listings, links
+    
+    def _extract_page_listings(self, tree: HtmlTree, url: str) -> List[Dict[str, Any]]:
+        try:
+            return self.parse_listings_page(tree, url)
         except Exception as e:
             print(f"Parsing error: {e}")
             return []
     
+    def parse_listings_page(self, page, url: str) -> List[Dict[str, Any]]:
+        """Extract car listings from a fetched page (raw HTML, a parsed soup or an ``HtmlTree``)."""
+        started = time.perf_counter()
+        tree = as_tree(page, self.parser)
+        listings = []
+        
+        # Use intelligent extractor to analyze page structure
+        print("Analyzing page structure with intelligent extractor...")
+        potential_containers = self.intelligent_extractor.analyze_page_structure(tree)
+        
+        print(f"Found {len(potential_containers)} potential car listing containers")
+        containers_found = len(potential_containers)
+        if self.max_containers:
+            potential_containers = potential_containers[:self.max_containers]
+        
+        for i, container_info in enumerate(potential_containers):
+            try:
+                element = container_info['element']
+                fields = container_info['fields']
+                score = container_info['score']
+                
+                print(f"  Container {i+1} (score: {score:.2f}): {len(fields)} fields found")
+                
+                # Extract complete listing, reusing the fields found during page analysis
+                text_content = container_info['text']
+                listing_data = self.intelligent_extractor.extract_car_listing(element, fields, text_content, tree)
+                
+                # Set source information - the id comes from the ad's own link when the card has one
+                source_id, ad_url = listing_source_id(
+                    'mobile.bg', tree.hrefs(element), url, text_content, fallback_prefix='mobile_bg_intelligent_'
+                )
+                listing_data['source_site'] = 'mobile.bg'
+                listing_data['source_id'] = source_id
+                listing_data['source_url'] = ad_url or url
+                
+                if listing_data and (listing_data.get('price') or listing_data.get('year') or 'BMW' in text_content):
+                    listings.append(listing_data)
+                    print(f"    ✓ Extracted: {listing_data.get('title', 'Unknown')[:50]}...")
+                    print(f"    Fields: {list(fields.keys())}")
+                else:
+                    print(f"    ✗ Skipped: insufficient data")
+                    
+            except Exception as e:
+                print(f"  ✗ Error extracting container {i+1}: {e}")
+                continue
+        
+        print(f"Total listings extracted: {len(listings)}")
+        telemetry.record_parse(time.perf_counter() - started, containers_found, len(listings))
+        return listings
+    
     def _extract_listing_data(self, container, page_url: str) -> Optional[Dict[str, Any]]:
         """Extract data from a single listing container."""
+        patterns = self.patterns
         try:
             # Initialize listing data
             listing = {
@@ -123,54 +268,21 @@ class MobileBgScraper:
             text_content = container.get_text(strip=True)
             listing['raw_data']['text_content'] = text_content
             
-            # Look for price patterns (Bulgarian format: 109 999 лв)
-            # Try multiple price patterns
-            price_patterns = [
-                r'(\d+(?:\s+\d+)*)\s*(лв|€|\$)',
-                r'(\d+(?:\.\d+)?)\s*(лв|€|\$)',
-                r'(\d+(?:,\d+)?)\s*(лв|€|\$)',
-            ]
-            
-            for pattern in price_patterns:
-                price_match = re.search(pattern, text_content)
-                if price_match:
-                    price_str = price_match.group(1).replace(' ', '').replace(',', '')
-                    try:
-                        price_val = float(price_str)
-                        # Filter out unrealistic prices (too low or too high)
-                        if 10000 <= price_val <= 500000:
-                            listing['price'] = price_val
-                            listing['currency'] = price_match.group(2)
-                            break
-                    except ValueError:
-                        continue
+            # Price (Bulgarian format: 109 999 лв), range-checked by the pattern pack
+            price_match = patterns.first('price', text_content)
+            if price_match:
+                listing['price'] = price_match.value
+                listing['currency'] = price_match.groups[1]
             
             # Look for year (2019+)
-            year_match = re.search(r'(20\d{2})', text_content)
-            if year_match:
-                year = int(year_match.group(1))
-                if year >= 2019:
-                    listing['year'] = year
+            year_match = patterns.first('year', text_content)
+            if year_match and year_match.value >= 2019:
+                listing['year'] = year_match.value
             
-            # Look for mileage (км) - try different patterns
-            mileage_patterns = [
-                r'(\d+(?:\s+\d+)*)\s*км',
-                r'(\d+(?:\.\d+)?)\s*км',
-                r'(\d+(?:,\d+)?)\s*км',
-            ]
-            
-            for pattern in mileage_patterns:
-                mileage_match = re.search(pattern, text_content)
-                if mileage_match:
-                    mileage_str = mileage_match.group(1).replace(' ', '').replace(',', '')
-                    try:
-                        mileage_val = int(mileage_str)
-                        # Filter out unrealistic mileage
-                        if 0 <= mileage_val <= 500000:
-                            listing['mileage'] = mileage_val
-                            break
-                    except ValueError:
-                        continue
+            # Look for mileage (км)
+            mileage_match = patterns.first('mileage', text_content)
+            if mileage_match:
+                listing['mileage'] = mileage_match.value
             
             # Extract title from text or nearby elements
             if 'BMW' in text_content and 'M5' in text_content:
@@ -196,77 +308,26 @@ class MobileBgScraper:
                 listing['title'] = listing['title'][:200]
             
             # Look for location
-            location_patterns = [
-                r'гр\.\s*([^,\n]+)',
-                r'София|Пловдив|Варна|Бургас|Русе|Стара Загора|Плевен',
-            ]
-            for pattern in location_patterns:
-                location_match = re.search(pattern, text_content, re.I)
-                if location_match:
-                    listing['location'] = location_match.group(1) if location_match.groups() else location_match.group(0)
-                    break
-            
-            # Extract additional car specifications
-            # Fuel type
-            fuel_patterns = [r'Бензинов', r'Дизел', r'Хибрид', r'Електрически']
-            for pattern in fuel_patterns:
-                if re.search(pattern, text_content, re.I):
-                    listing['fuel_type'] = re.search(pattern, text_content, re.I).group(0)
-                    break
-            
-            # Transmission
-            if re.search(r'Автоматична', text_content, re.I):
-                listing['transmission'] = 'Автоматична'
-            elif re.search(r'Ръчна', text_content, re.I):
-                listing['transmission'] = 'Ръчна'
+            location_match = patterns.first('location', text_content)
+            if location_match:
+                listing['location'] = location_match.groups[0]
             
-            # Body type
-            if re.search(r'Седан', text_content, re.I):
-                listing['body_type'] = 'Седан'
-            elif re.search(r'Купе', text_content, re.I):
-                listing['body_type'] = 'Купе'
-            elif re.search(r'Кабрио', text_content, re.I):
-                listing['body_type'] = 'Кабрио'
-            
-            # Color
-            color_patterns = [r'Черен', r'Бял', r'Син', r'Червен', r'Сребърен', r'Сив']
-            for pattern in color_patterns:
-                if re.search(pattern, text_content, re.I):
-                    listing['color'] = re.search(pattern, text_content, re.I).group(0)
-                    break
-            
-            # Engine power (к.с.)
-            power_match = re.search(r'(\d+)\s*к\.с\.', text_content)
-            if power_match:
-                try:
-                    listing['engine_power'] = int(power_match.group(1))
-                except ValueError:
-                    pass
-            
-            # Engine displacement (куб.см)
-            displacement_match = re.search(r'(\d+)\s*куб\.см', text_content)
-            if displacement_match:
-                try:
-                    displacement_cc = int(displacement_match.group(1))
-                    listing['engine_displacement'] = displacement_cc / 1000.0  # Convert to liters
-                except ValueError:
-                    pass
+            # Extract additional car specifications - fuel type, transmission, body type,
+            # color, engine power (к.с.) and displacement (куб.см, converted to liters)
+            for field in ('fuel_type', 'transmission', 'body_type', 'color',
+                          'engine_power', 'engine_displacement'):
+                field_match = patterns.first(field, text_content)
+                if field_match:
+                    listing[field] = field_match.value
             
             # Dealer information
-            dealer_patterns = [
-                r'Дилър:\s*([^,\n]+)',
-                r'Автокъща:\s*([^,\n]+)',
-                r'Търговец:\s*([^,\n]+)',
-            ]
-            for pattern in dealer_patterns:
-                dealer_match = re.search(pattern, text_content, re.I)
-                if dealer_match:
-                    listing['dealer_name'] = dealer_match.group(1).strip()
-                    listing['dealer_type'] = 'dealer'
-                    break
+            dealer_match = patterns.first('dealer_name', text_content)
+            if dealer_match:
+                listing['dealer_name'] = dealer_match.groups[0].strip()
+                listing['dealer_type'] = 'dealer'
             
             # Check for private seller indicators
-            if re.search(r'частно лице|частен|собствен', text_content, re.I):
+            if patterns.first('private_seller', text_content):
                 listing['dealer_type'] = 'private'
             
             # Extract images
@@ -281,39 +342,12 @@ class MobileBgScraper:
                     if src.startswith('http') and 'mobile.bg' in src:
                         listing['image_urls'].append(src)
             
-            # Generate consistent source_id from URL or specific content
-            # Try to find a unique identifier in the content first
-            source_id = None
-            
-            # Look for mobile.bg ad ID patterns (8+ digits)
-            ad_id_match = re.search(r'(\d{8,})', text_content)
-            if ad_id_match:
-                source_id = f"mobile_bg_{ad_id_match.group(1)}"
-            else:
-                # Look for other unique patterns in the content
-                # Try to find a consistent identifier from the content
-                import hashlib
-                
-                # Create a stable hash from key content
-                key_parts = []
-                if listing.get('title'):
-                    key_parts.append(listing['title'][:50])
-                if listing.get('price'):
-                    key_parts.append(str(listing['price']))
-                if listing.get('year'):
-                    key_parts.append(str(listing['year']))
-                if listing.get('mileage'):
-                    key_parts.append(str(listing['mileage']))
-                
-                if key_parts:
-                    key_content = '|'.join(key_parts)
-                    # Use MD5 for consistent hashing across sessions
-                    content_hash = hashlib.md5(key_content.encode()).hexdigest()[:8]
-                    source_id = f"mobile_bg_{content_hash}"
-                else:
-                    # Last resort: hash of first 100 chars
-                    content_hash = hashlib.md5(text_content[:100].encode()).hexdigest()[:8]
-                    source_id = f"mobile_bg_{content_hash}"
+            # Stable source_id: the ad id from the card's link to the ad, else a
+            # hash of the content (digits in the text may be a phone or a price)
+            hrefs = [link['href'] for link in container.find_all('a', href=True)]
+            source_id, ad_url = listing_source_id('mobile.bg', hrefs, page_url, text_content)
+            if ad_url:
+                listing['source_url'] = ad_url
             
             listing['source_id'] = source_id
             
@@ -333,7 +367,7 @@ class MobileBgScraper:
         # Look for all text that mentions BMW M5
         bmw_m5_texts = soup.find_all(text=re.compile(r'BMW.*M5', re.I))
         
-        for i, text_elem in enumerate(bmw_m5_texts[:10]):  # Limit to 10
+        for text_elem in bmw_m5_texts[:10]:  # Limit to 10
             try:
                 # Get the parent element
                 parent = text_elem.parent
@@ -343,16 +377,18 @@ class MobileBgScraper:
                 # Get surrounding context
                 context = parent.get_text(strip=True)
                 
-                # Generate consistent source_id for alternative extraction
-                import hashlib
-                context_hash = hashlib.md5(context[:100].encode()).hexdigest()[:8]
-                alt_source_id = f"mobile_bg_alt_{i}_{context_hash}"
+                # Source id from the nearest link to the ad - never from the match's position on the page
+                link = parent if parent.name == 'a' else parent.find_parent('a') or parent.find('a', href=True)
+                hrefs = [link['href']] if link is not None and link.get('href') else []
+                alt_source_id, ad_url = listing_source_id(
+                    'mobile.bg', hrefs, page_url, context, fallback_prefix='mobile_bg_alt_'
+                )
                 
                 # Create basic listing
                 listing = {
                     'source_site': 'mobile.bg',
                     'source_id': alt_source_id,
-                    'source_url': page_url,
+                    'source_url': ad_url or page_url,
                     'raw_data': {'text_content': context},
                     'title': f"BMW M5 - {context[:100]}",
                     'make': 'BMW',
@@ -361,31 +397,19 @@ class MobileBgScraper:
                     'image_urls': [],
                 }
                 
-                # Try to extract price
-                price_match = re.search(r'(\d+(?:\s+\d+)*)\s*(лв|€|\$)', context)
+                # Try to extract price, year and mileage
+                price_match = self.patterns.first('price', context)
                 if price_match:
-                    price_str = price_match.group(1).replace(' ', '')
-                    try:
-                        listing['price'] = float(price_str)
-                        listing['currency'] = price_match.group(2)
-                    except ValueError:
-                        pass
+                    listing['price'] = price_match.value
+                    listing['currency'] = price_match.groups[1]
                 
-                # Try to extract year
-                year_match = re.search(r'(20\d{2})', context)
-                if year_match:
-                    year = int(year_match.group(1))
-                    if year >= 2019:
-                        listing['year'] = year
+                year_match = self.patterns.first('year', context)
+                if year_match and year_match.value >= 2019:
+                    listing['year'] = year_match.value
                 
-                # Try to extract mileage
-                mileage_match = re.search(r'(\d+(?:\s+\d+)*)\s*км', context)
+                mileage_match = self.patterns.first('mileage', context)
                 if mileage_match:
-                    mileage_str = mileage_match.group(1).replace(' ', '')
-                    try:
-                        listing['mileage'] = int(mileage_str)
-                    except ValueError:
-                        pass
+                    listing['mileage'] = mileage_match.value
                 
                 listings.append(listing)
                 
@@ -395,19 +419,30 @@ class MobileBgScraper:
         
         return listings
     
-    def close(self):
-        """Close the session."""
-        self.session.close()
+    async def close(self):
+        """Close the fetcher if this scraper created it."""
+        if self._owns_fetcher:
+            await self.fetcher.aclose()
 
 
-def scrape_mobile_bg_bmw_m5(url: str) -> List[Dict[str, Any]]:
-    """Main function to scrape BMW M5 listings from mobile.bg."""
-    scraper = MobileBgScraper()
+async def scrape_mobile_bg_bmw_m5_async(
+    url: str,
+    fetcher: Optional[AsyncFetcher] = None,
+    pagination: Optional[Dict[str, Any]] = None,
+    max_containers: Optional[int] = None,
+    cutoff: Optional[KnownAdsCutoff] = None,
+) -> List[Dict[str, Any]]:
+    """Scrape all result pages of a BMW M5 search on mobile.bg, optionally through a shared fetcher."""
+    scraper = MobileBgScraper(fetcher, max_containers=max_containers)
     try:
-        listings = scraper.scrape_listings_page(url)
-        return listings
+        return [listing async for listing in scraper.iter_listings(url, pagination, cutoff)]
     finally:
-        scraper.close()
+        await scraper.close()
+
+
+def scrape_mobile_bg_bmw_m5(url: str, pagination: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Main function to scrape BMW M5 listings from mobile.bg."""
+    return asyncio.run(scrape_mobile_bg_bmw_m5_async(url, pagination=pagination))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+"""Stable source ids for scraped listings.
+
+A site keeps an ad's id for as long as the ad is listed, and that id is part
+of the link to the ad's details page (``/obiava-11700000000-bmw-m5``,
+``...?act=4&adv=11700000000``). Ids are taken from those links; hashing the
+card's text is only a last resort, because the hash changes whenever the price
+or the description does - and with it the ad would get a new row and a fresh
+image download.
+"""
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+from urllib.parse import urljoin
+
+# Per source site: regexes whose first group is the site's ad id, most specific first
+AD_LINK_PATTERNS: Dict[str, List[Pattern]] = {
+    'mobile.bg': [
+        re.compile(r'obiava-(\d+)'),
+        re.compile(r'[?&]adv=(\d+)'),
+    ],
+}
+
+# Per source site: the whole of one of its ad ids
+AD_ID_PATTERNS: Dict[str, Pattern] = {
+    'mobile.bg': re.compile(r'\d{11}'),
+}
+
+# Per source site: prefix of its source ids
+SOURCE_ID_PREFIXES: Dict[str, str] = {
+    'mobile.bg': 'mobile_bg_',
+}
+# Marks content-hash ids, after the site prefix - an 8-char hex digest can be all digits
+CONTENT_ID_MARKER = 'h_'
+
+
+def source_id_prefix(source_site: str) -> str:
+    return SOURCE_ID_PREFIXES.get(source_site, re.sub(r'\W+', '_', source_site) + '_')
+
+
+def content_id_prefix(source_site: str) -> str:
+    """Prefix of a site's content-hash ids, distinct from its stable ids."""
+    return f"{source_id_prefix(source_site)}{CONTENT_ID_MARKER}"
+
+
+def is_ad_id(source_site: str, value: str) -> bool:
+    """True if ``value`` has the shape of the site's ad ids (digits, for unknown sites)."""
+    pattern = AD_ID_PATTERNS.get(source_site)
+    return bool(pattern.fullmatch(value)) if pattern else value.isdigit()
+
+
+def ad_id_from_url(source_site: str, url: Optional[str]) -> Optional[str]:
+    """The site's ad id in a details-page URL, or None."""
+    if not url:
+        return None
+    for pattern in AD_LINK_PATTERNS.get(source_site, ()):
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def find_ad_link(source_site: str, hrefs: Iterable[str], base_url: str) -> Optional[Tuple[str, str]]:
+    """(absolute URL, ad id) of the first link to an ad's details page, or None."""
+    for href in hrefs:
+        ad_id = ad_id_from_url(source_site, href)
+        if ad_id:
+            return urljoin(base_url, href), ad_id
+    return None
+
+
+def stable_source_id(source_site: str, ad_id: str) -> str:
+    return f"{source_id_prefix(source_site)}{ad_id}"
+
+
+def content_source_id(prefix: str, text: str) -> str:
+    """Last-resort id hashed from a listing's text - changes whenever the text does."""
+    return f"{prefix}{hashlib.md5(text[:200].encode()).hexdigest()[:8]}"
+
+
+def listing_source_id(
+    source_site: str, hrefs: Iterable[str], base_url: str, text: str, fallback_prefix: Optional[str] = None
+) -> Tuple[str, Optional[str]]:
+    """(source id, details-page URL or None) of a listing card.
+
+    The id comes from the card's link to the ad when it has one; otherwise it
+    is hashed from the card text under ``fallback_prefix`` (by default the
+    site's ``content_id_prefix``).
+    """
+    ad_link = find_ad_link(source_site, hrefs, base_url)
+    if ad_link:
+        ad_url, ad_id = ad_link
+        return stable_source_id(source_site, ad_id), ad_url
+    return content_source_id(fallback_prefix or content_id_prefix(source_site), text), None
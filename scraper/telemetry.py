@@ -0,0 +1,204 @@
+"""Per-site crawl telemetry, persisted to ``scrape_runs``.
+
+A crawl keeps one ``CrawlTelemetry`` for its crawl run id, holding a
+``SiteStats`` per site: pages fetched, bytes, the HTTP status histogram, fetch
+latencies, parse time, containers found vs listings kept, database rows
+written and images downloaded. ``save`` writes one ``scrape_runs`` row per
+site, so extraction yield and throughput can be compared across runs.
+
+A site's crawl runs inside ``telemetry.site(source_site)``. The fetcher and the
+parsers record through the module functions (``record_response``,
+``record_parse``, ...), which add to the site of the current context and do
+nothing outside one - like ``db.instrumentation.track_queries``. The pipeline
+stages run in tasks of their own and record by the ads' ``source_site``
+instead.
+"""
+import math
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from db.database import SessionLocal
+from db.models import ScrapeRun
+from scraper.frontier import default_worker_id
+
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+
+@dataclass
+class SiteStats:
+    """Counters of one site's crawl in one process."""
+    site: str
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    # Fetch stage - every HTTP response (retries included), transport errors, cache hits
+    pages_fetched: int = 0
+    pages_from_cache: int = 0
+    fetch_errors: int = 0
+    bytes_fetched: int = 0
+    status_counts: Counter = field(default_factory=Counter)
+    latencies: List[float] = field(default_factory=list)
+    # Parse stage
+    pages_parsed: int = 0
+    parse_seconds: float = 0.0
+    containers_found: int = 0
+    listings_kept: int = 0
+    # Persistence and image stages
+    rows_inserted: int = 0
+    rows_seen: int = 0
+    rows_failed: int = 0
+    images_downloaded: int = 0
+
+    def latency_ms(self, percentile: float) -> Optional[float]:
+        """Nearest-rank percentile of the fetch latencies, in milliseconds."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        rank = max(math.ceil(percentile / 100 * len(ordered)), 1)
+        return ordered[rank - 1] * 1000
+
+    @property
+    def yield_ratio(self) -> Optional[float]:
+        """Share of the containers found that became listings."""
+        return self.listings_kept / self.containers_found if self.containers_found else None
+
+    def summary(self) -> str:
+        p50, p90 = self.latency_ms(50), self.latency_ms(90)
+        latency = f"p50 {p50:.0f} ms, p90 {p90:.0f} ms" if p50 is not None else "no requests"
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self.status_counts.items())) or "none"
+        return (
+            f"{self.site}: {self.pages_fetched} fetched ({statuses}), {self.pages_from_cache} from cache, "
+            f"{self.fetch_errors} errors, {self.bytes_fetched / 1024:.0f} KiB, {latency}; "
+            f"{self.pages_parsed} parsed in {self.parse_seconds:.2f}s, "
+            f"{self.listings_kept}/{self.containers_found} containers kept; "
+            f"{self.rows_inserted} inserted, {self.rows_seen} seen, {self.rows_failed} failed, "
+            f"{self.images_downloaded} images"
+        )
+
+    def row_values(self) -> Dict:
+        return {
+            'pages_fetched': self.pages_fetched,
+            'pages_from_cache': self.pages_from_cache,
+            'fetch_errors': self.fetch_errors,
+            'bytes_fetched': self.bytes_fetched,
+            'status_counts': {str(status): count for status, count in self.status_counts.items()},
+            'fetch_latency_p50_ms': self.latency_ms(50),
+            'fetch_latency_p90_ms': self.latency_ms(90),
+            'fetch_latency_p99_ms': self.latency_ms(99),
+            'pages_parsed': self.pages_parsed,
+            'parse_seconds': self.parse_seconds,
+            'containers_found': self.containers_found,
+            'listings_kept': self.listings_kept,
+            'rows_inserted': self.rows_inserted,
+            'rows_seen': self.rows_seen,
+            'rows_failed': self.rows_failed,
+            'images_downloaded': self.images_downloaded,
+        }
+
+
+_current_site: ContextVar[Optional[SiteStats]] = ContextVar("scrape_site_stats", default=None)
+
+
+class CrawlTelemetry:
+    """The ``SiteStats`` of one crawl run in this process, and their ``scrape_runs`` rows."""
+
+    def __init__(
+        self,
+        crawl_run_id: str,
+        crawl: Optional[str] = None,
+        worker_id: Optional[str] = None,
+        session_factory=SessionLocal,
+    ):
+        self.crawl_run_id = crawl_run_id
+        self.crawl = crawl
+        self.worker_id = worker_id or default_worker_id()
+        self.session_factory = session_factory
+        self.sites: Dict[str, SiteStats] = {}
+        self._row_ids: Dict[str, int] = {}
+
+    def stats_for(self, site: str) -> SiteStats:
+        if site not in self.sites:
+            self.sites[site] = SiteStats(site)
+        return self.sites[site]
+
+    @contextmanager
+    def site(self, site: str) -> Iterator[SiteStats]:
+        """Attribute what the fetcher and parsers record in this context to ``site``."""
+        token = _current_site.set(self.stats_for(site))
+        try:
+            yield _current_site.get()
+        finally:
+            _current_site.reset(token)
+
+    def save(self, status: str = FINISHED) -> int:
+        """Insert (first call) or update the ``scrape_runs`` row of every site; returns the row count.
+
+        ``status=RUNNING`` saves progress without finishing the rows, so a
+        long crawl can checkpoint.
+        """
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            for name, stats in self.sites.items():
+                values = {**stats.row_values(), 'status': status, 'finished_at': None if status == RUNNING else now}
+                row_id = self._row_ids.get(name)
+                if row_id is None:
+                    row = ScrapeRun(
+                        crawl_run_id=self.crawl_run_id,
+                        crawl=self.crawl,
+                        site=name,
+                        worker_id=self.worker_id,
+                        started_at=stats.started_at,
+                        **values,
+                    )
+                    db.add(row)
+                    db.flush()
+                    self._row_ids[name] = row.id
+                else:
+                    db.query(ScrapeRun).filter(ScrapeRun.id == row_id).update(values, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return len(self.sites)
+
+
+def current_site() -> Optional[SiteStats]:
+    """Stats of the site crawled in the current context, if any."""
+    return _current_site.get()
+
+
+def record_response(status_code: int, size: int, latency: float):
+    stats = _current_site.get()
+    if stats is not None:
+        stats.pages_fetched += 1
+        stats.bytes_fetched += size
+        stats.status_counts[status_code] += 1
+        stats.latencies.append(latency)
+
+
+def record_fetch_error():
+    stats = _current_site.get()
+    if stats is not None:
+        stats.fetch_errors += 1
+
+
+def record_cache_hit():
+    stats = _current_site.get()
+    if stats is not None:
+        stats.pages_from_cache += 1
+
+
+def record_parse(seconds: float, containers: int, listings: int):
+    stats = _current_site.get()
+    if stats is not None:
+        stats.pages_parsed += 1
+        stats.parse_seconds += seconds
+        stats.containers_found += containers
+        stats.listings_kept += listings
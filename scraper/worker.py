@@ -0,0 +1,235 @@
+"""Scraper workers: long-running processes that crawl from the shared frontier.
+
+A crawl is seeded once (``python -m scraper seed CONFIG``), which queues its
+sites' start pages under a new crawl run id. Any number of workers, on any
+number of machines, then claim its tasks (``python -m scraper worker CONFIG``).
+With the Postgres frontier the claims are ``SELECT ... FOR UPDATE SKIP
+LOCKED``, so no task is handed to two workers and workers never wait on each
+other's locks. Each task is scraped by its site plugin, the pages it links to
+are queued, and its ads go through the pipeline's bulk upsert - the task is
+completed once they are committed.
+
+Workers hold their tasks under a lease and renew it every
+``scraper_worker_heartbeat_seconds``. A worker that dies stops renewing, and
+its tasks become claimable again once their lease expires.
+
+Politeness budgets are enforced per process. With ``scraper_workers_per_host``
+set to N, each worker takes 1/N of every host's budget, so N workers together
+stay within the site's limits - run more workers than that per host and the
+extra ones only add load on the site, not throughput.
+"""
+import asyncio
+import signal
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config.settings import settings
+from scraper.fetcher import AsyncFetcher
+from scraper.frontier import IN_PROGRESS, PENDING, Frontier, FrontierTask, default_worker_id
+from scraper.incremental import KnownAdsCutoff
+from scraper.main import configure_site, crawl_frontier_task, lease_heartbeat, load_scrape_config, source_site
+from scraper.pipeline import PipelineStats, ScrapePipeline
+from scraper.registry import SitePlugin, SiteScraper, get_site
+from scraper.telemetry import FAILED, FINISHED, RUNNING, CrawlTelemetry
+
+
+@dataclass
+class _CrawlRun:
+    """A worker's share of one crawl run: its pipeline, telemetry and incremental cutoffs."""
+    pipeline: ScrapePipeline
+    telemetry: CrawlTelemetry
+    cutoffs: Dict[str, Optional[KnownAdsCutoff]] = field(default_factory=dict)
+
+
+class ScrapeWorker:
+    """Claims frontier tasks of the configured crawls and scrapes them until stopped."""
+
+    def __init__(
+        self,
+        config_paths: Iterable[str],
+        frontier: Frontier,
+        worker_id: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        exit_when_idle: bool = False,
+    ):
+        self.frontier = frontier
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size or settings.scraper_frontier_batch_size
+        self.exit_when_idle = exit_when_idle
+        self.stats = PipelineStats()
+
+        # crawl name -> site name -> (site config, plugin)
+        self.sites: Dict[str, Dict[str, Tuple[Dict[str, Any], SitePlugin]]] = {}
+        for config_path in config_paths:
+            config = load_scrape_config(config_path)
+            sites = {}
+            for site_config in config.get('sites', []):
+                plugin = get_site(site_config['name'])
+                if plugin is None:
+                    print(f"  ⚠️  No scraper implemented for site: {site_config['name']}")
+                    continue
+                sites[site_config['name']] = (site_config, plugin)
+            self.sites[config['name']] = sites
+
+        self._crawls: List[str] = list(self.sites)
+        self._scrapers: Dict[Tuple[str, str], SiteScraper] = {}
+        self._runs: Dict[str, _CrawlRun] = {}
+        self._stopping: Optional[asyncio.Event] = None
+
+    def run(self) -> PipelineStats:
+        """Work until stopped (SIGINT/SIGTERM), or until the crawls are drained with ``exit_when_idle``."""
+        return asyncio.run(self.run_async())
+
+    def stop(self):
+        """Finish the tasks in flight, commit their ads and exit."""
+        if self._stopping is not None and not self._stopping.is_set():
+            print(f"\nWorker {self.worker_id} stopping after the tasks in flight")
+            self._stopping.set()
+
+    async def run_async(self) -> PipelineStats:
+        self._stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # Not on the main thread, or not supported by the platform
+                pass
+
+        print(f"Worker {self.worker_id} crawling: {', '.join(self._crawls)}")
+        async with AsyncFetcher() as fetcher:
+            for sites in self.sites.values():
+                for site_config, plugin in sites.values():
+                    configure_site(fetcher, site_config, plugin, settings.scraper_workers_per_host)
+
+            # Leases are renewed until the last pipeline has committed its ads and completed its tasks
+            async with lease_heartbeat(self.frontier, self.worker_id):
+                status = FAILED
+                try:
+                    await self._work(fetcher)
+                    status = FINISHED
+                finally:
+                    await self._close_runs(status)
+                    for scraper in self._scrapers.values():
+                        await scraper.close()
+
+        print(f"\nWorker {self.worker_id}: {self.stats.scraped} ads scraped, {self.stats.inserted} new "
+              f"({self.stats.seen} already known, {self.stats.failed} failed, {self.stats.images} images downloaded)")
+        return self.stats
+
+    async def _work(self, fetcher: AsyncFetcher):
+        """Keep up to ``batch_size`` tasks in flight, claiming more as they finish."""
+        in_flight: Set[asyncio.Task] = set()
+        try:
+            while not self._stopping.is_set():
+                free = self.batch_size - len(in_flight)
+                claimed = await self._claim(free) if free >= max(self.batch_size // 2, 1) else []
+                in_flight.update(asyncio.create_task(self._crawl(task, fetcher)) for task in claimed)
+
+                if in_flight:
+                    if not claimed or len(in_flight) >= self.batch_size:
+                        _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                # Idle: commit what this worker scraped, so its tasks are completed and its pages counted
+                await self._flush_runs()
+                if self.exit_when_idle and await self._drained():
+                    print(f"Worker {self.worker_id}: no tasks left")
+                    return
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), settings.scraper_frontier_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _claim(self, limit: int) -> List[FrontierTask]:
+        """Lease up to ``limit`` tasks, trying the crawls in turn so none of them starves."""
+        for _ in range(len(self._crawls)):
+            crawl = self._crawls.pop(0)
+            self._crawls.append(crawl)
+            tasks = await asyncio.to_thread(self.frontier.claim, crawl, limit, worker_id=self.worker_id)
+            if tasks:
+                return tasks
+        return []
+
+    async def _drained(self) -> bool:
+        """True once no configured crawl has tasks pending (backing off included) or in progress."""
+        for crawl in self.sites:
+            counts = await asyncio.to_thread(self.frontier.counts, crawl)
+            if counts.get(PENDING) or counts.get(IN_PROGRESS):
+                return False
+        return True
+
+    async def _crawl(self, task: FrontierTask, fetcher: AsyncFetcher):
+        """Scrape one claimed task with its site's plugin; a failure only fails the task."""
+        site = self.sites.get(task.crawl, {}).get(task.site)
+        if site is None:
+            await asyncio.to_thread(self.frontier.fail, task, f"No scraper for site {task.site}", self.worker_id)
+            return
+        site_config, plugin = site
+
+        key = (task.crawl, task.site)
+        if key not in self._scrapers:
+            self._scrapers[key] = plugin.create(fetcher, site_config)
+        run = self._run_for(task)
+        if task.site not in run.cutoffs:
+            run.cutoffs[task.site] = KnownAdsCutoff.from_site_config(site_config)
+
+        try:
+            with run.telemetry.site(source_site(site_config)):
+                await crawl_frontier_task(
+                    self.frontier, task, self.worker_id, site_config, self._scrapers[key], run.pipeline,
+                    run.cutoffs[task.site],
+                )
+        except Exception as e:
+            print(f"  ✗ Error scraping {task.url}: {e}")
+            await asyncio.to_thread(self.frontier.fail, task, str(e), self.worker_id)
+
+    def _run_for(self, task: FrontierTask) -> _CrawlRun:
+        """The pipeline and telemetry of the task's crawl run, started on its first task."""
+        run = self._runs.get(task.crawl_run_id)
+        if run is None:
+            telemetry = CrawlTelemetry(task.crawl_run_id, task.crawl, self.worker_id)
+            pipeline = ScrapePipeline(task.crawl_run_id, telemetry=telemetry)
+            pipeline.start()
+            run = self._runs[task.crawl_run_id] = _CrawlRun(pipeline, telemetry)
+        return run
+
+    async def _flush_runs(self):
+        """Commit the ads queued in every open crawl run and save its telemetry so far.
+
+        Runs stay open until the worker exits, so however often it goes idle
+        it keeps one ``scrape_runs`` row per site and crawl run, saved as
+        running until then.
+        """
+        for run in self._runs.values():
+            await run.pipeline.flush()
+            await self._save_telemetry(run.telemetry, RUNNING)
+
+    async def _close_runs(self, status: str):
+        """Commit the ads of every open crawl run and store its telemetry rows."""
+        runs, self._runs = self._runs, {}
+        for crawl_run_id, run in runs.items():
+            if status == FINISHED:
+                await run.pipeline.join()
+            else:
+                await run.pipeline.cancel()
+            for name in ('scraped', 'inserted', 'seen', 'failed', 'images'):
+                setattr(self.stats, name, getattr(self.stats, name) + getattr(run.pipeline.stats, name))
+
+            for site_stats in run.telemetry.sites.values():
+                print(f"Telemetry {crawl_run_id[:8]} {site_stats.summary()}")
+            await self._save_telemetry(run.telemetry, status)
+
+    async def _save_telemetry(self, telemetry: CrawlTelemetry, status: str):
+        try:
+            await asyncio.to_thread(telemetry.save, status)
+        except Exception as e:
+            # Telemetry must never fail the crawl it describes
+            print(f"  ⚠️  Could not save scrape run telemetry: {e}")
+
+    def close(self):
+        """Close the frontier."""
+        self.frontier.close()
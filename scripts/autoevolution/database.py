@@ -1,4 +1,12 @@
-"""Database helper functions for the scraper."""
+"""Database helper functions for the scraper.
+
+The crawler scrapes several pages at once on one event loop and one session.
+Its coroutines go through ``run_in_session``/``get_or_create_async``: the
+blocking SQLAlchemy work runs on a worker thread, one call per session at a
+time, so it neither stalls the other pages nor uses the session concurrently.
+"""
+import asyncio
+
 
 def get_or_create(session, model, defaults=None, **kwargs):
     """
@@ -19,3 +27,15 @@ def get_or_create(session, model, defaults=None, **kwargs):
         session.flush()
         return instance, True
 
+
+async def run_in_session(session, fn, *args, **kwargs):
+    """Run ``fn(session, *args, **kwargs)`` on a worker thread, one call per session at a time."""
+    lock = session.info.setdefault("async_lock", asyncio.Lock())
+    async with lock:
+        return await asyncio.to_thread(fn, session, *args, **kwargs)
+
+
+async def get_or_create_async(session, model, defaults=None, **kwargs):
+    """``get_or_create`` for coroutines, off the event loop."""
+    return await run_in_session(session, get_or_create, model, defaults=defaults, **kwargs)
+
@@ -13,73 +13,24 @@ project_root = Path(__file__).resolve().parents[2]
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from playwright.async_api import async_playwright
 from db import SessionLocal
 from db.models import Brand, Model, Generation
 from scripts.autoevolution.config import logger, BASE_URL
-from scripts.autoevolution.database import get_or_create
+from scripts.autoevolution.database import get_or_create_async
 from scripts.autoevolution.scraper import handle_cookie_consent, fetch_model_details, fetch_generation_details
+from scraper.browser.interception import RequestInterceptor
+from scraper.browser.pool import BrowserPool
 
 # Path for storing cookies/session state
 STORAGE_STATE_PATH = project_root / "scripts" / "autoevolution" / "cookies.json"
 
 
-async def main(brand_slug=None, model_slug=None, generation_url=None):
-    """The main entry point for the scraper."""
-    logger.info("\n" + "="*100)
-    logger.info("🚀 AUTOEVOLUTION SCRAPER STARTED")
-    logger.info("="*100)
-    
-    db = SessionLocal()
-    async with async_playwright() as p:
-        logger.info("🌐 Launching browser...")
-        browser = await p.chromium.launch(headless=False)
-        logger.info("✓ Browser launched successfully")
-        
-        # Load cookies if they exist, otherwise start fresh
-        context_options = {}
-        cookies_loaded = False
-        if STORAGE_STATE_PATH.exists():
-            logger.info(f"🍪 Loading saved cookies from {STORAGE_STATE_PATH}")
-            context_options["storage_state"] = str(STORAGE_STATE_PATH)
-            cookies_loaded = True
-        else:
-            logger.info("🍪 No saved cookies found, will handle consent on first page")
-        
-        context = await browser.new_context(**context_options)
-        
-        # Block ad and tracking requests at the browser level
-        ad_domains = [
-            'doubleclick.net', 'googlesyndication.com', 'google.com/recaptcha',
-            'lijit.com', 'rubiconproject.com', 'crwdcntrl.net', 'pubmatic.com',
-            'bidberry.net', 'adtrafficquality.google', 'safeframe', 'casalemedia.com',
-            'adsrvr.org', 'advertising.com', 'adnxs.com', 'quantserve.com',
-            'googletagmanager.com', 'googletagservices.com', 'google-analytics.com',
-            'scorecardresearch.com', 'amazon-adsystem.com', 'ads-twitter.com',
-            'facebook.net', 'outbrain.com', 'taboola.com', 'criteo.com',
-            'tappx.com', 'indexww.com', 'snigelweb.com', 'clearnview.com'
-        ]
-        
-        async def block_ads(route):
-            """Block ads and tracking scripts."""
-            if any(domain in route.request.url for domain in ad_domains):
-                # Only log blocked document requests (not all resources)
-                if route.request.resource_type == "document":
-                    logger.info(f"🚫 Blocked document: {route.request.url}")
-                else:
-                    logger.debug(f"🚫 Blocked resource: {route.request.url}")
-                await route.abort()
-            else:
-                await route.continue_()
-        
-        # Apply ad blocking to all requests
-        await context.route("**/*", block_ads)
-        logger.info(f"🛡️  Ad blocking enabled ({len(ad_domains)} domains blocked)")
-        
-        page = await context.new_page()
-        
-        # Comprehensive activity tracking
-        activity_log = {
+class ActivityTracker:
+    """Logs main-frame navigations of every pool page and counts all activity."""
+
+    def __init__(self, interceptor):
+        self.interceptor = interceptor
+        self.log = {
             "document_requests": 0,
             "all_requests": 0,
             "main_frame_navs": 0,
@@ -87,28 +38,34 @@ async def main(brand_slug=None, model_slug=None, generation_url=None):
             "page_loads": 0,
             "last_activity_time": None
         }
-        
-        def log_activity(event_type, details=""):
-            activity_log["last_activity_time"] = time.time()
-            timestamp = time.strftime("%H:%M:%S", time.localtime())
-            logger.info(f"[{timestamp}] {event_type} {details}")
-        
+
+    def log_activity(self, event_type, details=""):
+        self.log["last_activity_time"] = time.time()
+        timestamp = time.strftime("%H:%M:%S", time.localtime())
+        logger.info(f"[{timestamp}] {event_type} {details}")
+
+    async def setup_context(self, context):
+        """Pool hook for every new context: request interception and page creation logging."""
+        await self.interceptor.install(context)
+        context.on("page", lambda p: self.log_activity("🆕 New page created", p.url))
+
+    async def setup_page(self, page):
+        """Pool hook for every new page: subscribe to all of its activity."""
+        activity_log = self.log
+
         def on_request(request):
             activity_log["all_requests"] += 1
             
             # Log only MAIN FRAME document requests
             if request.resource_type == "document":
                 activity_log["document_requests"] += 1
-                is_main_frame = request.frame == page.main_frame
-                if is_main_frame:
-                    log_activity(f"🌐 [Navigation #{activity_log['document_requests']}]", 
-                               f"{request.method} → {request.url}")
+                if request.frame == page.main_frame:
+                    self.log_activity(f"🌐 [Navigation #{activity_log['document_requests']}]",
+                                      f"{request.method} → {request.url}")
         
         def on_response(response):
-            if response.request.resource_type == "document":
-                is_main_frame = response.request.frame == page.main_frame
-                if is_main_frame:
-                    log_activity(f"   ↳ Response", f"{response.status} {response.status_text}")
+            if response.request.resource_type == "document" and response.request.frame == page.main_frame:
+                self.log_activity(f"   ↳ Response", f"{response.status} {response.status_text}")
         
         def on_frame_navigated(frame):
             if frame == page.main_frame:
@@ -122,131 +79,159 @@ async def main(brand_slug=None, model_slug=None, generation_url=None):
         
         def on_page_load():
             activity_log["page_loads"] += 1
-            log_activity(f"✓ Page loaded", page.url)
+            self.log_activity(f"✓ Page loaded", page.url)
         
-        # Subscribe to ALL activity
         page.on("request", on_request)
         page.on("response", on_response)
         page.on("load", on_page_load)
         page.on("framenavigated", on_frame_navigated)
-        page.on("close", lambda: log_activity("❌ Page closed event", ""))
+        page.on("close", lambda: self.log_activity("❌ Page closed event", ""))
+
+
+async def scrape_generation_url(pool, db, generation_url):
+    """Scrape one generation page given by URL; brand, model and generation come from its title."""
+    async with pool.page() as page:
+        logger.info(f"📍 Navigating to generation page: {generation_url}")
+        await page.goto(generation_url, wait_until="domcontentloaded")
+        logger.info(f"✓ Page loaded: {page.url}")
+        
+        # Handle cookie consent on first page load
+        await handle_cookie_consent(page, cookies_loaded=pool.storage_state_loaded)
+        
+        title = await page.title()
+        logger.info(f"📄 Page title: {title}")
         
-        # Track context-level page creation
-        context.on("page", lambda p: log_activity("🆕 New page created", p.url))
+        match = re.search(r"^(.*?)\s(.*?)\s\((.*?)\)", title)
+        if not match:
+            logger.error(f"✗ Could not parse brand, model, and generation from title: '{title}'")
+            logger.error(f"   Expected format: 'Brand Model (Generation)'")
+            return
         
-        logger.info("✓ Browser context created")
-        logger.info("✓ Navigation tracking enabled (main frame only)\n")
+        brand_name, model_name, gen_name = match.groups()
+        logger.info(f"✓ Parsed page title:")
+        logger.info(f"   Brand: {brand_name}")
+        logger.info(f"   Model: {model_name}")
+        logger.info(f"   Generation: {gen_name}")
 
-        try:
-            if brand_slug:
-                logger.info(f"📋 MODE: Brand/Model scraping")
-                logger.info(f"   Brand: {brand_slug}")
-                brand, brand_created = get_or_create(db, Brand, name=brand_slug.upper())
-                if brand_created:
-                    logger.info(f"   ✓ Created brand in DB: {brand_slug.upper()}")
-                else:
-                    logger.info(f"   → Brand already exists: {brand_slug.upper()}")
-                
-                if model_slug:
-                    logger.info(f"   Model: {model_slug}")
-                    model_url = f"{BASE_URL}/{brand_slug}/{model_slug}/"
-                    await fetch_model_details(page, db, brand, model_slug, model_url, cookies_loaded=cookies_loaded)
-                else:
-                    logger.warning("⚠️  No model specified, skipping...")
-            
-            elif generation_url:
-                logger.info(f"📋 MODE: Direct generation URL scraping")
-                logger.info(f"   URL: {generation_url}")
-                logger.info(f"📍 Navigating to generation page...")
-                
-                await page.goto(generation_url, wait_until="domcontentloaded")
-                logger.info(f"✓ Page loaded: {page.url}")
-                
-                # Handle cookie consent on first page load
-                await handle_cookie_consent(page, cookies_loaded=cookies_loaded)
-                
-                title = await page.title()
-                logger.info(f"📄 Page title: {title}")
-                
-                match = re.search(r"^(.*?)\s(.*?)\s\((.*?)\)", title)
-                if not match:
-                    logger.error(f"✗ Could not parse brand, model, and generation from title: '{title}'")
-                    logger.error(f"   Expected format: 'Brand Model (Generation)'")
-                    return
-                
-                brand_name, model_name, gen_name = match.groups()
-                logger.info(f"✓ Parsed page title:")
-                logger.info(f"   Brand: {brand_name}")
-                logger.info(f"   Model: {model_name}")
-                logger.info(f"   Generation: {gen_name}")
+        brand, brand_created = await get_or_create_async(db, Brand, name=brand_name.upper())
+        model, model_created = await get_or_create_async(db, Model, brand_id=brand.id, name=model_name.upper())
+        
+        if brand_created:
+            logger.info(f"   ✓ Created brand in DB: {brand_name.upper()}")
+        if model_created:
+            logger.info(f"   ✓ Created model in DB: {model_name.upper()}")
 
-                brand, brand_created = get_or_create(db, Brand, name=brand_name.upper())
-                model, model_created = get_or_create(db, Model, brand_id=brand.id, name=model_name.upper())
-                
-                if brand_created:
-                    logger.info(f"   ✓ Created brand in DB: {brand_name.upper()}")
-                if model_created:
-                    logger.info(f"   ✓ Created model in DB: {model_name.upper()}")
+        gen, gen_created = await get_or_create_async(
+            db, Generation,
+            model_id=model.id,
+            gen_name=gen_name,
+            defaults={"url": generation_url}
+        )
+        if gen_created:
+            logger.info(f"   ✓ Created generation in DB: {gen_name}")
+        else:
+            logger.info(f"   → Generation already exists: {gen_name}")
+        
+        await fetch_generation_details(page, db, gen, cookies_loaded=pool.storage_state_loaded)
 
-                gen, gen_created = get_or_create(
-                    db, Generation,
-                    model_id=model.id,
-                    gen_name=gen_name,
-                    defaults={"url": generation_url}
-                )
-                if gen_created:
-                    logger.info(f"   ✓ Created generation in DB: {gen_name}")
-                else:
-                    logger.info(f"   → Generation already exists: {gen_name}")
-                
-                await fetch_generation_details(page, db, gen, cookies_loaded=cookies_loaded)
 
-            logger.info("\n💾 Committing database changes...")
-            db.commit()
-            logger.info("✓ Database changes committed")
+async def main(brand_slug=None, model_slug=None, generation_urls=None, pages=None, headless=False):
+    """The main entry point for the scraper."""
+    logger.info("\n" + "="*100)
+    logger.info("🚀 AUTOEVOLUTION SCRAPER STARTED")
+    logger.info("="*100)
+    
+    db = SessionLocal()
+    # Specs live in the DOM: ads, images, media and fonts are blocked, JS/CSS come from a disk cache
+    interceptor = RequestInterceptor.for_crawler("autoevolution")
+    tracker = ActivityTracker(interceptor)
+    # One browser for the whole run; generations are scraped on several pages at once
+    pool = BrowserPool(
+        size=pages,
+        headless=headless,
+        storage_state_path=STORAGE_STATE_PATH,
+        on_context=tracker.setup_context,
+        on_page=tracker.setup_page,
+    )
+    logger.info("🌐 Launching browser...")
+    await pool.start()
+    logger.info(f"✓ Browser launched successfully ({pool.size} pages)")
+    if pool.storage_state_loaded:
+        logger.info(f"🍪 Loaded saved cookies from {STORAGE_STATE_PATH}")
+    else:
+        logger.info("🍪 No saved cookies found, will handle consent on first page")
+    logger.info(f"🛡️  Blocking {len(interceptor.policy.blocked_domains)} ad domains and "
+                f"{', '.join(sorted(interceptor.policy.blocked_resource_types))} requests")
+    logger.info("✓ Navigation tracking enabled (main frame only)\n")
+
+    try:
+        if brand_slug:
+            logger.info(f"📋 MODE: Brand/Model scraping")
+            logger.info(f"   Brand: {brand_slug}")
+            brand, brand_created = await get_or_create_async(db, Brand, name=brand_slug.upper())
+            if brand_created:
+                logger.info(f"   ✓ Created brand in DB: {brand_slug.upper()}")
+            else:
+                logger.info(f"   → Brand already exists: {brand_slug.upper()}")
             
-            # Save cookies/session state for future runs
-            logger.info(f"🍪 Saving cookies to {STORAGE_STATE_PATH}...")
-            await context.storage_state(path=str(STORAGE_STATE_PATH))
-            logger.info(f"✓ Cookies saved")
+            if model_slug:
+                logger.info(f"   Model: {model_slug}")
+                model_url = f"{BASE_URL}/{brand_slug}/{model_slug}/"
+                await fetch_model_details(pool, db, brand, model_slug, model_url)
+            else:
+                logger.warning("⚠️  No model specified, skipping...")
+        
+        elif generation_urls:
+            logger.info(f"📋 MODE: Direct generation URL scraping ({len(generation_urls)} URLs)")
+            await asyncio.gather(*(scrape_generation_url(pool, db, url) for url in generation_urls))
 
-            logger.info("\n" + "="*100)
-            logger.info("✅ SCRAPING COMPLETED SUCCESSFULLY")
-            logger.info("="*100)
-            logger.info(f"📊 Activity Summary:")
-            logger.info(f"   • Main frame navigations: {activity_log['main_frame_navs']}")
-            logger.info(f"   • Document requests: {activity_log['document_requests']}")
-            logger.info(f"   • Page load events: {activity_log['page_loads']}")
-            logger.info(f"   • Total requests: {activity_log['all_requests']}")
-            logger.info("="*100 + "\n")
+        logger.info("\n💾 Committing database changes...")
+        await asyncio.to_thread(db.commit)
+        logger.info("✓ Database changes committed")
+        
+        # Save cookies/session state for future runs
+        logger.info(f"🍪 Saving cookies to {STORAGE_STATE_PATH}...")
+        await pool.save_storage_state()
+        logger.info(f"✓ Cookies saved")
 
-        except Exception as e:
-            logger.error("\n" + "="*100)
-            logger.error(f"❌ SCRAPING FAILED: {e}")
-            logger.error("="*100)
-            logger.error("Full error details:", exc_info=True)
-            logger.info("🔄 Rolling back database changes...")
-            db.rollback()
-            logger.info("✓ Database rollback completed")
-        finally:
-            logger.info("\n🧹 Starting cleanup...")
-            logger.info(f"   Active pages in context: {len(context.pages)}")
-            for idx, p in enumerate(context.pages, 1):
-                logger.info(f"   - Page {idx}: {p.url}")
-            
-            logger.info("   Closing browser...")
-            await browser.close()
-            logger.info("✓ Browser closed")
-            
-            db.close()
-            logger.info("✓ Database connection closed\n")
+        activity_log = tracker.log
+        logger.info("\n" + "="*100)
+        logger.info("✅ SCRAPING COMPLETED SUCCESSFULLY")
+        logger.info("="*100)
+        logger.info(f"📊 Activity Summary:")
+        logger.info(f"   • Main frame navigations: {activity_log['main_frame_navs']}")
+        logger.info(f"   • Document requests: {activity_log['document_requests']}")
+        logger.info(f"   • Page load events: {activity_log['page_loads']}")
+        logger.info(f"   • Total requests: {activity_log['all_requests']}")
+        logger.info(f"   • Pages used at once: {pool.stats.peak_in_use}, contexts recycled: {pool.stats.recycled}")
+        logger.info(f"   • Interception: {interceptor.stats.summary()}")
+        logger.info("="*100 + "\n")
+
+    except Exception as e:
+        logger.error("\n" + "="*100)
+        logger.error(f"❌ SCRAPING FAILED: {e}")
+        logger.error("="*100)
+        logger.error("Full error details:", exc_info=True)
+        logger.info("🔄 Rolling back database changes...")
+        db.rollback()
+        logger.info("✓ Database rollback completed")
+    finally:
+        logger.info("\n🧹 Starting cleanup...")
+        logger.info("   Closing browser...")
+        await pool.close()
+        logger.info("✓ Browser closed")
+        
+        db.close()
+        logger.info("✓ Database connection closed\n")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Scrape car specs from AutoEvolution.")
     parser.add_argument('--brand', type=str, help="Brand slug (e.g. bmw)")
     parser.add_argument('--model', type=str, help="Model slug (e.g. m5)")
-    parser.add_argument('--generation_url', type=str, help="Full generation URL to scrape directly.")
+    parser.add_argument('--generation_url', type=str, nargs='+', help="Full generation URL(s) to scrape directly.")
+    parser.add_argument('--pages', type=int, help="Pages scraped at once (default: settings.browser_pool_size)")
+    parser.add_argument('--headless', action='store_true', help="Run the browser without a window")
     args = parser.parse_args()
 
     if not any([args.brand, args.generation_url]):
@@ -255,6 +240,8 @@ if __name__ == "__main__":
         asyncio.run(main(
             brand_slug=args.brand,
             model_slug=args.model,
-            generation_url=args.generation_url
+            generation_urls=args.generation_url,
+            pages=args.pages,
+            headless=args.headless,
         ))
 
@@ -1,4 +1,5 @@
 """Core scraping functions for AutoEvolution."""
+import asyncio
 import sys
 from pathlib import Path
 
@@ -10,7 +11,7 @@ if str(project_root) not in sys.path:
 import re
 from db.models import Generation, Model, Spec, Version, Image
 from scripts.autoevolution.config import logger, BASE_URL
-from scripts.autoevolution.database import get_or_create
+from scripts.autoevolution.database import get_or_create, get_or_create_async, run_in_session
 from scripts.autoevolution.spec_extractor import extract_all_specs, flatten_specs_for_db
 from scripts.autoevolution.unit_parser import parse_specs_with_units
 
@@ -87,6 +88,18 @@ async def handle_cookie_consent(page, cookies_loaded=False):
     return False
 
 
+def store_version_specs(db, version_id, cleaned_data, gallery_images):
+    """Get or create a version's Spec row and its gallery Image rows."""
+    get_or_create(db, Spec, version_id=version_id, defaults=cleaned_data)
+    for img_data in gallery_images:
+        get_or_create(
+            db, Image,
+            version_id=version_id,
+            url=img_data["url"],
+            defaults={"caption": img_data.get("caption", "")}
+        )
+
+
 async def fetch_generation_details(page, db, generation_obj, cookies_loaded=False):
     """Scrapes all versions and specs for a given generation."""
     logger.info(f"      ╔{'═'*70}╗")
@@ -174,7 +187,7 @@ async def fetch_generation_details(page, db, generation_obj, cookies_loaded=Fals
             logger.debug(f"            Anchor ID: {anchor_id or 'N/A'}")
             logger.debug(f"            Full URL: {full_url}")
 
-            version, v_created = get_or_create(
+            version, v_created = await get_or_create_async(
                 db, Version,
                 generation_id=generation_obj.id,
                 version_name=version_name,
@@ -212,21 +225,12 @@ async def fetch_generation_details(page, db, generation_obj, cookies_loaded=Fals
                 if cleaned_data.get("top_speed_kph"):
                     logger.info(f"            🏁 Top Speed: {cleaned_data['top_speed_kph']} km/h")
                 
-                # Store specs in database
-                get_or_create(db, Spec, version_id=version.id, defaults=cleaned_data)
+                # Store specs and gallery images (up to 10) in database, in one round off the event loop
+                gallery_images = extra_data.get("gallery_images", [])[:10]
+                await run_in_session(db, store_version_specs, version.id, cleaned_data, gallery_images)
                 logger.info(f"            ✓ Stored {len(cleaned_data)} spec fields for {version_name}")
-                
-                # Store gallery images if available
-                if "gallery_images" in extra_data:
-                    image_count = len(extra_data["gallery_images"][:10])
-                    for img_data in extra_data["gallery_images"][:10]:  # Limit to 10 images
-                        get_or_create(
-                            db, Image,
-                            version_id=version.id,
-                            url=img_data["url"],
-                            defaults={"caption": img_data.get("caption", "")}
-                        )
-                    logger.info(f"            📷 Stored {image_count} images for {version_name}")
+                if gallery_images:
+                    logger.info(f"            📷 Stored {len(gallery_images)} images for {version_name}")
                 else:
                     logger.debug(f"            No gallery images found")
             else:
@@ -295,32 +299,38 @@ async def get_generation_links(page, brand_slug):
     return generation_links
 
 
-async def fetch_model_details(page, db, brand_obj, model_name, model_url, cookies_loaded=False):
-    """Scrapes all generations for a given model and inserts them into the DB."""
+async def fetch_model_details(pool, db, brand_obj, model_name, model_url):
+    """Scrapes all generations for a given model and inserts them into the DB.
+    
+    The model page is read on one pool page; its generations are then scraped
+    on as many pool pages at once as the pool has.
+    """
     logger.info(f"\n{'='*80}")
     logger.info(f"🚗 FETCHING MODEL: {model_name} (Brand: {brand_obj.name})")
     logger.info(f"{'='*80}")
     logger.info(f"📍 Navigating to: {model_url}")
     
-    await page.goto(model_url, wait_until="domcontentloaded")
-    logger.info(f"✓ Page loaded: {page.url}")
-    
-    # Handle cookie consent after navigation
-    await handle_cookie_consent(page, cookies_loaded=cookies_loaded)
-    
-    # Get or create model in database
-    model, model_created = get_or_create(db, Model, brand_id=brand_obj.id, name=model_name.upper())
-    if model_created:
-        logger.info(f"✓ Created new model in DB: {model_name}")
-    else:
-        logger.info(f"→ Model already exists in DB: {model_name}")
+    cookies_loaded = pool.storage_state_loaded
+    async with pool.page() as page:
+        await page.goto(model_url, wait_until="domcontentloaded")
+        logger.info(f"✓ Page loaded: {page.url}")
+        
+        # Handle cookie consent after navigation
+        await handle_cookie_consent(page, cookies_loaded=cookies_loaded)
+        
+        # Get or create model in database
+        model, model_created = await get_or_create_async(db, Model, brand_id=brand_obj.id, name=model_name.upper())
+        if model_created:
+            logger.info(f"✓ Created new model in DB: {model_name}")
+        else:
+            logger.info(f"→ Model already exists in DB: {model_name}")
 
-    # Extract brand slug from URL for filtering
-    brand_slug = brand_obj.name.lower().replace(" ", "-")
-    logger.debug(f"Using brand slug for filtering: '{brand_slug}'")
-    
-    # Get all generation links from the page
-    generation_links = await get_generation_links(page, brand_slug)
+        # Extract brand slug from URL for filtering
+        brand_slug = brand_obj.name.lower().replace(" ", "-")
+        logger.debug(f"Using brand slug for filtering: '{brand_slug}'")
+        
+        # Get all generation links from the page
+        generation_links = await get_generation_links(page, brand_slug)
     
     if not generation_links:
         logger.warning(f"⚠️  No generations found for {model_name} at {model_url}")
@@ -330,10 +340,9 @@ async def fetch_model_details(page, db, brand_obj, model_name, model_url, cookie
         logger.warning(f"   3. The page didn't load properly")
         return
     
-    logger.info(f"\n📋 Processing {len(generation_links)} generation(s)...")
+    logger.info(f"\n📋 Processing {len(generation_links)} generation(s) on up to {pool.size} pages...")
     
-    # Process all generations
-    for idx, gen_data in enumerate(generation_links, 1):
+    async def process_generation(idx, gen_data):
         try:
             gen_name = gen_data["name"]
             gen_url = gen_data["url"]
@@ -351,7 +360,7 @@ async def fetch_model_details(page, db, brand_obj, model_name, model_url, cookie
                 end_year = None if year_match.group(2) == 'present' else int(year_match.group(2))
                 logger.debug(f"   Extracted years: {start_year} - {end_year or 'present'}")
 
-            generation, gen_created = get_or_create(
+            generation, gen_created = await get_or_create_async(
                 db, Generation,
                 model_id=model.id,
                 gen_name=gen_name,
@@ -368,14 +377,18 @@ async def fetch_model_details(page, db, brand_obj, model_name, model_url, cookie
             
             # Now, fetch the versions for this generation
             logger.info(f"   🔄 Fetching version details for {gen_name}...")
-            await fetch_generation_details(page, db, generation, cookies_loaded=cookies_loaded)
+            async with pool.page() as page:
+                await fetch_generation_details(page, db, generation, cookies_loaded=cookies_loaded)
             logger.info(f"   ✓ Completed processing {gen_name}")
 
         except Exception as e:
             logger.error(f"   ✗ ERROR processing generation {gen_data.get('name', 'unknown')}: {e}", exc_info=True)
-            continue
+    
+    # Process all generations
+    await asyncio.gather(*(
+        process_generation(idx, gen_data) for idx, gen_data in enumerate(generation_links, 1)
+    ))
     
     logger.info(f"\n{'='*80}")
     logger.info(f"✓ COMPLETED MODEL: {model_name}")
     logger.info(f"{'='*80}\n")
-
@@ -0,0 +1,125 @@
+"""Benchmark HTML parser backends on search result pages.
+
+For every backend, measures parsing alone and parsing plus page analysis
+(container detection and field extraction, as the mobile.bg scraper does it),
+and checks that the backends agree on what they find.
+
+Usage:
+    python scripts/benchmark_parsers.py
+    python scripts/benchmark_parsers.py saved_pages/*.html
+    python scripts/benchmark_parsers.py --corpus        # the benchmarks/ corpus pages
+    python scripts/benchmark_parsers.py --backends lxml lexbor --repeat 10
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add project root to the Python path
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.harness import Column, best_time, format_header, format_row, load_pages
+from scraper.html_parser import PARSER_BACKENDS, parse_html
+from scraper.intelligent_extractor import IntelligentFieldExtractor
+
+# Card fragments of a synthetic mobile.bg result page
+CARD_FIELDS = [
+    ("2019 г.", "2020 г.", "2021 г.", "2023 г."),
+    ("113 000 км", "45 500 км", "8 900 км"),
+    ("Бензинов", "Хибрид"),
+    ("625 к.с.", "600 к.с."),
+    ("Автоматична",),
+    ("Черен", "Бял", "Сив металик"),
+    ("гр. София", "гр. Пловдив", "гр. Варна"),
+]
+
+
+def synthetic_page(cards: int, seed: int) -> bytes:
+    """A result page shaped like mobile.bg's: header, nested cards, pagination, scripts."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(cards):
+        details = "".join(f"<span>{rng.choice(values)}</span>, " for values in CARD_FIELDS)
+        items.append(
+            f'<div class="item" id="ad{i}"><div class="photo">'
+            f'<a href="/obiava-{11700000000 + i}-bmw-m5"><img src="https://cdn.mobile.bg/photos/{i}/1.webp"></a>'
+            f'</div><div class="text"><div class="zaglavie"><a href="/obiava-{11700000000 + i}-bmw-m5">BMW M5 Competition</a></div>'
+            f'<div class="price"><div>{rng.randint(80, 250)} {rng.randint(100, 999)} лв.</div></div>'
+            f'<div class="params">{details}</div>'
+            f'<div class="info">Обявата е редактирана<!-- ad {i} --></div></div></div>'
+        )
+    pagination = "".join(f'<a href="?page={n}">{n}</a>' for n in range(1, 6))
+    html = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>BMW M5</title>'
+        '<script>var ads = {"count": 20};</script><style>.item{margin:0}</style></head>'
+        f'<body><header><nav><ul>{"<li><a href=/>Меню</a></li>" * 12}</ul></nav></header>'
+        f'<main><section class="results">{"".join(items)}</section>'
+        f'<div class="pagination">{pagination}</div></main><footer><p>mobile.bg</p></footer></body></html>'
+    )
+    return html.encode("utf-8")
+
+
+COLUMNS = [
+    Column("backend", 12, align="<"), Column("parse", 10, ".2f"), Column("parse+extract", 14, ".2f"), Column("containers", 11),
+]
+
+
+def synthetic_pages(count: int) -> List[Tuple[str, bytes]]:
+    return [(f"synthetic-{i}", synthetic_page(20, seed=i)) for i in range(count)]
+
+
+def page_summary(extractor: IntelligentFieldExtractor, content: bytes, backend: str) -> List[Dict]:
+    """What the scraper would see: score and fields of each detected container."""
+    containers = extractor.analyze_page_structure(parse_html(content, backend))
+    return [{"score": round(c["score"], 6), "fields": c["fields"]} for c in containers]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends.")
+    parser.add_argument("pages", nargs="*", type=Path, help="Saved result pages (default: synthetic pages)")
+    parser.add_argument("--backends", nargs="+", default=list(PARSER_BACKENDS), choices=PARSER_BACKENDS)
+    parser.add_argument("--corpus", action="store_true", help="Benchmark the corpus pages")
+    parser.add_argument("--synthetic", type=int, default=5, help="Synthetic page count")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages) if args.pages or args.corpus else synthetic_pages(args.synthetic)
+    extractor = IntelligentFieldExtractor()
+
+    backends = []
+    for backend in args.backends:
+        try:
+            parse_html(b"<html></html>", backend)
+        except ImportError as e:
+            print(f"✗ Skipping {backend}: {e}")
+            continue
+        backends.append(backend)
+
+    print(f"Benchmarking {len(pages)} pages (best of {args.repeat}, ms per page)\n")
+    print(format_header(COLUMNS))
+
+    reference = None
+    for backend in backends:
+        parse = best_time(lambda: [parse_html(content, backend) for _, content in pages], args.repeat)
+        full = best_time(
+            lambda: [extractor.analyze_page_structure(parse_html(content, backend)) for _, content in pages],
+            args.repeat,
+        )
+        summaries = [page_summary(extractor, content, backend) for _, content in pages]
+        containers = sum(len(summary) for summary in summaries)
+        per_page = 1000 / len(pages)
+        print(format_row(COLUMNS, [backend, parse * per_page, full * per_page, containers]))
+
+        if reference is None:
+            reference = (backend, summaries)
+            continue
+        for (name, _), expected, actual in zip(pages, reference[1], summaries):
+            if expected != actual:
+                print(f"  ✗ {name}: {backend} results differ from {reference[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Micro-benchmark field-pattern packs: per-pattern regex loops vs compiled packs.
+
+The "legacy" side runs every pattern of a pack separately with ``re.finditer`` /
+``re.search`` on raw pattern strings, the way the extractors did before patterns
+became data. The "compiled" side uses the pack's combined named-group regexes.
+
+Usage:
+    python scripts/benchmark_patterns.py
+    python scripts/benchmark_patterns.py --packs default mobile_bg --containers 5000
+    python scripts/benchmark_patterns.py --html saved_pages/*.html
+    python scripts/benchmark_patterns.py --corpus      # containers of the benchmarks/ corpus pages
+"""
+import argparse
+import random
+import re
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add project root to the Python path
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.harness import Column, best_time, format_header, format_row, load_pages
+from scraper.patterns import FieldPattern, PatternPack, load_pattern_pack
+
+# Building blocks of synthetic listing cards
+CARD_PARTS = [
+    "BMW M5 Competition", "BMW M5 xDrive", "2019 г.", "2021 г.", "2023", "113 000 км",
+    "45 500 км", "12,500 km", "Черен", "Бял", "Сив металик", "Бензинов", "Хибрид",
+    "625 к.с.", "600 hp", "4395 куб.см", "Автоматична", "Седан", "109 999 лв",
+    "189 900 лв", "€ 89 000", "гр. София", "Пловдив", "Евро 6", "Дилър: Auto Plus",
+    "частно лице", "Нов внос", "VIP обява", "14456712345678", "Обявата е редактирана",
+]
+
+
+def synthetic_containers(count: int, seed: int = 42) -> List[str]:
+    """Listing-card texts assembled from typical mobile.bg fragments."""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.sample(CARD_PARTS, rng.randint(6, 14)))
+        for _ in range(count)
+    ]
+
+
+def html_containers(paths: Optional[List[Path]] = None) -> List[str]:
+    """Texts of the container elements of saved pages (default: the corpus pages)."""
+    from bs4 import BeautifulSoup
+    from scraper.intelligent_extractor import CONTAINER_TAGS
+
+    texts = []
+    for _, content in load_pages(paths):
+        soup = BeautifulSoup(content, "html.parser")
+        for element in soup.find_all(list(CONTAINER_TAGS)):
+            text = element.get_text(strip=True)
+            if text:
+                texts.append(text)
+    return texts
+
+
+def _legacy_value(match: re.Match, field: FieldPattern) -> Any:
+    """Convert a match the way the extractor did before packs (first group holds numbers)."""
+    if field.data_type in ("int", "float"):
+        value_str = match.group(1).replace(' ', '').replace(',', '')
+        value = float(value_str) if field.data_type == "float" else int(value_str)
+        return value / field.divisor if field.divisor else value
+    return match.group(0).strip()
+
+
+def legacy_best(pack: PatternPack) -> Callable[[str], Dict[str, Any]]:
+    """Best match per field, one ``re.finditer`` per raw pattern string."""
+    def extract(text: str) -> Dict[str, Any]:
+        results = {}
+        for field in pack.fields:
+            flags = re.IGNORECASE if field.ignore_case else 0
+            best_value, best_length = None, -1
+            for regex in field.patterns:
+                for match in re.finditer(regex, text, flags):
+                    try:
+                        value = _legacy_value(match, field)
+                    except (ValueError, IndexError):
+                        continue
+                    if field.is_valid(value) and len(match.group(0)) > best_length:
+                        best_value, best_length = value, len(match.group(0))
+            if best_value is not None:
+                results[field.name] = best_value
+        return results
+    return extract
+
+
+def legacy_first(pack: PatternPack) -> Callable[[str], Dict[str, Any]]:
+    """First match per field, one ``re.search`` per raw pattern string."""
+    def extract(text: str) -> Dict[str, Any]:
+        results = {}
+        for field in pack.fields:
+            flags = re.IGNORECASE if field.ignore_case else 0
+            for regex in field.patterns:
+                match = re.search(regex, text, flags)
+                if match:
+                    try:
+                        value = _legacy_value(match, field)
+                    except (ValueError, IndexError):
+                        continue
+                    if field.is_valid(value):
+                        results[field.name] = value
+                        break
+        return results
+    return extract
+
+
+def compiled_best(pack: PatternPack) -> Callable[[str], Dict[str, Any]]:
+    return pack.extract
+
+
+def compiled_first(pack: PatternPack) -> Callable[[str], Dict[str, Any]]:
+    def extract(text: str) -> Dict[str, Any]:
+        results = {}
+        lowered = text.lower()
+        for name in pack.compiled:
+            field_match = pack.first(name, text, lowered)
+            if field_match:
+                results[name] = field_match.value
+        return results
+    return extract
+
+
+COLUMNS = [
+    Column("pack", 12, align="<"), Column("mode", 6, align="<"), Column("legacy/s", 12, ",.0f"),
+    Column("compiled/s", 12, ",.0f"), Column("speedup", 8),
+]
+
+
+def measure(extract: Callable[[str], Dict[str, Any]], texts: List[str], repeat: int) -> float:
+    """Best-of-``repeat`` throughput in containers per second."""
+    best = best_time(lambda: [extract(text) for text in texts], repeat)
+    return len(texts) / best if best else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark field-pattern packs.")
+    parser.add_argument("--packs", nargs="+", default=["default", "mobile_bg"])
+    parser.add_argument("--containers", type=int, default=2000, help="Synthetic container count")
+    parser.add_argument("--html", nargs="*", type=Path, help="Saved result pages to take containers from")
+    parser.add_argument("--corpus", action="store_true", help="Take containers from the corpus pages")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.html or args.corpus:
+        texts = html_containers(args.html)
+    else:
+        texts = synthetic_containers(args.containers)
+    print(f"Benchmarking {len(texts)} containers (best of {args.repeat})\n")
+    print(format_header(COLUMNS))
+
+    for name in args.packs:
+        pack = load_pattern_pack(name)
+        for mode, legacy, compiled in (
+            ("best", legacy_best, compiled_best),
+            ("first", legacy_first, compiled_first),
+        ):
+            before = measure(legacy(pack), texts, args.repeat)
+            after = measure(compiled(pack), texts, args.repeat)
+            print(format_row(COLUMNS, [name, mode, before, after, f"{after / before:.1f}x"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Bulk-import historical car ads from NDJSON/CSV dumps.
+
+Rows are streamed into a temporary staging table with COPY and merged into
+``car_ads_raw`` with a single INSERT ... SELECT ... ON CONFLICT statement, which
+is orders of magnitude faster than going through the ORM one ad at a time.
+
+Usage:
+    python scripts/bulk_import.py dumps/mobile_bg_2024.ndjson
+    python scripts/bulk_import.py dumps/export.csv.gz --source-site mobile.bg --active
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# Add project root to the Python path
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from db.database import engine
+
+STAGING_TABLE = "car_ads_raw_staging"
+
+# (column, staging type) in COPY order
+IMPORT_COLUMNS = [
+    ("source_site", "varchar(100)"),
+    ("source_id", "varchar(255)"),
+    ("source_url", "text"),
+    ("raw_data", "jsonb"),
+    ("title", "varchar(255)"),
+    ("price", "double precision"),
+    ("currency", "varchar(10)"),
+    ("year", "integer"),
+    ("make", "varchar(100)"),
+    ("model", "varchar(100)"),
+    ("mileage", "integer"),
+    ("location", "varchar(255)"),
+    ("dealer_name", "varchar(255)"),
+    ("dealer_type", "varchar(50)"),
+    ("fuel_type", "varchar(50)"),
+    ("transmission", "varchar(50)"),
+    ("body_type", "varchar(50)"),
+    ("color", "varchar(50)"),
+    ("engine_power", "integer"),
+    ("engine_displacement", "double precision"),
+    ("image_urls", "jsonb"),
+    ("scraped_at", "timestamp"),
+]
+COLUMN_NAMES = [name for name, _ in IMPORT_COLUMNS]
+KEY_COLUMNS = ("source_site", "source_id")
+JSON_COLUMNS = {"raw_data", "image_urls"}
+INT_COLUMNS = {"year", "mileage", "engine_power"}
+FLOAT_COLUMNS = {"price", "engine_displacement"}
+# Truncate strings to the target column width instead of failing the whole COPY
+MAX_LENGTHS = {
+    name: int(sql_type[sql_type.index("(") + 1:-1])
+    for name, sql_type in IMPORT_COLUMNS
+    if sql_type.startswith("varchar")
+}
+
+# COPY text format escapes
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def open_dump(path: Path):
+    """Open a plain or gzip-compressed dump as text."""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def dump_format(path: Path) -> str:
+    """Infer the dump format from the file name."""
+    suffixes = [s.lower() for s in path.suffixes if s.lower() != ".gz"]
+    if suffixes and suffixes[-1] == ".csv":
+        return "csv"
+    return "ndjson"
+
+
+def iter_records(path: Path, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw records from an NDJSON or CSV dump without loading it into memory."""
+    with open_dump(path) as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield {k: (v if v != "" else None) for k, v in row.items()}
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def _normalize(column: str, value: Any) -> Optional[str]:
+    """Convert a record value into its COPY text representation (None -> NULL)."""
+    if value is None:
+        return None
+    if column in JSON_COLUMNS:
+        # CSV dumps carry JSON columns as already-encoded strings
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    if column in INT_COLUMNS:
+        return str(int(float(str(value).replace(" ", "").replace(",", ""))))
+    if column in FLOAT_COLUMNS:
+        return str(float(str(value).replace(" ", "").replace(",", "")))
+    value = str(value)
+    max_length = MAX_LENGTHS.get(column)
+    if max_length and len(value) > max_length:
+        value = value[:max_length]
+    return value
+
+
+class ImportStats:
+    """Counters reported at the end of an import."""
+
+    def __init__(self):
+        self.read = 0
+        self.skipped = 0
+
+
+def iter_copy_lines(
+    records: Iterable[Dict[str, Any]], stats: ImportStats, default_site: Optional[str] = None
+) -> Iterator[bytes]:
+    """Turn records into COPY text-format lines, skipping rows that cannot be keyed."""
+    for record in records:
+        stats.read += 1
+        if default_site and not record.get("source_site"):
+            record["source_site"] = default_site
+
+        try:
+            values = [_normalize(column, record.get(column)) for column in COLUMN_NAMES]
+        except (TypeError, ValueError):
+            stats.skipped += 1
+            continue
+
+        if not values[0] or not values[1] or not values[2]:
+            # source_site, source_id and source_url are required
+            stats.skipped += 1
+            continue
+
+        line = "\t".join(
+            "\\N" if v is None else v.translate(_COPY_ESCAPES) for v in values
+        )
+        yield (line + "\n").encode("utf-8")
+
+
+class CopyStream(io.RawIOBase):
+    """Minimal file-like wrapper so ``copy_expert`` pulls lines lazily from a generator."""
+
+    def __init__(self, lines: Iterator[bytes]):
+        self._lines = lines
+        self._buffer = bytearray()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer.extend(next(self._lines))
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
+
+
+def create_staging_table(cursor):
+    """Create the staging table - temporary, so no WAL, no indexes, no constraints.
+
+    The table is private to the import's session and dropped when its
+    transaction ends, committed or not: concurrent imports never see each
+    other's rows, and a crashed import leaves nothing behind. It is not part
+    of the Alembic-managed schema.
+    """
+    columns_sql = ",\n    ".join(f"{name} {sql_type}" for name, sql_type in IMPORT_COLUMNS)
+    cursor.execute(f"CREATE TEMP TABLE {STAGING_TABLE} (\n    {columns_sql}\n) ON COMMIT DROP")
+
+
+def merge_sql(mark_active: bool, skip_existing: bool) -> str:
+    """Build the single INSERT ... SELECT ... ON CONFLICT statement that merges staging rows."""
+    columns = ", ".join(COLUMN_NAMES)
+    select_columns = ", ".join(
+        "COALESCE(scraped_at, now())" if name == "scraped_at" else name for name in COLUMN_NAMES
+    )
+    active = "true" if mark_active else "false"
+
+    if skip_existing:
+        conflict = "DO NOTHING"
+    else:
+        updates = ",\n        ".join(
+            f"{name} = EXCLUDED.{name}" for name in COLUMN_NAMES if name not in KEY_COLUMNS
+        )
+        # Never let an older dump overwrite data scraped later
+        conflict = (
+            f"DO UPDATE SET\n        {updates}\n"
+            f"    WHERE car_ads_raw.scraped_at <= EXCLUDED.scraped_at"
+        )
+
+    # DISTINCT ON keeps the newest row per key - ON CONFLICT cannot touch a row twice
+    return f"""
+    INSERT INTO car_ads_raw ({columns}, is_active, is_processed)
+    SELECT DISTINCT ON (source_site, source_id) {select_columns}, {active}, false
+    FROM {STAGING_TABLE}
+    ORDER BY source_site, source_id, scraped_at DESC NULLS LAST
+    ON CONFLICT (source_site, source_id) {conflict}
+    """
+
+
+def bulk_import(
+    path: Path,
+    default_site: Optional[str] = None,
+    mark_active: bool = False,
+    skip_existing: bool = False,
+) -> Dict[str, Any]:
+    """Import one dump file and return timing statistics."""
+    fmt = dump_format(path)
+    stats = ImportStats()
+    started = time.perf_counter()
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        create_staging_table(cursor)
+
+        stream = CopyStream(iter_copy_lines(iter_records(path, fmt), stats, default_site))
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(COLUMN_NAMES)}) FROM STDIN WITH (FORMAT text)",
+            stream,
+            size=1 << 16,
+        )
+        staged = cursor.rowcount
+        copied_at = time.perf_counter()
+
+        cursor.execute(merge_sql(mark_active, skip_existing))
+        merged = cursor.rowcount
+        connection.commit()
+        merged_at = time.perf_counter()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    copy_seconds = copied_at - started
+    merge_seconds = merged_at - copied_at
+    total_seconds = merged_at - started
+    return {
+        "file": str(path),
+        "format": fmt,
+        "read": stats.read,
+        "skipped": stats.skipped,
+        "staged": staged,
+        "merged": merged,
+        "copy_seconds": round(copy_seconds, 2),
+        "merge_seconds": round(merge_seconds, 2),
+        "total_seconds": round(total_seconds, 2),
+        "copy_rows_per_sec": round(staged / copy_seconds) if copy_seconds else staged,
+        "rows_per_sec": round(staged / total_seconds) if total_seconds else staged,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import historical car ads via COPY.")
+    parser.add_argument("paths", nargs="+", type=Path, help="NDJSON/CSV dump files (optionally .gz)")
+    parser.add_argument("--source-site", help="source_site for rows that do not carry one")
+    parser.add_argument(
+        "--active",
+        action="store_true",
+        help="Import ads as active (default: inactive, since historical ads are usually gone)",
+    )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Leave ads that already exist untouched instead of updating them",
+    )
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if not path.exists():
+            print(f"✗ File not found: {path}")
+            continue
+
+        print(f"Importing {path}...")
+        result = bulk_import(
+            path,
+            default_site=args.source_site,
+            mark_active=args.active,
+            skip_existing=args.skip_existing,
+        )
+        print(
+            f"  ✓ Staged {result['staged']} rows in {result['copy_seconds']}s "
+            f"({result['copy_rows_per_sec']} rows/sec), skipped {result['skipped']}"
+        )
+        print(f"  ✓ Merged {result['merged']} rows in {result['merge_seconds']}s")
+        print(f"  Total: {result['total_seconds']}s ({result['rows_per_sec']} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
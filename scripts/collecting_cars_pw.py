@@ -1,15 +1,94 @@
-from playwright.sync_api import sync_playwright
-from playwright_stealth.stealth import Stealth
+"""CollectingCars ad scraper: structured data and gallery images of auction lots.
+
+Several lots are scraped at once, each on its own page of one shared browser
+(see ``scraper/browser/pool.py``). A lot's gallery URLs are collected from its
+page in one pass - the best srcset candidate of every image, lightbox links
+and the data embedded in the page - so the time per lot does not grow with
+the number of slides; stepping through the lightbox slide by slide is only the
+fallback. The images are then downloaded concurrently over HTTP with the
+page's cookies (``scraper/browser/downloads.py``).
+
+Lots are stored as ``car_ads_raw`` rows, their images in content-addressable
+storage under their checksum (a file that is already stored is not stored
+twice) and linked to the row through ``local_image_paths``. Database work runs
+on worker threads - one lookup and one commit per lot - so it never stalls the
+other lots' pages.
+
+Usage:
+    python scripts/collecting_cars_pw.py https://collectingcars.com/for-sale/<lot> [<lot URL> ...]
+"""
 import argparse
-from pathlib import Path
-from urllib.parse import urlparse
-import random
-import sys
-import json
+import asyncio
 import hashlib
+import json
 import shutil
-from db import SessionLocal, Ad, Image
+import sys
+import time
+import uuid
+from collections import Counter
 from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Add project root to the Python path
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from playwright_stealth.stealth import Stealth
+
+from db import CarAdRaw, SessionLocal
+from scraper.browser.downloads import ContextDownloader
+from scraper.browser.interception import RequestInterceptor
+from scraper.browser.pool import BrowserPool
+
+GALLERY_HOST = "images.collectingcars.com"
+
+# Every gallery image URL of a page in one round trip: per image the best srcset
+# candidate (weighted as in _best_srcset_candidate) or the first src/data-*
+# attribute on the gallery host, lightbox links, and the text of the embedded
+# page data (Next.js state, JSON islands, JSON-LD) for _image_urls_in_json
+_GALLERY_HARVEST_SCRIPT = """(host) => {
+  const bestFromSrcset = (srcset) => {
+    let best = null;
+    for (const part of srcset.split(',').map(p => p.trim()).filter(Boolean)) {
+      const [url, descriptor] = part.split(/\\s+/);
+      let weight = 0;
+      if (descriptor && descriptor.endsWith('w')) weight = parseInt(descriptor, 10) || 0;
+      else if (descriptor && descriptor.endsWith('x')) weight = Math.trunc(parseFloat(descriptor) * 1000) || 0;
+      if (!best || weight > best.weight || (weight === best.weight && url > best.url)) best = {weight, url};
+    }
+    return best ? best.url : null;
+  };
+  const onHost = (value) => {
+    if (!value) return null;
+    try {
+      const url = new URL(value, document.baseURI).toString();
+      return url.includes(host) ? url : null;
+    } catch (e) {
+      return null;
+    }
+  };
+  const dom = [];
+  const add = (...values) => {
+    for (const value of values) {
+      const url = onHost(value);
+      if (url) { dom.push(url); return; }
+    }
+  };
+  for (const el of document.querySelectorAll('img, picture source')) {
+    const srcset = el.getAttribute('srcset') || el.getAttribute('data-srcset');
+    add(srcset && bestFromSrcset(srcset), el.getAttribute('src'), el.getAttribute('data-src'),
+        el.getAttribute('data-original'), el.getAttribute('data-lg-src'));
+  }
+  for (const el of document.querySelectorAll('a[href], [data-lg-src]:not(img), [data-src]:not(img)')) {
+    add(el.getAttribute('data-lg-src'), el.getAttribute('data-src'), el.getAttribute('href'));
+  }
+  const json = Array.from(document.querySelectorAll(
+    'script#__NEXT_DATA__, script[type="application/json"], script[type="application/ld+json"]'
+  )).map(s => s.textContent);
+  return {dom, json};
+}"""
 
 
 def ensure_unique_path(path: Path) -> Path:
@@ -32,30 +111,102 @@ def _filename_from_url(url: str) -> str:
     return name or "image"
 
 
-def _accept_cookies(page):
+def _image_filename(url: str) -> str:
+    fname = _filename_from_url(url)
+    if not fname.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
+        fname += ".jpg"
+    return fname
+
+
+def _width_param(url: str) -> int:
+    try:
+        return int(parse_qs(urlparse(url).query).get("w", ["0"])[0])
+    except ValueError:
+        return 0
+
+
+def _unique_images(urls: list[str]) -> list[str]:
+    """One URL per image, in first-seen order: the CDN serves every size of a path, keep the widest."""
+    best: dict[str, str] = {}
+    for url in urls:
+        key = urlparse(url)._replace(query="", fragment="").geturl()
+        if key not in best or _width_param(url) > _width_param(best[key]):
+            best[key] = url
+    return list(best.values())
+
+
+def _lot_gallery(urls: list[str]) -> list[str]:
+    """The lot's own images among ``urls``, one URL each, in first-seen order.
+
+    A page also shows images of other lots (recommendations, the header), so
+    only the image folder that occurs most often - the lot's own - is kept.
+    """
+    folders = Counter(urlparse(url).path.strip("/").split("/")[0] for url in urls)
+    if not folders:
+        return []
+    lot_folder = folders.most_common(1)[0][0]
+    return _unique_images([url for url in urls if urlparse(url).path.strip("/").split("/")[0] == lot_folder])
+
+
+def _image_urls_in_json(data) -> list[str]:
+    """Gallery-host image URLs anywhere in parsed JSON, in document order."""
+    urls = []
+
+    def walk(value):
+        if isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+        elif isinstance(value, str) and GALLERY_HOST in value and value.startswith(("https://", "http://", "//")):
+            urls.append("https:" + value if value.startswith("//") else value)
+
+    walk(data)
+    return urls
+
+
+async def _harvest_gallery(page) -> list[str]:
+    """All gallery image URLs of the lot with one ``page.evaluate``, without touching the lightbox."""
+    try:
+        # The gallery may render after DOMContentLoaded
+        await page.wait_for_selector(f'img[src*="{GALLERY_HOST}"], a[href*="{GALLERY_HOST}"]', timeout=5000)
+    except Exception:
+        pass
+    found = await page.evaluate(_GALLERY_HARVEST_SCRIPT, GALLERY_HOST)
+    urls = list(found["dom"])
+    for text in found["json"]:
+        try:
+            urls.extend(_image_urls_in_json(json.loads(text)))
+        except (TypeError, ValueError):
+            continue
+    return _lot_gallery(urls)
+
+
+async def _accept_cookies(page):
     try:
-        page.wait_for_selector('a:has-text("Accept all")', timeout=8000)
-        page.click('a:has-text("Accept all")')
-        page.wait_for_load_state("domcontentloaded")
+        await page.wait_for_selector('a:has-text("Accept all")', timeout=8000)
+        await page.click('a:has-text("Accept all")')
+        await page.wait_for_load_state("domcontentloaded")
     except Exception:
         pass
 
 
-def _open_first_gallery_item(page):
+async def _open_first_gallery_item(page):
     # Try clicking a gallery image link to open the lightbox
     for selector in [
         'section a[href*="images.collectingcars.com"]',
         'a[href*="images.collectingcars.com"]',
         'img[loading][src*="images.collectingcars.com"]',
     ]:
-        links = page.query_selector_all(selector)
+        links = await page.query_selector_all(selector)
         if links:
-            links[0].click()
+            await links[0].click()
             return True
     return False
 
 
-def _find_main_image_locator(page):
+async def _find_main_image_locator(page):
     # Prefer lightGallery active slide selectors first
     candidates = [
         '.lg-item.lg-current img.lg-object',
@@ -73,20 +224,20 @@ def _find_main_image_locator(page):
     for sel in candidates:
         loc = page.locator(sel).filter(has_text=None)
         try:
-            loc.first.wait_for(state="visible", timeout=5000)
+            await loc.first.wait_for(state="visible", timeout=5000)
             return loc.first
         except Exception:
             continue
     return None
 
 
-def _click_next(page):
+async def _click_next(page):
     # Try provided XPath first, then multiple next-button selectors; return False if none clickable
     try:
         xpath = "//html/body/div[22]/div/div[3]/button[2]"
         btn = page.locator(f"xpath={xpath}")
-        if btn.count() > 0:
-            btn.first.click()
+        if await btn.count() > 0:
+            await btn.first.click()
             return True
     except Exception:
         pass
@@ -106,69 +257,77 @@ def _click_next(page):
     ]:
         try:
             btn = page.locator(sel).first
-            if btn.count() > 0:
-                btn.click()
+            if await btn.count() > 0:
+                await btn.click()
                 return True
         except Exception:
             continue
     return False
 
 
-def _pick_best_image_url(img_loc):
+def _best_srcset_candidate(srcset: str) -> str | None:
+    """The largest candidate of a srcset (mirrored in _GALLERY_HARVEST_SCRIPT)."""
+    # srcset format: "url1 320w, url2 640w, ..." or with pixel densities
+    candidates = []
+    for part in [p.strip() for p in srcset.split(",") if p.strip()]:
+        bits = part.split()
+        url = bits[0]
+        weight = 0
+        if len(bits) > 1:
+            descriptor = bits[1]
+            if descriptor.endswith("w"):
+                try:
+                    weight = int(descriptor[:-1])
+                except Exception:
+                    weight = 0
+            elif descriptor.endswith("x"):
+                try:
+                    # multiply by 1000 so 2x > 1000w thumbnails
+                    weight = int(float(descriptor[:-1]) * 1000)
+                except Exception:
+                    weight = 0
+        candidates.append((weight, url))
+    if candidates:
+        candidates.sort()
+        return candidates[-1][1]
+    return None
+
+
+async def _pick_best_image_url(img_loc):
     """Pick the highest-quality image URL from the element's src/srcset/data-* attributes."""
     # Prefer srcset largest width if present
-    srcset = img_loc.get_attribute("srcset")
+    srcset = await img_loc.get_attribute("srcset")
     if srcset:
-        # srcset format: "url1 320w, url2 640w, ..." or with pixel densities
-        candidates = []
-        for part in [p.strip() for p in srcset.split(",") if p.strip()]:
-            bits = part.split()
-            url = bits[0]
-            weight = 0
-            if len(bits) > 1:
-                descriptor = bits[1]
-                if descriptor.endswith("w"):
-                    try:
-                        weight = int(descriptor[:-1])
-                    except Exception:
-                        weight = 0
-                elif descriptor.endswith("x"):
-                    try:
-                        # multiply by 1000 so 2x > 1000w thumbnails
-                        weight = int(float(descriptor[:-1]) * 1000)
-                    except Exception:
-                        weight = 0
-            candidates.append((weight, url))
-        if candidates:
-            candidates.sort()
-            return candidates[-1][1]
+        best = _best_srcset_candidate(srcset)
+        if best:
+            return best
 
     # Fallbacks
     for attr in ["src", "data-src", "data-original", "data-lg-src"]:
-        val = img_loc.get_attribute(attr)
+        val = await img_loc.get_attribute(attr)
         if val:
             return val
     return None
 
 
-def _get_element_current_src(page, img_loc):
+async def _get_element_current_src(page, img_loc):
     """Use the browser's chosen resource via HTMLImageElement.currentSrc, fallback to src.
     Always resolve to absolute URL using the page URL as base.
     """
     try:
-        current = page.evaluate(
+        current = await page.evaluate(
             "(el) => el.currentSrc || el.src || null",
-            img_loc.element_handle(),
+            await img_loc.element_handle(),
         )
     except Exception:
         current = None
     if not current:
-        current = _pick_best_image_url(img_loc)
+        current = await _pick_best_image_url(img_loc)
     if not current:
         return None
     try:
         # Resolve relative URLs against the current page URL
-        abs_url = page.evaluate(
+        abs_url = await page.evaluate(
             "(args) => new URL(args.u, args.base).toString()",
             {"u": current, "base": page.url},
         )
@@ -177,12 +336,12 @@ def _get_element_current_src(page, img_loc):
         return current
 
 
-def _wait_for_image_loaded(page, img_loc, timeout_ms=8000):
+async def _wait_for_image_loaded(page, img_loc, timeout_ms=8000):
     """Wait until the image has a positive naturalWidth/Height (loaded)."""
     try:
-        page.wait_for_function(
+        await page.wait_for_function(
             "(el) => el && el.naturalWidth > 0 && el.naturalHeight > 0",
-            arg=img_loc.element_handle(),
+            arg=await img_loc.element_handle(),
             timeout=timeout_ms,
         )
         return True
@@ -190,10 +349,10 @@ def _wait_for_image_loaded(page, img_loc, timeout_ms=8000):
         return False
 
 
-def _wait_for_new_image(page, previous_url: str | None, timeout_ms=12000) -> bool:
+async def _wait_for_new_image(page, previous_url: str | None, timeout_ms=12000) -> bool:
     """Wait until the currently visible gallery image has a different currentSrc/src from previous_url and is loaded."""
     try:
-        page.wait_for_function(
+        await page.wait_for_function(
             "(prev) => {\n"
             "  const imgs = Array.from(document.querySelectorAll('img'));\n"
             "  // Prefer images hosted by images.collectingcars.com if present\n"
@@ -221,7 +380,7 @@ def _wait_for_new_image(page, previous_url: str | None, timeout_ms=12000) -> boo
         return False
 
 
-def _get_download_href(page):
+async def _get_download_href(page):
     """Try to read the lightGallery download link href (e.g., a#lg-download)."""
     for sel in [
         'a#lg-download',
@@ -231,8 +390,8 @@ def _get_download_href(page):
     ]:
         try:
             loc = page.locator(sel).first
-            if loc.count() > 0:
-                href = loc.get_attribute('href')
+            if await loc.count() > 0:
+                href = await loc.get_attribute('href')
                 if href:
                     return href
         except Exception:
@@ -240,25 +399,6 @@ def _get_download_href(page):
     return None
 
 
-def _download_via_new_tab(page, url: str, outpath: Path, referer: str) -> bool:
-    """Open image URL in a new tab with Referer, save response body if OK."""
-    try:
-        ctx = page.context
-        img_page = ctx.new_page()
-        resp = img_page.goto(url, wait_until='load', referer=referer)
-        if resp and resp.ok:
-            # Optional: ensure it's an image
-            ctype = resp.headers.get('content-type', '') if hasattr(resp, 'headers') else ''
-            if 'image' in ctype or url.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
-                with open(outpath, 'wb') as f:
-                    f.write(resp.body())
-                img_page.close()
-                return True
-        img_page.close()
-    except Exception:
-        pass
-    return False
-
 def calculate_checksum(file_path):
     """Calculates the SHA256 checksum of a file."""
     sha256 = hashlib.sha256()
@@ -267,26 +407,38 @@ def calculate_checksum(file_path):
             sha256.update(byte_block)
     return sha256.hexdigest()
 
-def store_image(temp_path: Path, storage_root: Path) -> tuple[Path, str]:
-    """Calculates checksum and moves image to content-addressable storage."""
-    checksum = calculate_checksum(temp_path)
-    dest_dir = storage_root / checksum[:2] / checksum[2:4]
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    final_path = dest_dir / temp_path.name
-    shutil.move(temp_path, final_path)
+def stored_image_path(storage_root: Path, checksum: str, suffix: str = ".jpg") -> Path:
+    """Where content-addressable storage keeps the image with ``checksum``."""
+    return storage_root / checksum[:2] / checksum[2:4] / f"{checksum}{suffix}"
+
+
+def store_image(
+    temp_path: Path, storage_root: Path, checksum: str | None = None, suffix: str = ".jpg"
+) -> tuple[Path, str]:
+    """Moves image to content-addressable storage, calculating its checksum unless given.
+
+    An image that is already stored is not stored again - the download is dropped.
+    """
+    checksum = checksum or calculate_checksum(temp_path)
+    final_path = stored_image_path(storage_root, checksum, suffix)
+    if final_path.exists():
+        temp_path.unlink()
+    else:
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(temp_path, final_path)
     return final_path, checksum
 
-def _scrape_structured_data(page) -> dict:
+async def _scrape_structured_data(page) -> dict:
     """Scrapes key structured data from the ad page."""
     data = {}
     try:
         # Car Overview Section
         overview_selector = 'h2:has-text("Car Overview") + ul'
         overview_list = page.locator(overview_selector)
-        if overview_list.count() > 0:
-            items = overview_list.locator("li").all()
+        if await overview_list.count() > 0:
+            items = await overview_list.locator("li").all()
             for item in items:
-                text = item.inner_text()
+                text = await item.inner_text()
                 if not text:
                     continue
                 # Simple pattern matching for now
@@ -307,13 +459,14 @@ def _scrape_structured_data(page) -> dict:
         # Lot Overview Section for location
         lot_selector = 'h2:has-text("Lot Overview") + ul'
         lot_list = page.locator(lot_selector)
-        if lot_list.count() > 0:
+        if await lot_list.count() > 0:
             # Location is typically the last item
             location_item = lot_list.locator("li").last
-            if location_item and "United Kingdom" in location_item.inner_text(): # a bit specific
-                 data["location"] = location_item.inner_text()
-            elif lot_list.locator("li >> nth=-1"):
-                 data["location"] = lot_list.locator("li >> nth=-1").inner_text()
+            location_text = await location_item.inner_text()
+            if "United Kingdom" in location_text: # a bit specific
+                 data["location"] = location_text
+            else:
+                 data["location"] = await lot_list.locator("li >> nth=-1").inner_text()
 
 
     except Exception as e:
@@ -321,156 +474,220 @@ def _scrape_structured_data(page) -> dict:
     
     return data
 
-def main():
-    parser = argparse.ArgumentParser(description="CollectingCars ad scraper")
-    parser.add_argument("url", help="Full URL of the CollectingCars listing to scrape.")
-    parser.add_argument(
-        "--storage-dir",
-        default="datasets/storage",
-        help="Base directory for content-addressable image storage (default: 'datasets/storage')",
-    )
-    parser.add_argument("--headless", action="store_true", default=True)
-    parser.add_argument("--limit", type=int, default=20, help="Max number of new images to save.")
-    parser.add_argument("--delay-ms", type=int, default=1000, help="Delay between slides (ms).")
-    args = parser.parse_args()
 
-    storage_root = Path(args.storage_dir)
-    storage_root.mkdir(parents=True, exist_ok=True)
-    temp_dir = storage_root / "temp"
-    temp_dir.mkdir(exist_ok=True)
+async def _walk_gallery(page, args) -> list[str]:
+    """Collect image URLs by stepping through the lightbox slide by slide (when the page data has none)."""
+    urls = []
+    seen_urls = set()
+    while True:
+        img_loc = await _find_main_image_locator(page)
+        if not img_loc:
+            print("Could not find main image locator. Ending.")
+            break
+
+        await page.wait_for_timeout(args.delay_ms)
+        await _wait_for_image_loaded(page, img_loc, timeout_ms=10000)
+        target_url = await _get_element_current_src(page, img_loc)
+        if urls and target_url == urls[0] and len(urls) > 1:
+            # Back at the first slide - the gallery wrapped around
+            break
+        if target_url and target_url not in seen_urls:
+            seen_urls.add(target_url)
+            urls.append(target_url)
+
+        if not await _click_next(page):
+            print("Could not find next button. Ending.")
+            break
+        if not await _wait_for_new_image(page, target_url, timeout_ms=max(8000, args.delay_ms + 3000)):
+            await page.wait_for_timeout(int(args.delay_ms * 1.5))
+    return urls
+
+
+async def _download_new_images(
+    page, image_urls, args, linked_paths: set[str], storage_root: Path, temp_dir: Path
+) -> list[tuple[str, str]]:
+    """Download gallery images concurrently until ``args.limit`` images new to the ad are stored.
+
+    Returns (image URL, stored path) of each; images whose stored path is
+    already in ``linked_paths`` are skipped.
+    """
+    new_images = []
+    seen_paths = set(linked_paths)
+    pending = list(image_urls)
+    downloaded = 0
+    started = time.monotonic()
+    async with await ContextDownloader.from_page(page) as downloader:
+        while pending and len(new_images) < args.limit:
+            # Never fetch more images than are still wanted; known ones are replaced next round
+            wanted = args.limit - len(new_images)
+            batch, pending = pending[:wanted], pending[wanted:]
+            results = await downloader.download_all(
+                [(image_url, temp_dir / f"{uuid.uuid4().hex}.part") for image_url in batch]
+            )
+            for result in results:
+                if result is None:
+                    continue
+                downloaded += result.size
+                checksum = result.checksum
+                suffix = Path(_image_filename(result.url)).suffix
+                stored_path = stored_image_path(storage_root, checksum, suffix).as_posix()
+                if stored_path in seen_paths:
+                    print(f"Image exists (checksum: {checksum[:10]}...). Skipping.")
+                    result.path.unlink()
+                    continue
+
+                seen_paths.add(stored_path)
+                final_path, checksum = store_image(result.path, storage_root, checksum, suffix)
+                new_images.append((result.url, final_path.as_posix()))
+                print(f"Queued new image: {final_path.name} (checksum: {checksum[:10]}...)")
+
+    print(f"Downloaded {downloaded / 1024:.0f} KiB of images in {time.monotonic() - started:.1f}s.")
+    return new_images
+
 
+def _linked_image_paths(source_site: str, source_id: str) -> tuple[bool, set[str]]:
+    """(ad exists, image paths already linked to it) - the lot's one lookup before downloading."""
     db = SessionLocal()
     try:
-        with Stealth().use_sync(sync_playwright()) as p:
-            browser = p.chromium.launch(headless=args.headless)
-            page = browser.new_context().new_page()
-            page.goto(args.url, wait_until="domcontentloaded")
+        row = db.query(CarAdRaw.local_image_paths).filter_by(source_site=source_site, source_id=source_id).first()
+        if row is None:
+            return False, set()
+        return True, set(row.local_image_paths or [])
+    finally:
+        db.close()
+
+
+def _save_lot(
+    url: str, source_site: str, source_id: str, title: str, structured_data: dict, new_images: list[tuple[str, str]]
+):
+    """Create or update the lot's ad and link its new images, in one commit."""
+    db = SessionLocal()
+    try:
+        ad_record = db.query(CarAdRaw).filter_by(source_site=source_site, source_id=source_id).first()
+        now = datetime.now(timezone.utc)
+        if ad_record:
+            print(f"Found existing Ad record (ID: {ad_record.id}). Checking for updates...")
+            ad_record.title = title
+            ad_record.raw_data = structured_data
+            ad_record.last_seen_at = now
+        elif new_images:
+            print("Creating new Ad record...")
+            ad_record = CarAdRaw(
+                source_site=source_site,
+                source_id=source_id,
+                source_url=url,
+                title=title,
+                raw_data=structured_data,
+                is_active=True,
+                last_seen_at=now,
+            )
+            db.add(ad_record)
+        else:
+            print(f"\nNo new images found for new ad {source_id}. No database changes were made.")
+            return
+
+        if new_images:
+            # New lists, so the JSONB columns are seen as changed
+            ad_record.image_urls = (ad_record.image_urls or []) + [image_url for image_url, _ in new_images]
+            ad_record.local_image_paths = (ad_record.local_image_paths or []) + [path for _, path in new_images]
+
+        is_new_ad = ad_record.id is None
+        if is_new_ad or db.is_modified(ad_record):
+            db.commit()
+            action = "Created" if is_new_ad else "Updated"
+            print(f"\nSUCCESS: {action} Ad record (ID: {ad_record.id}) and added {len(new_images)} new images.")
+        else:
+            print(f"\nNo changes detected for {source_id}. Database is already up to date.")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
-            _accept_cookies(page)
-            page.wait_for_timeout(1000)
+
+async def scrape_lot(pool: BrowserPool, url: str, args, storage_root: Path, temp_dir: Path):
+    """Scrape one lot on a pool page: its structured data and new gallery images, then save its ad."""
+    source_site = urlparse(url).netloc
+    source_id = Path(urlparse(url).path).name
+    try:
+        async with pool.page() as page:
+            await page.goto(url, wait_until="domcontentloaded")
+
+            await _accept_cookies(page)
+            await page.wait_for_timeout(1000)
 
             # --- Scrape all textual data first ---
-            title = page.title()
+            title = await page.title()
             print(f"Scraping ad: {title}")
-            structured_data = _scrape_structured_data(page)
+            structured_data = await _scrape_structured_data(page)
             print(f"Scraped structured data: {structured_data}")
 
-            # --- Check for existing ad and decide whether to create or update ---
-            source_site = urlparse(args.url).netloc
-            source_id = Path(urlparse(args.url).path).name
-            ad_record = db.query(Ad).filter_by(source_site=source_site, source_id=source_id).first()
-            is_new_ad = False
-
-            if ad_record:
-                print(f"Found existing Ad record (ID: {ad_record.id}). Checking for updates...")
-                ad_record.raw_title = title
-                ad_record.raw_data = structured_data
-                ad_record.last_scraped_at = datetime.now(timezone.utc)
-            else:
-                is_new_ad = True
-                print("Creating new Ad record...")
-                ad_record = Ad(
-                    source_site=source_site,
-                    source_id=source_id,
-                    source_url=args.url,
-                    raw_title=title,
-                    raw_data=structured_data,
-                    is_active=True
-                )
-                db.add(ad_record)
-                db.flush()
-
-            if not _open_first_gallery_item(page):
-                print("Could not open gallery lightbox, will scan for images on page.")
-
-            new_images_to_commit = []
-            seen_urls = set()
-            
-            # Initialize last_url to the currently displayed image when gallery opens
-            cur_loc = _find_main_image_locator(page)
-            last_url = _get_element_current_src(page, cur_loc) if cur_loc else None
-            if last_url:
-                seen_urls.add(last_url)
-
-            while len(new_images_to_commit) < args.limit:
-                img_loc = _find_main_image_locator(page)
-                if not img_loc:
-                    print("Could not find main image locator. Ending.")
-                    break
+            # --- Images the lot's ad already has are not stored again ---
+            ad_exists, linked_paths = await asyncio.to_thread(_linked_image_paths, source_site, source_id)
+            if ad_exists:
+                print(f"Lot {source_id} is already stored with {len(linked_paths)} images.")
 
-                try:
-                    page.wait_for_timeout(args.delay_ms)
-                    _wait_for_image_loaded(page, img_loc, timeout_ms=10000)
-                    
-                    target_url = _get_element_current_src(page, img_loc)
-                    if not target_url or target_url in seen_urls:
-                        # If we've seen this URL or can't find one, try advancing.
-                        if not _click_next(page): break
-                        continue
-
-                    seen_urls.add(target_url)
-                    fname = _filename_from_url(target_url)
-                    if not fname.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
-                        fname += ".jpg"
-                    
-                    temp_path = ensure_unique_path(temp_dir / fname)
-                    
-                    if _download_via_new_tab(page, target_url, temp_path, referer=args.url):
-                        final_path, checksum = store_image(temp_path, storage_root)
-                        
-                        image_exists = db.query(Image.id).filter_by(checksum=checksum).first()
-                        if not image_exists:
-                            new_image = Image(
-                                ad_id=ad_record.id,
-                                image_uri=final_path.as_posix(),
-                                checksum=checksum,
-                                status='raw'
-                            )
-                            new_images_to_commit.append(new_image)
-                            print(f"Queued new image: {final_path.name} (checksum: {checksum[:10]}...)")
-                        else:
-                            print(f"Image exists (checksum: {checksum[:10]}...). Skipping.")
-                            # Clean up the redundant download
-                            final_path.unlink()
-
-                    else:
-                        print(f"Failed to download image from {target_url}")
-
-                except Exception as e:
-                    print(f"Error processing image: {e}")
-
-                if not _click_next(page):
-                    print("Could not find next button. Ending.")
-                    break
-                
-                if not _wait_for_new_image(page, last_url, timeout_ms=max(8000, args.delay_ms + 3000)):
-                    page.wait_for_timeout(int(args.delay_ms * 1.5))
-                
-                next_img_loc = _find_main_image_locator(page)
-                if next_img_loc:
-                    last_url = _get_element_current_src(page, next_img_loc)
-
-            # --- Final Commit Logic ---
-            changes_made = db.is_modified(ad_record) or new_images_to_commit
-
-            if new_images_to_commit:
-                db.add_all(new_images_to_commit)
-
-            if is_new_ad and not new_images_to_commit:
-                db.rollback()
-                print("\nNo new images found for this new ad. No database changes were made.")
-            elif changes_made:
-                db.commit()
-                action = "Created" if is_new_ad else "Updated"
-                print(f"\nSUCCESS: {action} Ad record (ID: {ad_record.id}) and added {len(new_images_to_commit)} new images.")
+            image_urls = await _harvest_gallery(page)
+            if image_urls:
+                print(f"Found {len(image_urls)} gallery images on the page.")
             else:
-                print("\nNo changes detected. Database is already up to date.")
+                if not await _open_first_gallery_item(page):
+                    print("Could not open gallery lightbox, will scan for images on page.")
+                image_urls = await _walk_gallery(page, args)
+                print(f"Found {len(image_urls)} gallery images by stepping through the slides.")
+
+            new_images = await _download_new_images(page, image_urls, args, linked_paths, storage_root, temp_dir)
+
+        # --- Final Commit Logic ---
+        await asyncio.to_thread(_save_lot, url, source_site, source_id, title, structured_data, new_images)
+    except Exception as e:
+        print(f"Failed to scrape {url}: {e}")
+
+
+async def run(args):
+    storage_root = Path(args.storage_dir)
+    storage_root.mkdir(parents=True, exist_ok=True)
+    temp_dir = storage_root / "temp"
+    temp_dir.mkdir(exist_ok=True)
+
+    # Ads, media and fonts are blocked, JS/CSS come from a disk cache
+    interceptor = RequestInterceptor.for_crawler("collectingcars")
+
+    async def setup_context(context):
+        await Stealth().apply_stealth_async(context)
+        await interceptor.install(context)
+
+    # One browser for all lots, each lot on its own page
+    async with BrowserPool(
+        size=args.pages,
+        headless=args.headless,
+        storage_state_path=args.storage_state,
+        on_context=setup_context,
+    ) as pool:
+        await asyncio.gather(*(scrape_lot(pool, url, args, storage_root, temp_dir) for url in args.urls))
+    print(f"Requests: {interceptor.stats.summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CollectingCars ad scraper")
+    parser.add_argument("urls", nargs="+", help="Full URL(s) of the CollectingCars listings to scrape.")
+    parser.add_argument(
+        "--storage-dir",
+        default="datasets/storage",
+        help="Base directory for content-addressable image storage (default: 'datasets/storage')",
+    )
+    parser.add_argument("--headless", action="store_true", default=True)
+    parser.add_argument("--limit", type=int, default=20, help="Max number of new images to save.")
+    parser.add_argument("--delay-ms", type=int, default=1000, help="Delay between slides when stepping through the gallery (ms).")
+    parser.add_argument("--pages", type=int, help="Lots scraped at once (default: settings.browser_pool_size)")
+    parser.add_argument(
+        "--storage-state",
+        default=".cache/collectingcars_state.json",
+        help="Browser cookies/storage kept between runs (default: '.cache/collectingcars_state.json')",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args))
 
-            browser.close()
-    finally:
-        db.close()
 
 if __name__ == "__main__":
-    project_root = Path(__file__).resolve().parents[1]
-    sys.path.append(str(project_root))
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,48 @@
+"""Merge raw ads stored under content-hash ids into rows with stable source ids.
+
+See ``scraper/reconcile.py`` for how duplicates are detected and merged.
+
+Usage:
+    python scripts/reconcile_source_ids.py --dry-run
+    python scripts/reconcile_source_ids.py --source-site mobile.bg
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to the Python path
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from db.database import SessionLocal
+from scraper.reconcile import reconcile_source_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge duplicate raw ads under stable source ids.")
+    parser.add_argument("--source-site", action="append", dest="source_sites", help="Site to reconcile (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Report the merges without changing anything")
+    parser.add_argument("--verbose", action="store_true", help="List every merged group")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        results = reconcile_source_ids(db, args.source_sites, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    for result in results:
+        print(f"{result.source_site}: {result.rows} rows")
+        print(f"  ✓ Merged {result.groups_merged} groups, removing {result.rows_removed} duplicate rows")
+        print(f"  ✓ Moved {result.ids_rewritten} ads to stable ids")
+        print(f"  {result.unresolved} ads only have a content-hash id")
+        if args.verbose:
+            for merge in result.merges:
+                print(f"    {merge['source_id']}: kept {merge['kept']}, removed {merge['removed']}")
+    if args.dry_run:
+        print("Dry run - nothing was changed")
+
+
+if __name__ == "__main__":
+    main()
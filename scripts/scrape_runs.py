@@ -0,0 +1,64 @@
+"""Recent scrape runs per site: throughput and extraction yield from ``scrape_runs``.
+
+Rows of one crawl run (several workers, or a resumed crawl) are listed
+separately. Compare a run against the ones before it to spot regressions -
+fewer listings kept per container, slower fetches, more error statuses.
+
+Usage:
+    python scripts/scrape_runs.py
+    python scripts/scrape_runs.py --site mobile.bg --limit 50
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to the Python path
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from db.database import SessionLocal
+from db.models import ScrapeRun
+
+
+def _ms(value):
+    return f"{value:.0f}" if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the telemetry of recent scrape runs.")
+    parser.add_argument("--site", help="Only runs of this source site (e.g. mobile.bg)")
+    parser.add_argument("--limit", type=int, default=20, help="Number of runs to show (default: 20)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        query = db.query(ScrapeRun)
+        if args.site:
+            query = query.filter(ScrapeRun.site == args.site)
+        runs = query.order_by(ScrapeRun.started_at.desc()).limit(args.limit).all()
+    finally:
+        db.close()
+
+    if not runs:
+        print("No scrape runs recorded yet")
+        return
+
+    print(
+        f"{'started':<17} {'site':<14} {'run':<8} {'status':<8} {'pages':>6} {'KiB':>7} {'p50 ms':>7} "
+        f"{'p90 ms':>7} {'parse ms':>8} {'kept':>9} {'new':>5} {'seen':>5} {'fail':>5} {'img':>5}  statuses"
+    )
+    for run in runs:
+        parse_ms = run.parse_seconds * 1000 / run.pages_parsed if run.pages_parsed else None
+        kept = f"{run.listings_kept}/{run.containers_found}"
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted((run.status_counts or {}).items()))
+        print(
+            f"{run.started_at:%Y-%m-%d %H:%M} {run.site:<14} {run.crawl_run_id[:8]:<8} {run.status:<8} "
+            f"{run.pages_fetched:>6} {run.bytes_fetched / 1024:>7.0f} {_ms(run.fetch_latency_p50_ms):>7} "
+            f"{_ms(run.fetch_latency_p90_ms):>7} {_ms(parse_ms):>8} {kept:>9} {run.rows_inserted:>5} "
+            f"{run.rows_seen:>5} {run.rows_failed:>5} {run.images_downloaded:>5}  {statuses}"
+        )
+
+
+if __name__ == "__main__":
+    main()